@@ -1,19 +1,29 @@
 import os
 from logging.config import fileConfig
 
-from sqlalchemy import engine_from_config
+from sqlalchemy import engine_from_config, event
 from sqlalchemy import pool
 
 from alembic import context
 
-from ledger.models import Base
-from ledger.config import DATABASE_URL
+from ledger.models import Base, bump_ledger_version
+from ledger.config import DATABASE_URL, ensure_db_dir
+from ledger.migrations import clear_finished_steps
 
 config = context.config
 
-if config.config_file_name is not None:
+# `ledger migrate` reports progress itself
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
+# Rows per batch of data steps and seconds between batches, e.g.
+# `alembic -x batch_size=500 -x pause=0 upgrade head`
+x_arguments = context.get_x_argument(as_dictionary=True)
+if "batch_size" in x_arguments:
+    config.attributes["batch_size"] = int(x_arguments["batch_size"])
+if "pause" in x_arguments:
+    config.attributes["pause"] = float(x_arguments["pause"])
+
 target_metadata = Base.metadata
 
 def run_migrations_offline() -> None:
@@ -31,6 +41,7 @@ def run_migrations_offline() -> None:
 
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
+    ensure_db_dir()
     configuration = config.get_section(config.config_ini_section)
     configuration["sqlalchemy.url"] = DATABASE_URL
     connectable = engine_from_config(
@@ -38,6 +49,8 @@ def run_migrations_online() -> None:
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
+    # Data steps and schema changes can change reports like any write
+    event.listen(connectable, "commit", bump_ledger_version)
 
     with connectable.connect() as connection:
         context.configure(
@@ -47,6 +60,8 @@ def run_migrations_online() -> None:
         with context.begin_transaction():
             context.run_migrations()
 
+        clear_finished_steps(connection)
+
 if context.is_offline_mode():
     run_migrations_offline()
 else:
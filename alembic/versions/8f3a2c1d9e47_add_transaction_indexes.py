@@ -0,0 +1,30 @@
+"""add transaction indexes
+
+Revision ID: 8f3a2c1d9e47
+Revises: 555b95d528b0
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3a2c1d9e47'
+down_revision: Union[str, None] = '555b95d528b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_transactions_account_id_date', 'transactions', ['account_id', 'date'])
+    op.create_index('ix_transactions_category_date', 'transactions', ['category', 'date'])
+    op.create_index('ix_transactions_date', 'transactions', ['date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_date', table_name='transactions')
+    op.drop_index('ix_transactions_category_date', table_name='transactions')
+    op.drop_index('ix_transactions_account_id_date', table_name='transactions')
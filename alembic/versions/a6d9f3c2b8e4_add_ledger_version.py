@@ -0,0 +1,53 @@
+"""add ledger version counter
+
+Revision ID: a6d9f3c2b8e4
+Revises: f7c1a9d3e5b2
+Create Date: 2026-10-17 15:22:47.906135
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d9f3c2b8e4'
+down_revision: Union[str, None] = 'f7c1a9d3e5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+VERSIONED_TABLES = (
+    "transactions", "categories", "bank_accounts", "monthly_rollups", "balance_checkpoints",
+)
+OPERATIONS = ("INSERT", "UPDATE", "DELETE")
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ledger_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('token', sa.String(length=16), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute("""
+        INSERT INTO ledger_version (id, token, version)
+        VALUES (1, lower(hex(randomblob(8))), 0)
+    """)
+    for table in VERSIONED_TABLES:
+        for operation in OPERATIONS:
+            op.execute(f"""
+                CREATE TRIGGER {table}_version_{operation.lower()}
+                AFTER {operation} ON {table} BEGIN
+                    UPDATE ledger_version SET version = version + 1;
+                END
+            """)
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        for operation in OPERATIONS:
+            op.execute(f"DROP TRIGGER {table}_version_{operation.lower()}")
+    op.drop_table('ledger_version')
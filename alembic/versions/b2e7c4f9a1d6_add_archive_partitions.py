@@ -0,0 +1,33 @@
+"""add archive partitions
+
+Revision ID: b2e7c4f9a1d6
+Revises: a6d9f3c2b8e4
+Create Date: 2026-10-17 16:48:03.115274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e7c4f9a1d6'
+down_revision: Union[str, None] = 'a6d9f3c2b8e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'archive_partitions',
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(length=500), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('year'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('archive_partitions')
@@ -0,0 +1,52 @@
+"""add monthly rollups
+
+Revision ID: b4d7e1a2c3f5
+Revises: 8f3a2c1d9e47
+Create Date: 2026-10-17 10:02:47.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d7e1a2c3f5'
+down_revision: Union[str, None] = '8f3a2c1d9e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('monthly_rollups',
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('income', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('expenses', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['account_id'], ['bank_accounts.id'], ),
+        sa.PrimaryKeyConstraint('account_id', 'category', 'period')
+    )
+
+    # Backfill from existing transactions
+    op.execute("""
+        INSERT INTO monthly_rollups
+            (account_id, category, period, total, count, income, expenses)
+        SELECT
+            account_id,
+            COALESCE(category, ''),
+            strftime('%Y-%m', date),
+            SUM(amount),
+            COUNT(*),
+            SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END),
+            SUM(CASE WHEN amount < 0 THEN amount ELSE 0 END)
+        FROM transactions
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('monthly_rollups')
@@ -0,0 +1,43 @@
+"""bump the ledger version once per commit
+
+Revision ID: b7d9f1a3c5e8
+Revises: d8b1f6c3e2a9
+Create Date: 2026-10-17 21:08:14.362517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d9f1a3c5e8'
+down_revision: Union[str, None] = 'd8b1f6c3e2a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Tables whose row triggers bumped the version before the ledger engine
+# did it once per commit (see ledger.models.bump_ledger_version)
+VERSIONED_TABLES = (
+    "transactions", "categories", "bank_accounts", "monthly_rollups", "balance_checkpoints",
+)
+OPERATIONS = ("INSERT", "UPDATE", "DELETE")
+
+
+def upgrade() -> None:
+    for table in VERSIONED_TABLES:
+        for operation in OPERATIONS:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_version_{operation.lower()}")
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        for operation in OPERATIONS:
+            op.execute(f"""
+                CREATE TRIGGER {table}_version_{operation.lower()}
+                AFTER {operation} ON {table} BEGIN
+                    UPDATE ledger_version SET version = version + 1;
+                END
+            """)
@@ -0,0 +1,97 @@
+"""add transaction fingerprints
+
+Revision ID: c5f8e2a7d9b3
+Revises: b2e7c4f9a1d6
+Create Date: 2026-10-17 18:02:41.527390
+
+"""
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from ledger.migrations import batched_upgrade
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f8e2a7d9b3'
+down_revision: Union[str, None] = 'b2e7c4f9a1d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FINGERPRINT_ROWS = (
+    "SELECT id, account_id, date, amount_cents, description FROM transactions"
+    " WHERE id BETWEEN ? AND ? AND fingerprint IS NULL"
+)
+
+
+def transaction_fingerprint(
+    account_id: int, day: str, amount_cents: int, description: str
+) -> str:
+    """The fingerprint as of this revision, for a ``YYYY-MM-DD`` day.
+
+    A copy rather than an import of ledger.dedupe.transaction_fingerprint,
+    so the revision backfills the same values however that changes later.
+    """
+    normalized = " ".join(description.casefold().split())
+    key = f"{account_id}|{day}|{amount_cents}|{normalized}"
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+def fill_fingerprints(conn: sqlite3.Connection, first_id: int, last_id: int) -> None:
+    """Backfill the fingerprints of a range of transactions."""
+    rows = conn.execute(FINGERPRINT_ROWS, (first_id, last_id)).fetchall()
+    conn.executemany(
+        "UPDATE transactions SET fingerprint = ? WHERE id = ?",
+        (
+            (
+                transaction_fingerprint(account_id, date[:10], amount_cents, description),
+                id,
+            )
+            for id, account_id, date, amount_cents, description in rows
+        ),
+    )
+
+
+def add_column(conn: sqlite3.Connection) -> None:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}
+    if "fingerprint" not in columns:
+        conn.execute("ALTER TABLE transactions ADD COLUMN fingerprint VARCHAR(16)")
+
+
+def add_index(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_transactions_fingerprint ON transactions (fingerprint)")
+
+
+def upgrade() -> None:
+    # Archive partitions share the transactions schema; they are separate
+    # files, so they are upgraded over their own connections, each in one
+    # transaction. Every part skips what an interrupted run already did
+    for (path,) in op.get_bind().exec_driver_sql("SELECT path FROM archive_partitions"):
+        if Path(path).exists():
+            archive = sqlite3.connect(path)
+            try:
+                add_column(archive)
+                (max_id,) = archive.execute("SELECT coalesce(max(id), 0) FROM transactions").fetchone()
+                fill_fingerprints(archive, 0, max_id)
+                add_index(archive)
+                archive.commit()
+            finally:
+                archive.close()
+
+    main = op.get_bind().connection.driver_connection
+    add_column(main)
+    batched_upgrade(
+        "c5f8e2a7d9b3:fingerprints", "transactions",
+        lambda connection, first_id, last_id: fill_fingerprints(main, first_id, last_id),
+    )
+    add_index(main)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_fingerprint', table_name='transactions')
+    op.drop_column('transactions', 'fingerprint')
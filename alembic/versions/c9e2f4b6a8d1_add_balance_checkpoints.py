@@ -0,0 +1,46 @@
+"""add balance checkpoints
+
+Revision ID: c9e2f4b6a8d1
+Revises: b4d7e1a2c3f5
+Create Date: 2026-10-17 11:24:09.553870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e2f4b6a8d1'
+down_revision: Union[str, None] = 'b4d7e1a2c3f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('balance_checkpoints',
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column('balance', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['account_id'], ['bank_accounts.id'], ),
+        sa.PrimaryKeyConstraint('account_id', 'period')
+    )
+
+    # Backfill running balances from the monthly rollups
+    op.execute("""
+        INSERT INTO balance_checkpoints (account_id, period, balance)
+        SELECT
+            account_id,
+            period,
+            SUM(total) OVER (PARTITION BY account_id ORDER BY period)
+        FROM (
+            SELECT account_id, period, SUM(total) AS total
+            FROM monthly_rollups
+            GROUP BY account_id, period
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('balance_checkpoints')
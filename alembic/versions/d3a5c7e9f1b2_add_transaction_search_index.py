@@ -0,0 +1,61 @@
+"""add transaction search index
+
+Revision ID: d3a5c7e9f1b2
+Revises: c9e2f4b6a8d1
+Create Date: 2026-10-17 12:41:55.207913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a5c7e9f1b2'
+down_revision: Union[str, None] = 'c9e2f4b6a8d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE VIRTUAL TABLE transactions_fts USING fts5(
+            description, category,
+            content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+            INSERT INTO transactions_fts (rowid, description, category)
+            VALUES (new.id, new.description, new.category);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+            VALUES ('delete', old.id, old.description, old.category);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER transactions_fts_update
+        AFTER UPDATE OF description, category ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+            VALUES ('delete', old.id, old.description, old.category);
+            INSERT INTO transactions_fts (rowid, description, category)
+            VALUES (new.id, new.description, new.category);
+        END
+    """)
+
+    # Index existing transactions
+    op.execute("""
+        INSERT INTO transactions_fts (rowid, description, category)
+        SELECT id, description, category FROM transactions
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER transactions_fts_update")
+    op.execute("DROP TRIGGER transactions_fts_delete")
+    op.execute("DROP TRIGGER transactions_fts_insert")
+    op.execute("DROP TABLE transactions_fts")
@@ -0,0 +1,36 @@
+"""add category rules
+
+Revision ID: d8b1f6c3e2a9
+Revises: c5f8e2a7d9b3
+Create Date: 2026-10-17 19:21:37.804116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b1f6c3e2a9'
+down_revision: Union[str, None] = 'c5f8e2a7d9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'category_rules',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('pattern', sa.String(length=200), nullable=False),
+        sa.Column('regex', sa.Boolean(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('category_rules')
@@ -0,0 +1,179 @@
+"""normalize transaction categories
+
+Revision ID: e4b8d2f6a1c3
+Revises: d3a5c7e9f1b2
+Create Date: 2026-10-17 13:20:38.664021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from ledger.migrations import batched_copy
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8d2f6a1c3'
+down_revision: Union[str, None] = 'd3a5c7e9f1b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The transactions table with category_id in place of category, filled in
+# batches and swapped in at the end
+REBUILT_TABLE = '_transactions_rebuild'
+REBUILT_COLUMNS = (
+    'id', 'date', 'description', 'amount', 'account_id', 'created_at', 'category_id',
+)
+
+def create_search_triggers(category_sql: str, category_column: str) -> None:
+    """Create the FTS triggers, reading the category name with category_sql
+    (with {row} standing for new or old)."""
+    new = category_sql.format(row="new")
+    old = category_sql.format(row="old")
+    op.execute(f"""
+        CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+            INSERT INTO transactions_fts (rowid, description, category)
+            VALUES (new.id, new.description, {new});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+            VALUES ('delete', old.id, old.description, {old});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER transactions_fts_update
+        AFTER UPDATE OF description, {category_column} ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+            VALUES ('delete', old.id, old.description, {old});
+            INSERT INTO transactions_fts (rowid, description, category)
+            VALUES (new.id, new.description, {new});
+        END
+    """)
+
+
+def drop_search_triggers() -> None:
+    op.execute("DROP TRIGGER transactions_fts_update")
+    op.execute("DROP TRIGGER transactions_fts_delete")
+    op.execute("DROP TRIGGER transactions_fts_insert")
+
+
+def upgrade() -> None:
+    # Every category name used by a transaction becomes a category row
+    op.execute("""
+        INSERT INTO categories (name, created_at)
+        SELECT DISTINCT category, CURRENT_TIMESTAMP
+        FROM transactions
+        WHERE category IS NOT NULL
+          AND category NOT IN (SELECT name FROM categories)
+    """)
+
+    # Kept by an interrupted run, whose copied batches are not redone
+    op.create_table(REBUILT_TABLE,
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.Column('description', sa.String(length=200), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['bank_accounts.id'], ),
+        sa.ForeignKeyConstraint(
+            ['category_id'], ['categories.id'], name='fk_transactions_category_id_categories'
+        ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    batched_copy(
+        "e4b8d2f6a1c3:category_ids", "transactions", REBUILT_TABLE, REBUILT_COLUMNS,
+        "s.id, s.date, s.description, s.amount, s.account_id, s.created_at,"
+        " (SELECT id FROM categories WHERE name = s.category)",
+    )
+
+    # Dropping the table drops its search triggers too
+    op.drop_table('transactions')
+    op.rename_table(REBUILT_TABLE, 'transactions')
+    op.create_index('ix_transactions_account_id_date', 'transactions', ['account_id', 'date'])
+    op.create_index('ix_transactions_date', 'transactions', ['date'])
+    op.create_index('ix_transactions_category_id_date', 'transactions', ['category_id', 'date'])
+
+    create_search_triggers(
+        "(SELECT name FROM categories WHERE id = {row}.category_id)", "category_id"
+    )
+
+    # Rollups are keyed by category id, with 0 for uncategorized
+    op.drop_table('monthly_rollups')
+    op.create_table('monthly_rollups',
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('income', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('expenses', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['account_id'], ['bank_accounts.id'], ),
+        sa.PrimaryKeyConstraint('account_id', 'category_id', 'period')
+    )
+    op.execute("""
+        INSERT INTO monthly_rollups
+            (account_id, category_id, period, total, count, income, expenses)
+        SELECT
+            account_id,
+            COALESCE(category_id, 0),
+            strftime('%Y-%m', date),
+            SUM(amount),
+            COUNT(*),
+            SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END),
+            SUM(CASE WHEN amount < 0 THEN amount ELSE 0 END)
+        FROM transactions
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    drop_search_triggers()
+
+    op.add_column('transactions', sa.Column('category', sa.String(length=50), nullable=True))
+    op.execute("""
+        UPDATE transactions
+        SET category = (SELECT name FROM categories WHERE id = transactions.category_id)
+        WHERE category_id IS NOT NULL
+    """)
+
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.drop_index('ix_transactions_category_id_date')
+        batch_op.drop_constraint('fk_transactions_category_id_categories', type_='foreignkey')
+        batch_op.drop_column('category_id')
+        batch_op.create_index('ix_transactions_category_date', ['category', 'date'])
+
+    create_search_triggers("{row}.category", "category")
+
+    op.drop_table('monthly_rollups')
+    op.create_table('monthly_rollups',
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('income', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('expenses', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['account_id'], ['bank_accounts.id'], ),
+        sa.PrimaryKeyConstraint('account_id', 'category', 'period')
+    )
+    op.execute("""
+        INSERT INTO monthly_rollups
+            (account_id, category, period, total, count, income, expenses)
+        SELECT
+            account_id,
+            COALESCE(category, ''),
+            strftime('%Y-%m', date),
+            SUM(amount),
+            COUNT(*),
+            SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END),
+            SUM(CASE WHEN amount < 0 THEN amount ELSE 0 END)
+        FROM transactions
+        GROUP BY 1, 2, 3
+    """)
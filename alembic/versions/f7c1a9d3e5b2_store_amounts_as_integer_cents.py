@@ -0,0 +1,166 @@
+"""store amounts as integer cents
+
+Revision ID: f7c1a9d3e5b2
+Revises: e4b8d2f6a1c3
+Create Date: 2026-10-17 14:05:12.381940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from ledger.migrations import batched_copy
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7c1a9d3e5b2'
+down_revision: Union[str, None] = 'e4b8d2f6a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The transactions table with amount_cents in place of amount, filled in
+# batches and swapped in at the end
+REBUILT_TABLE = '_transactions_rebuild'
+REBUILT_COLUMNS = (
+    'id', 'date', 'description', 'account_id', 'created_at', 'category_id', 'amount_cents',
+)
+
+CATEGORY_NAME = "(SELECT name FROM categories WHERE id = {row}.category_id)"
+
+
+def create_search_triggers() -> None:
+    new = CATEGORY_NAME.format(row="new")
+    old = CATEGORY_NAME.format(row="old")
+    op.execute(f"""
+        CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+            INSERT INTO transactions_fts (rowid, description, category)
+            VALUES (new.id, new.description, {new});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+            VALUES ('delete', old.id, old.description, {old});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER transactions_fts_update
+        AFTER UPDATE OF description, category_id ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+            VALUES ('delete', old.id, old.description, {old});
+            INSERT INTO transactions_fts (rowid, description, category)
+            VALUES (new.id, new.description, {new});
+        END
+    """)
+
+
+def drop_search_triggers() -> None:
+    op.execute("DROP TRIGGER transactions_fts_update")
+    op.execute("DROP TRIGGER transactions_fts_delete")
+    op.execute("DROP TRIGGER transactions_fts_insert")
+
+
+def rebuild_summaries(suffix: str, money: sa.types.TypeEngine, amount_sql: str) -> None:
+    """Recreate the rollup and checkpoint tables with money columns named
+    <column><suffix> and backfill them from transactions.amount<suffix>."""
+    op.drop_table('balance_checkpoints')
+    op.drop_table('monthly_rollups')
+
+    op.create_table('monthly_rollups',
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column(f'total{suffix}', money, nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column(f'income{suffix}', money, nullable=False),
+        sa.Column(f'expenses{suffix}', money, nullable=False),
+        sa.ForeignKeyConstraint(['account_id'], ['bank_accounts.id'], ),
+        sa.PrimaryKeyConstraint('account_id', 'category_id', 'period')
+    )
+    op.create_table('balance_checkpoints',
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column(f'balance{suffix}', money, nullable=False),
+        sa.ForeignKeyConstraint(['account_id'], ['bank_accounts.id'], ),
+        sa.PrimaryKeyConstraint('account_id', 'period')
+    )
+
+    op.execute(f"""
+        INSERT INTO monthly_rollups
+            (account_id, category_id, period,
+             total{suffix}, count, income{suffix}, expenses{suffix})
+        SELECT
+            account_id,
+            COALESCE(category_id, 0),
+            strftime('%Y-%m', date),
+            SUM({amount_sql}),
+            COUNT(*),
+            SUM(CASE WHEN {amount_sql} > 0 THEN {amount_sql} ELSE 0 END),
+            SUM(CASE WHEN {amount_sql} < 0 THEN {amount_sql} ELSE 0 END)
+        FROM transactions
+        GROUP BY 1, 2, 3
+    """)
+    op.execute(f"""
+        INSERT INTO balance_checkpoints (account_id, period, balance{suffix})
+        SELECT
+            account_id,
+            period,
+            SUM(total) OVER (PARTITION BY account_id ORDER BY period)
+        FROM (
+            SELECT account_id, period, SUM(total{suffix}) AS total
+            FROM monthly_rollups
+            GROUP BY account_id, period
+        )
+    """)
+
+
+def upgrade() -> None:
+    # Kept by an interrupted run, whose copied batches are not redone
+    op.create_table(REBUILT_TABLE,
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.Column('description', sa.String(length=200), nullable=False),
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('amount_cents', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['account_id'], ['bank_accounts.id'], ),
+        sa.ForeignKeyConstraint(
+            ['category_id'], ['categories.id'], name='fk_transactions_category_id_categories'
+        ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    batched_copy(
+        "f7c1a9d3e5b2:amount_cents", "transactions", REBUILT_TABLE, REBUILT_COLUMNS,
+        "s.id, s.date, s.description, s.account_id, s.created_at, s.category_id,"
+        " CAST(ROUND(s.amount * 100) AS INTEGER)",
+    )
+
+    # Dropping the table drops its search triggers too
+    op.drop_table('transactions')
+    op.rename_table(REBUILT_TABLE, 'transactions')
+    op.create_index('ix_transactions_account_id_date', 'transactions', ['account_id', 'date'])
+    op.create_index('ix_transactions_date', 'transactions', ['date'])
+    op.create_index('ix_transactions_category_id_date', 'transactions', ['category_id', 'date'])
+
+    create_search_triggers()
+    rebuild_summaries('_cents', sa.BigInteger(), 'amount_cents')
+
+
+def downgrade() -> None:
+    drop_search_triggers()
+
+    op.add_column('transactions', sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=True))
+    op.execute("UPDATE transactions SET amount = amount_cents / 100.0")
+
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.drop_column('amount_cents')
+        batch_op.alter_column(
+            'amount', existing_type=sa.Numeric(precision=10, scale=2), nullable=False
+        )
+
+    create_search_triggers()
+    rebuild_summaries('', sa.Numeric(precision=12, scale=2), 'amount')
@@ -0,0 +1,87 @@
+"""
+Write and read throughput of each SQLite performance profile.
+
+Usage: python -m benchmarks.bench_profiles [--rows N] [--writes N] [--reads N]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Union
+
+from sqlalchemy.orm import Session
+
+from ledger.analysis import get_category_summary
+from ledger.config import PERFORMANCE_PROFILES
+from ledger.models import Base
+from ledger.storage import (
+    create_ledger_engine, create_transaction, get_transactions
+)
+
+from .synthetic import populate
+
+
+def bench_profile(
+    name: str, rows: int, writes: int, reads: int
+) -> Dict[str, Union[str, float]]:
+    """Run the write and read workloads against a fresh database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_ledger_engine(
+            f"sqlite:///{Path(tmp) / 'bench.db'}", PERFORMANCE_PROFILES[name]
+        )
+        Base.metadata.create_all(engine)
+        results: Dict[str, Union[str, float]] = {"profile": name}
+
+        with Session(engine) as db:
+            started = time.perf_counter()
+            account_ids = populate(db, rows)
+            results["bulk rows/s"] = rows / (time.perf_counter() - started)
+
+            # One commit per row, like repeated `ledger add` calls
+            started = time.perf_counter()
+            for i in range(writes):
+                create_transaction(
+                    db, datetime(2023, 1, 1), f"write {i}", Decimal("-1.00"), account_ids[0]
+                )
+            results["commits/s"] = writes / (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            fetched = 0
+            for i in range(reads):
+                month = datetime(2021 + i % 3, i % 12 + 1, 1)
+                fetched += len(get_transactions(
+                    db, start_date=month, account_id=account_ids[i % len(account_ids)]
+                ))
+                get_category_summary(db, start_date=month)
+            elapsed = time.perf_counter() - started
+            results["read rows/s"] = fetched / elapsed
+            results["reports/s"] = reads / elapsed
+
+        engine.dispose()
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows in the synthetic ledger")
+    parser.add_argument("--writes", type=int, default=500, help="Single-row commits to time")
+    parser.add_argument("--reads", type=int, default=30, help="Filtered reads to time")
+    args = parser.parse_args()
+    # Time the queries themselves, not the report cache
+    os.environ["LEDGER_CACHE"] = "off"
+
+    columns = ["profile", "bulk rows/s", "commits/s", "read rows/s", "reports/s"]
+    print(" | ".join(f"{c:>12}" for c in columns))
+    for name in PERFORMANCE_PROFILES:
+        results = bench_profile(name, args.rows, args.writes, args.reads)
+        print(" | ".join(
+            f"{results[c]:>12,.0f}" if isinstance(results[c], float) else f"{results[c]:>12}"
+            for c in columns
+        ))
+
+
+if __name__ == "__main__":
+    main()
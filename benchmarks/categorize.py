@@ -0,0 +1,71 @@
+"""
+Rule matching cost as the number of rules grows.
+
+Matches synthetic descriptions against R phrase rules, once with the
+compiled RuleSet and once by testing every rule in turn, which is what
+per-row rule evaluation costs without compilation.
+
+Usage: python -m benchmarks.categorize [--rows N] [--rules R ...]
+"""
+import argparse
+import random
+import time
+from typing import List, Optional
+
+from ledger.rules import Rule, RuleSet
+
+from .synthetic import MERCHANTS, generate_transactions
+
+
+def make_rules(count: int, seed: int = 42) -> List[Rule]:
+    """The synthetic merchants plus random filler phrases, up to ``count``."""
+    rng = random.Random(seed)
+    phrases = [merchant.lower() for merchant in MERCHANTS]
+    while len(phrases) < count:
+        phrases.append("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 12))))
+    return [
+        Rule(i, phrase, False, i % 9 + 1, f"Category {i % 9}", rng.randint(0, 3))
+        for i, phrase in enumerate(phrases[:count])
+    ]
+
+
+def match_each(rules: List[Rule], description: str) -> Optional[Rule]:
+    """Test every rule in precedence order."""
+    text = description.lower()
+    for rule in rules:
+        if rule.pattern in text:
+            return rule
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000, help="Descriptions to match")
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000, 5000], help="Rule counts")
+    args = parser.parse_args()
+
+    descriptions = [row["description"] for row in generate_transactions(args.rows, [1])]
+
+    print(f"{'rules':>6} | {'compile ms':>10} | {'compiled rows/s':>15} | {'per-rule rows/s':>15}")
+    for count in args.rules:
+        rules = make_rules(count)
+        started = time.perf_counter()
+        compiled = RuleSet(rules)
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for description in descriptions:
+            compiled.match(description)
+        fast = len(descriptions) / (time.perf_counter() - started)
+
+        ordered = compiled.rules
+        started = time.perf_counter()
+        for description in descriptions:
+            match_each(ordered, description)
+        slow = len(descriptions) / (time.perf_counter() - started)
+
+        print(f"{count:>6} | {compile_ms:>10.1f} | {fast:>15,.0f} | {slow:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
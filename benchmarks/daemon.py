@@ -0,0 +1,82 @@
+"""
+Per-command latency of the CLI in-process versus through `ledger serve`.
+
+Runs each command as a fresh `ledger` process, once with the daemon
+bypassed and once with a daemon serving the same ledger.
+
+Usage: python -m benchmarks.daemon [--runs N] [--transactions N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from ledger.models import Base
+from ledger.storage import create_ledger_engine
+
+from .synthetic import populate
+
+CASES: Dict[str, List[str]] = {
+    "add": ["add", "-4.20", "--description", "daemon check", "--account-id", "1"],
+    "list": ["list", "--limit", "20"],
+    "report": ["report", "--account-id", "1"],
+    "summary": ["summary", "--period", "monthly"],
+}
+
+
+def time_runs(args: List[str], env: Dict[str, str], runs: int) -> float:
+    """Median wall time in ms of running `ledger ARGS` as a new process."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "ledger.client", *args],
+            env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="Runs per command; the median counts")
+    parser.add_argument("--transactions", type=int, default=100_000, help="Transactions in the ledger")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "ledger.db"
+        engine = create_ledger_engine(f"sqlite:///{db_path}")
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            populate(db, args.transactions)
+        engine.dispose()
+
+        env = dict(os.environ, LEDGER_DB=str(db_path))
+        socket_path = f"{db_path}.sock"
+        daemon = subprocess.Popen(
+            [sys.executable, "-m", "ledger.cli", "serve"], env=env, stdout=subprocess.DEVNULL
+        )
+        try:
+            while not os.path.exists(socket_path):
+                if daemon.poll() is not None:
+                    raise RuntimeError("ledger serve exited during startup")
+                time.sleep(0.05)
+
+            print(f"{'command':>8} | {'in-process ms':>13} | {'daemon ms':>9} | speedup")
+            for name, cli_args in CASES.items():
+                cold = time_runs(cli_args, dict(env, LEDGER_NO_DAEMON="1"), args.runs)
+                warm = time_runs(cli_args, env, args.runs)
+                print(f"{name:>8} | {cold:>13.1f} | {warm:>9.1f} | {cold / warm:>6.1f}x")
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+
+if __name__ == "__main__":
+    main()
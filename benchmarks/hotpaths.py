@@ -0,0 +1,302 @@
+"""
+Benchmark harness for the ledger hot paths.
+
+Builds (or reuses) a deterministic synthetic ledger, times each storage and
+analysis entry point, and reports wall time, rows/sec and peak RSS. Results
+can be saved as JSON and compared against an earlier run to catch
+regressions.
+
+Usage:
+    python -m benchmarks.hotpaths --transactions 1000000 --output after.json
+    python -m benchmarks.hotpaths --compare before.json
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from decimal import Decimal
+from functools import partial
+from itertools import combinations
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
+
+import sqlalchemy
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ledger.analysis import BACKENDS, get_account_balance, get_category_summary, print_financial_report
+from ledger.analytics import print_trends
+from ledger.models import Base, Transaction
+from ledger.search import search_transactions
+from ledger.storage import create_ledger_engine, create_transaction, filter_transactions, get_transactions
+
+from .synthetic import START_DATE, category_names, populate
+
+
+class Benchmark(NamedTuple):
+    """One timed operation and the transaction filters that scope its work."""
+    name: str
+    run: Callable[[Session], Any]
+    scope: Dict[str, Any]
+    rows: Optional[int] = None  # fixed row count instead of counting the scope
+
+
+def build_benchmarks(account_id: int, category: str, years: int, inserts: int) -> List[Benchmark]:
+    """The hot paths to time, with filter values that exist in the ledger."""
+    middle = datetime(START_DATE.year + years // 2, 1, 1)
+    filters: Dict[str, Any] = {
+        "start_date": middle,
+        "end_date": datetime(middle.year, 12, 31),
+        "category": category,
+        "account_id": account_id,
+    }
+
+    def label(name: str, scope: Dict[str, Any]) -> str:
+        return f"{name}[{','.join(scope)}]"
+
+    benchmarks = []
+    for size in range(len(filters) + 1):
+        for combo in combinations(filters, size):
+            scope = {k: filters[k] for k in combo}
+            benchmarks.append(Benchmark(
+                label("get_transactions", scope),
+                partial(get_transactions, **scope),
+                scope,
+            ))
+
+    for combo in [(), ("account_id",), ("end_date",), ("account_id", "end_date")]:
+        scope = {k: filters[k] for k in combo}
+        benchmarks.append(Benchmark(
+            label("get_account_balance", scope),
+            partial(get_account_balance, **scope),
+            scope,
+        ))
+
+    for combo in [(), ("start_date", "end_date"), ("account_id",)]:
+        scope = {k: filters[k] for k in combo}
+        benchmarks.append(Benchmark(
+            label("get_category_summary", scope),
+            partial(get_category_summary, **scope),
+            scope,
+        ))
+
+    def report(db: Session, scope: Dict[str, Any], backend: str) -> None:
+        with redirect_stdout(io.StringIO()):
+            print_financial_report(db, **scope, backend=backend)
+
+    for backend in BACKENDS:
+        for combo in [(), ("start_date", "end_date", "account_id")]:
+            scope = {k: filters[k] for k in combo}
+            name = "print_financial_report" if backend == "sql" else f"print_financial_report.{backend}"
+            benchmarks.append(Benchmark(
+                label(name, scope),
+                partial(report, scope=scope, backend=backend),
+                scope,
+            ))
+
+    def trends(db: Session, scope: Dict[str, Any]) -> None:
+        with redirect_stdout(io.StringIO()):
+            print_trends(db, **scope)
+
+    for combo in [(), ("account_id",)]:
+        scope = {k: filters[k] for k in combo}
+        benchmarks.append(Benchmark(
+            label("print_trends", scope),
+            partial(trends, scope=scope),
+            scope,
+        ))
+
+    for combo in [(), ("start_date", "end_date", "account_id")]:
+        scope = {k: filters[k] for k in combo}
+        benchmarks.append(Benchmark(
+            label("search_transactions", scope),
+            partial(search_transactions, text="cafe", **scope),
+            scope,
+        ))
+
+    # Writes go last since they change the ledger
+    def insert(db: Session) -> None:
+        for i in range(inserts):
+            create_transaction(db, middle, f"benchmark {i}", Decimal("-4.20"), account_id, category)
+
+    benchmarks.append(Benchmark("create_transaction", insert, {}, rows=inserts))
+    return benchmarks
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(db_url: str, benchmark: Benchmark, repeat: int) -> Dict[str, float]:
+    """Time a benchmark on a fresh engine; returns its metrics."""
+    engine = create_ledger_engine(db_url)
+    with Session(engine) as db:
+        rows = benchmark.rows
+        if rows is None:
+            count = select(func.count()).select_from(Transaction)
+            rows = db.scalar(filter_transactions(count, **benchmark.scope)) or 0
+
+        timings = []
+        for _ in range(1 if benchmark.rows else repeat):
+            started = time.perf_counter()
+            benchmark.run(db)
+            timings.append(time.perf_counter() - started)
+    engine.dispose()
+
+    wall = min(timings)
+    return {
+        "wall_s": wall,
+        "rows": rows,
+        "rows_per_s": rows / wall if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _child(conn: Connection, db_url: str, benchmark: Benchmark, repeat: int) -> None:
+    try:
+        conn.send(measure(db_url, benchmark, repeat))
+    except Exception as e:
+        conn.send(e)
+    finally:
+        conn.close()
+
+
+def measure_isolated(db_url: str, benchmark: Benchmark, repeat: int) -> Dict[str, float]:
+    """Run a benchmark in a forked process so peak RSS is per operation."""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return measure(db_url, benchmark, repeat)
+
+    context = multiprocessing.get_context("fork")
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(child, db_url, benchmark, repeat))
+    process.start()
+    child.close()
+    result: Union[Dict[str, float], Exception] = parent.recv()
+    process.join()
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def git_revision() -> Optional[str]:
+    """Current git commit of the working tree, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline_path: Path, threshold: float) -> int:
+    """Print wall time ratios against a baseline run.
+
+    Returns:
+        int: Number of benchmarks slower than the baseline by more than threshold
+    """
+    baseline = json.loads(baseline_path.read_text())["results"]
+    regressions = 0
+    print(f"\nCompared with {baseline_path}:")
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        ratio = metrics["wall_s"] / baseline[name]["wall_s"] if baseline[name]["wall_s"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:60} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=100_000, help="Transactions in the ledger")
+    parser.add_argument("--accounts", type=int, default=3, help="Number of bank accounts")
+    parser.add_argument("--categories", type=int, default=9, help="Number of expense categories")
+    parser.add_argument("--years", type=int, default=4, help="Years of history")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per read benchmark; the fastest counts")
+    parser.add_argument("--inserts", type=int, default=200, help="Transactions added by create_transaction")
+    parser.add_argument("--db", type=Path, help="Ledger file to build or reuse between runs")
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this text")
+    parser.add_argument(
+        "--report-cache", action="store_true",
+        help="Keep the report result cache on, so repeated reads are served from it",
+    )
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before flagging")
+    args = parser.parse_args()
+    if not args.report_cache:
+        os.environ["LEDGER_CACHE"] = "off"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or Path(tmp) / "bench.db"
+        db_url = f"sqlite:///{db_path}"
+
+        if not db_path.exists():
+            engine = create_ledger_engine(db_url)
+            Base.metadata.create_all(engine)
+            started = time.perf_counter()
+            with Session(engine) as db:
+                populate(
+                    db, args.transactions, args.accounts, args.categories, args.years, args.seed,
+                    progress=lambda p: print(f"\rGenerating: {p.total_rows:,} rows", end="", flush=True),
+                )
+            engine.dispose()
+            print(f"\nGenerated {args.transactions:,} transactions in {time.perf_counter() - started:.1f}s")
+
+        benchmarks = build_benchmarks(1, category_names(args.categories)[0], args.years, args.inserts)
+        if args.only:
+            benchmarks = [b for b in benchmarks if args.only in b.name]
+
+        results = {}
+        print(f"{'benchmark':60} {'wall ms':>10} {'rows/s':>14} {'peak RSS MiB':>13}")
+        for benchmark in benchmarks:
+            metrics = measure_isolated(db_url, benchmark, args.repeat)
+            results[benchmark.name] = metrics
+            print(
+                f"{benchmark.name:60} {metrics['wall_s'] * 1000:>10.1f} "
+                f"{metrics['rows_per_s']:>14,.0f} {metrics['peak_rss_mb']:>13.1f}"
+            )
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "sqlalchemy": sqlalchemy.__version__,
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "params": {
+                    k: v for k, v in vars(args).items()
+                    if k in ("transactions", "accounts", "categories", "years", "seed", "repeat", "inserts")
+                },
+            },
+            "results": results,
+        }, indent=2))
+        print(f"\nResults written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
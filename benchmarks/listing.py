@@ -0,0 +1,78 @@
+"""
+Listing output cost: one echo per row versus batched rendering.
+
+Formats synthetic transactions as `ledger list` lines and writes them
+into a pipe drained by `cat`, once with a colored echo and flush per row
+as `ledger list` used to, and once through ledger.render, with and
+without color.
+
+Usage: python -m benchmarks.listing [--rows N]
+"""
+import argparse
+import subprocess
+import time
+from contextlib import redirect_stdout
+from typing import Callable, List
+
+import typer
+from colorama import Fore, Style
+
+from ledger.money import to_cents
+from ledger.render import batch_lines, transaction_line, write_chunks
+from ledger.storage import TransactionRecord
+
+from .synthetic import generate_transactions
+
+
+def echo_per_row(records: List[TransactionRecord]) -> None:
+    for t in records:
+        typer.echo(
+            f"{Fore.BLUE}{t.date.strftime('%Y-%m-%d')} | "
+            f"{t.description} | "
+            f"{Fore.GREEN if t.amount >= 0 else Fore.RED}"
+            f"${abs(t.amount)}{Style.RESET_ALL}"
+            f"{f' | {t.category}' if t.category else ''}",
+            color=True,
+        )
+
+
+def batched(color: bool) -> Callable[[List[TransactionRecord]], None]:
+    def render(records: List[TransactionRecord]) -> None:
+        write_chunks(batch_lines(transaction_line(t, color) for t in records), color)
+    return render
+
+
+def timed(render: Callable[[List[TransactionRecord]], None], records: List[TransactionRecord]) -> float:
+    """Seconds to render into a pipe, including draining it."""
+    sink = subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True)
+    assert sink.stdin is not None
+    started = time.perf_counter()
+    with redirect_stdout(sink.stdin):
+        render(records)
+    sink.stdin.close()
+    sink.wait()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="Transactions to list")
+    args = parser.parse_args()
+
+    records = [
+        TransactionRecord(i, row["date"], row["description"], to_cents(row["amount"]), row["category"], 1)
+        for i, row in enumerate(generate_transactions(args.rows, [1]), 1)
+    ]
+
+    print(f"{'renderer':>16} | {'seconds':>7} | {'rows/s':>10}")
+    for name, render in (
+        ("echo per row", echo_per_row),
+        ("batched color", batched(True)),
+        ("batched plain", batched(False)),
+    ):
+        elapsed = timed(render, records)
+        print(f"{name:>16} | {elapsed:>7.2f} | {len(records) / elapsed:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+ORM objects versus lightweight records on the read paths.
+
+For each read path, times the ORM API and its TransactionRecord
+counterpart, and counts the Python allocations still alive while the
+results are held.
+
+Usage: python -m benchmarks.read_model [--transactions N] [--db PATH]
+"""
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from ledger.models import Base
+from ledger.storage import (
+    create_ledger_engine, get_transaction_records, get_transactions,
+    iter_transaction_records, iter_transactions
+)
+
+from .synthetic import populate
+
+# (label, ORM read, record read); each returns the fetched items
+Comparison = Tuple[str, Callable[[Session], List[Any]], Callable[[Session], List[Any]]]
+
+COMPARISONS: List[Comparison] = [
+    (
+        "all transactions",
+        lambda db: get_transactions(db),
+        lambda db: get_transaction_records(db),
+    ),
+    (
+        "one account",
+        lambda db: get_transactions(db, account_id=1),
+        lambda db: get_transaction_records(db, account_id=1),
+    ),
+    (
+        "first list page",
+        lambda db: list(islice(iter_transactions(db), 500)),
+        lambda db: list(islice(iter_transaction_records(db), 500)),
+    ),
+]
+
+
+def measure(engine: Engine, read: Callable[[Session], List[Any]], repeat: int) -> Dict[str, float]:
+    """Best wall time over repeat fresh sessions, then retained allocations."""
+    timings = []
+    for _ in range(repeat):
+        with Session(engine) as db:
+            started = time.perf_counter()
+            rows = len(read(db))
+            timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    with Session(engine) as db:
+        result = read(db)
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        del result
+    tracemalloc.stop()
+
+    return {"rows": rows, "wall_s": min(timings), "objects": blocks, "retained_mb": current / 2**20}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=1_000_000, help="Transactions in the ledger")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per read; the fastest counts")
+    parser.add_argument("--db", type=Path, help="Ledger file to build or reuse between runs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or Path(tmp) / "bench.db"
+        engine = create_ledger_engine(f"sqlite:///{db_path}")
+        if not db_path.exists():
+            Base.metadata.create_all(engine)
+            with Session(engine) as db:
+                populate(db, args.transactions)
+
+        print(f"{'read':18} {'api':8} {'rows':>10} {'wall ms':>10} {'objects':>12} {'retained MiB':>13}")
+        for label, orm_read, record_read in COMPARISONS:
+            results = {}
+            for api, read in (("orm", orm_read), ("records", record_read)):
+                results[api] = metrics = measure(engine, read, args.repeat)
+                print(
+                    f"{label:18} {api:8} {metrics['rows']:>10,} {metrics['wall_s'] * 1000:>10.1f} "
+                    f"{metrics['objects']:>12,} {metrics['retained_mb']:>13.1f}"
+                )
+            orm, records = results["orm"], results["records"]
+            print(
+                f"{'':18} {'ratio':8} {'':>10} {orm['wall_s'] / records['wall_s']:>9.1f}x "
+                f"{orm['objects'] / max(records['objects'], 1):>11.1f}x "
+                f"{orm['retained_mb'] / max(records['retained_mb'], 1e-9):>12.1f}x"
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Deterministic synthetic ledgers for benchmarks.
+"""
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ledger.storage import (
+    DEFAULT_CATEGORIES, BatchProgress, bulk_insert_transactions, create_bank_account
+)
+
+MERCHANTS = [
+    "Grocery Mart", "Corner Cafe", "City Transit", "Power & Light", "Rent",
+    "Pharmacy", "Cinema", "Online Store", "Bookshop", "Payroll",
+]
+
+START_DATE = datetime(2020, 1, 1)
+
+
+def category_names(count: int) -> List[str]:
+    """The default categories, extended with numbered ones up to ``count``."""
+    names = [c for c in DEFAULT_CATEGORIES if c != "Income"]
+    names += [f"Category {i}" for i in range(len(names), count)]
+    return names[:count]
+
+
+def generate_transactions(
+    count: int,
+    account_ids: List[int],
+    categories: Optional[List[str]] = None,
+    start: datetime = START_DATE,
+    years: int = 4,
+    seed: int = 42,
+) -> Iterator[Dict[str, Any]]:
+    """Yield ``count`` reproducible transactions spread over ``years`` years.
+
+    Roughly one in ten transactions is income; the rest are expenses spread
+    across ``categories``.
+    """
+    rng = random.Random(seed)
+    categories = categories or category_names(len(DEFAULT_CATEGORIES) - 1)
+    days = years * 365
+    for _ in range(count):
+        merchant = rng.randrange(len(MERCHANTS))
+        income = MERCHANTS[merchant] == "Payroll"
+        cents = rng.randint(50_000, 500_000) if income else -rng.randint(100, 20_000)
+        yield {
+            "date": start + timedelta(days=rng.randrange(days)),
+            "description": f"{MERCHANTS[merchant]} #{rng.randrange(1000)}",
+            "amount": Decimal(cents) / 100,
+            "category": "Income" if income else rng.choice(categories),
+            "account_id": rng.choice(account_ids),
+        }
+
+
+def populate(
+    db: Session,
+    count: int,
+    accounts: int = 3,
+    categories: int = 9,
+    years: int = 4,
+    seed: int = 42,
+    progress: Optional[Callable[[BatchProgress], None]] = None,
+) -> List[int]:
+    """Create bank accounts and bulk insert a synthetic ledger.
+
+    Returns:
+        List[int]: IDs of the created bank accounts
+    """
+    account_ids = [
+        create_bank_account(db, f"Account {i}", "Checking").id
+        for i in range(accounts)
+    ]
+    rows = generate_transactions(
+        count, account_ids, category_names(categories), years=years, seed=seed
+    )
+    bulk_insert_transactions(db, rows, batch_size=50_000, progress=progress)
+    return account_ids
@@ -0,0 +1,106 @@
+"""
+Sustained insert rate and write latency with concurrent writer processes.
+
+Each writer process adds transactions from several threads at once,
+either through the group-committing write queue or with a session and
+commit per transaction, against the same ledger file.
+
+Usage: python -m benchmarks.write_contention [--writers N] [--threads N] [--writes N]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import List, Tuple
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from ledger.models import Base
+from ledger.storage import create_bank_account, create_ledger_engine
+
+MODES = ("queue", "direct")
+
+# start, end, per-write latencies in ms, failed writes
+WriterResult = Tuple[float, float, List[float], int]
+
+
+def run_writer(mode: str, threads: int, writes: int) -> WriterResult:
+    """Add ``writes`` transactions from each of ``threads`` threads."""
+    from ledger.storage import add_transaction, create_transaction, get_db
+
+    latencies: List[float] = []
+    failures = [0]
+
+    def add(n: int) -> None:
+        started = time.perf_counter()
+        try:
+            if mode == "queue":
+                add_transaction(datetime.now(), f"writer {os.getpid()} #{n}", Decimal("-1.25"), 1, "Food")
+            else:
+                with get_db() as db:
+                    create_transaction(db, datetime.now(), f"writer {os.getpid()} #{n}", Decimal("-1.25"), 1, "Food")
+        except OperationalError:
+            failures[0] += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    def run(count: int) -> None:
+        for n in range(count):
+            add(n)
+
+    workers = [threading.Thread(target=run, args=(writes,)) for _ in range(threads)]
+    started = time.time()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return started, time.time(), latencies, failures[0]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writer processes")
+    parser.add_argument("--threads", type=int, default=4, help="Writing threads per process")
+    parser.add_argument("--writes", type=int, default=250, help="Transactions per thread")
+    parser.add_argument("--mode", choices=MODES, action="append", help="Write path; both by default")
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} | {'inserts/s':>9} | {'p50 ms':>7} | {'p99 ms':>7} | failed")
+    for mode in args.mode or MODES:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "ledger.db"
+            engine = create_ledger_engine(f"sqlite:///{db_path}")
+            Base.metadata.create_all(engine)
+            with Session(engine) as db:
+                create_bank_account(db, "Checking", "checking")
+            engine.dispose()
+
+            # Spawned writers import the ledger with this database
+            os.environ["LEDGER_DB"] = str(db_path)
+            context = multiprocessing.get_context("spawn")
+            with context.Pool(args.writers) as pool:
+                results: List[WriterResult] = pool.starmap(
+                    run_writer, [(mode, args.threads, args.writes)] * args.writers
+                )
+
+        latencies = [ms for _, _, writer_latencies, _ in results for ms in writer_latencies]
+        elapsed = max(end for _, end, _, _ in results) - min(start for start, _, _, _ in results)
+        failed = sum(failures for _, _, _, failures in results)
+        print(
+            f"{mode:>6} | {(len(latencies) - failed) / elapsed:>9,.0f} | "
+            f"{percentile(latencies, 0.5):>7.2f} | {percentile(latencies, 0.99):>7.2f} | {failed}"
+        )
+
+
+if __name__ == "__main__":
+    main()
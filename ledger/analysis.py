@@ -3,37 +3,110 @@ Analysis module for generating financial reports and visualizations.
 """
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, select
 from rich.console import Console
 from rich.table import Table
 from rich.text import Text
 from rich.progress import track
 
-from .models import Transaction, BankAccount
-from .storage import get_transactions
+from .archive import archive_scope
+from .cache import cached_report
+from .models import Transaction, BankAccount, MonthlyRollup
+from .money import from_cents
+from .rollups import checkpoint_balance, month_key
+from .storage import category_cache, filter_transactions
 
 console = Console()
 
+# Label used for transactions without a category
+UNCATEGORIZED = "Uncategorized"
+
+# Summary periods supported by get_period_summary
+PERIODS = ("monthly", "yearly")
+
+# Engines for print_financial_report: SQL aggregates, or the columnar
+# pandas engine in analytics
+BACKENDS = ("sql", "pandas")
+
+class PeriodSummary(NamedTuple):
+    """Totals for one summary period."""
+    period: str
+    income: Decimal
+    expenses: Decimal
+    total: Decimal
+    transactions: int
+
+@cached_report
 def get_account_balance(
     db: Session,
     account_id: Optional[int] = None,
     end_date: Optional[datetime] = None
 ) -> Decimal:
-    """Calculate account balance up to given date."""
-    query = db.query(func.sum(Transaction.amount))
+    """Calculate account balance up to given date.
     
-    if account_id is not None:
-        query = query.filter(Transaction.account_id == account_id)
-    if end_date is not None:
-        query = query.filter(Transaction.date <= end_date)
-        
-    result = query.scalar()
-    return Decimal('0') if result is None else result
+    Uses the nearest month-end balance checkpoint plus the transactions
+    since the start of end_date's month, instead of summing all history.
+    """
+    if end_date is None:
+        return from_cents(checkpoint_balance(db, account_id=account_id))
+    
+    month_start = datetime(end_date.year, end_date.month, 1)
+    with archive_scope(db, month_start, end_date):
+        tail = db.scalar(filter_transactions(
+            select(func.sum(Transaction.amount_cents)),
+            start_date=month_start, end_date=end_date, account_id=account_id,
+        ))
+    opening = checkpoint_balance(db, month_key(end_date), account_id)
+    return from_cents(opening + (tail or 0))
 
+def get_balance_series(
+    db: Session,
+    account_id: Optional[int],
+    dates: List[datetime]
+) -> List[Decimal]:
+    """Calculate balances at many dates in one ordered pass.
+    
+    Starts from the checkpoint before the earliest date and streams the
+    transactions up to the latest date once, in date order.
+    
+    Returns:
+        List[Decimal]: Balance at each date, in the same order as dates
+    """
+    if not dates:
+        return []
+    
+    ordered = sorted(range(len(dates)), key=lambda i: dates[i])
+    first = dates[ordered[0]]
+    month_start = datetime(first.year, first.month, 1)
+    
+    balance = checkpoint_balance(db, month_key(first), account_id)
+    query = filter_transactions(
+        select(Transaction.date, Transaction.amount_cents),
+        start_date=month_start, end_date=dates[ordered[-1]], account_id=account_id,
+    ).order_by(Transaction.date)
+    
+    balances: List[int] = [0] * len(dates)
+    with archive_scope(db, month_start, dates[ordered[-1]]):
+        rows = db.execute(query.execution_options(yield_per=1000))
+        pending = None
+        for i in ordered:
+            if pending is not None and pending[0] <= dates[i]:
+                balance += pending[1]
+                pending = None
+            if pending is None:
+                for date, amount in rows:
+                    if date > dates[i]:
+                        pending = (date, amount)
+                        break
+                    balance += amount
+            balances[i] = balance
+    
+    return [from_cents(balance) for balance in balances]
+
+@cached_report
 def get_category_summary(
     db: Session,
     start_date: Optional[datetime] = None,
@@ -41,14 +114,43 @@ def get_category_summary(
     account_id: Optional[int] = None
 ) -> Dict[str, Decimal]:
     """Get spending summary by category."""
-    transactions = get_transactions(db, start_date, end_date, account_id=account_id)
+    query = filter_transactions(
+        select(Transaction.category_id, func.sum(Transaction.amount_cents))
+        .group_by(Transaction.category_id),
+        start_date, end_date, account_id=account_id,
+    )
+    with archive_scope(db, start_date, end_date):
+        rows = db.execute(query).all()
+    names = category_cache.get_names(db, {category_id for category_id, _ in rows if category_id})
+    return {names.get(category_id, UNCATEGORIZED): from_cents(total) for category_id, total in rows}
+
+@cached_report
+def get_income_expense_summary(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    account_id: Optional[int] = None
+) -> Dict[str, Tuple[Decimal, Decimal]]:
+    """Get income and expense totals per category.
     
-    summary = defaultdict(Decimal)
-    for t in transactions:
-        category = t.category or "Uncategorized"
-        summary[category] += t.amount
-        
-    return dict(summary)
+    Returns:
+        Dict[str, Tuple[Decimal, Decimal]]: Category name mapped to
+        (income, expenses), where expenses are negative
+    """
+    amount = Transaction.amount_cents
+    income = func.sum(case((amount > 0, amount), else_=0))
+    expenses = func.sum(case((amount < 0, amount), else_=0))
+    query = filter_transactions(
+        select(Transaction.category_id, income, expenses).group_by(Transaction.category_id),
+        start_date, end_date, account_id=account_id,
+    )
+    with archive_scope(db, start_date, end_date):
+        rows = db.execute(query).all()
+    names = category_cache.get_names(db, {category_id for category_id, _, _ in rows if category_id})
+    return {
+        names.get(category_id, UNCATEGORIZED): (from_cents(income), from_cents(expenses))
+        for category_id, income, expenses in rows
+    }
 
 def generate_ascii_bar_chart(
     data: Dict[str, Decimal],
@@ -85,9 +187,17 @@ def print_financial_report(
     db: Session,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    account_id: Optional[int] = None
-):
-    """Print comprehensive financial report."""
+    account_id: Optional[int] = None,
+    backend: str = "sql"
+) -> None:
+    """Print comprehensive financial report.
+    
+    Raises:
+        ValueError: If backend is not one of BACKENDS
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of: {', '.join(BACKENDS)}")
+    
     # Get account info if specified
     account_name = "All Accounts"
     if account_id is not None:
@@ -97,7 +207,15 @@ def print_financial_report(
     
     # Calculate balances and summaries
     balance = get_account_balance(db, account_id, end_date)
-    category_summary = get_category_summary(db, start_date, end_date, account_id)
+    if backend == "pandas":
+        from .analytics import income_expense_summary, load_transactions
+        totals = income_expense_summary(
+            load_transactions(db, start_date, end_date, account_id=account_id)
+        )
+    else:
+        totals = get_income_expense_summary(db, start_date, end_date, account_id)
+    income_summary = {name: income for name, (income, _) in totals.items() if income}
+    expense_summary = {name: expenses for name, (_, expenses) in totals.items() if expenses}
     
     # Print report header
     console.print(f"\n[bold blue]Financial Report - {account_name}[/bold blue]")
@@ -110,10 +228,93 @@ def print_financial_report(
     
     # Print income summary
     console.print("\n[bold green]Income Summary:[/bold green]")
-    income_chart = generate_ascii_bar_chart(category_summary, show_positive=True)
+    income_chart = generate_ascii_bar_chart(income_summary, show_positive=True)
     console.print(income_chart)
     
     # Print expense summary
     console.print("\n[bold red]Expense Summary:[/bold red]")
-    expense_chart = generate_ascii_bar_chart(category_summary, show_positive=False)
+    expense_chart = generate_ascii_bar_chart(expense_summary, show_positive=False)
     console.print(expense_chart)
+
+@cached_report
+def get_period_summary(
+    db: Session,
+    period: str = "monthly",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    account_id: Optional[int] = None,
+    category: Optional[str] = None
+) -> List[PeriodSummary]:
+    """Get income, expense and net totals per month or year.
+    
+    Reads the monthly rollups, so the cost is proportional to the number of
+    months rather than the number of transactions. Date filters are applied
+    at month granularity.
+    
+    Raises:
+        ValueError: If period is not one of PERIODS
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period '{period}', expected one of: {', '.join(PERIODS)}")
+    
+    key = func.substr(MonthlyRollup.period, 1, 4) if period == "yearly" else MonthlyRollup.period
+    
+    query = select(
+        key,
+        func.sum(MonthlyRollup.income_cents),
+        func.sum(MonthlyRollup.expenses_cents),
+        func.sum(MonthlyRollup.total_cents),
+        func.sum(MonthlyRollup.count),
+    ).group_by(key).order_by(key)
+    
+    if start_date:
+        query = query.where(MonthlyRollup.period >= month_key(start_date))
+    if end_date:
+        query = query.where(MonthlyRollup.period <= month_key(end_date))
+    if account_id:
+        query = query.where(MonthlyRollup.account_id == account_id)
+    if category:
+        category_id = category_cache.get_id(db, category)
+        if category_id is None:
+            return []
+        query = query.where(MonthlyRollup.category_id == category_id)
+    
+    return [
+        PeriodSummary(name, from_cents(income), from_cents(expenses), from_cents(total), count)
+        for name, income, expenses, total, count in db.execute(query)
+        if count
+    ]
+
+def print_period_summary(
+    db: Session,
+    period: str = "monthly",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    account_id: Optional[int] = None,
+    category: Optional[str] = None
+) -> None:
+    """Print a table of income, expenses and net totals per period."""
+    rows = get_period_summary(db, period, start_date, end_date, account_id, category)
+    if not rows:
+        console.print("[yellow]No transactions found.[/yellow]")
+        return
+    
+    table = Table(title=f"{period.capitalize()} Summary")
+    table.add_column("Period")
+    table.add_column("Income", justify="right", style="green")
+    table.add_column("Expenses", justify="right", style="red")
+    table.add_column("Net", justify="right")
+    table.add_column("Transactions", justify="right")
+    
+    for row in rows:
+        sign = "" if row.total >= 0 else "-"
+        net = Text(f"{sign}${abs(row.total):,.2f}", style="green" if row.total >= 0 else "red")
+        table.add_row(
+            row.period,
+            f"${row.income:,.2f}",
+            f"${abs(row.expenses):,.2f}",
+            net,
+            f"{row.transactions:,}",
+        )
+    
+    console.print(table)
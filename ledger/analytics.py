@@ -0,0 +1,217 @@
+"""
+Vectorized analytics over columnar transaction data.
+
+The filtered transaction set is loaded once into NumPy arrays (dates as
+datetime64 seconds, amounts as int64 cents, categories as integer codes) and
+every report is computed with pandas group-bys instead of per-row Python.
+Amounts stay in integer cents until they are presented.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from rich.table import Table
+from sqlalchemy import String, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from .analysis import UNCATEGORIZED, console
+from .archive import archive_scope
+from .models import Transaction
+from .money import from_cents
+from .rollups import UNCATEGORIZED_ID
+from .storage import category_cache, filter_transactions
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Trailing store numbers and reference codes, e.g. "Grocery Mart #123"
+MERCHANT_SUFFIX = r"[\s#*]*\d[\d\s#*/-]*$"
+
+
+def load_transactions(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    account_id: Optional[int] = None,
+    descriptions: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> pd.DataFrame:
+    """Load the filtered transactions as a columnar frame.
+
+    Rows are fetched in chunks with a Core query on the session's
+    connection and copied straight into NumPy arrays, so no ORM objects or
+    Python datetimes are built; NumPy parses the stored date text itself.
+
+    Args:
+        descriptions: Also load the description column, which is needed for
+            merchant reports but costs a Python string per row
+
+    Returns:
+        pd.DataFrame: Columns ``date`` (datetime64[s]), ``amount_cents``
+        (int64), ``category`` (categorical), ``account_id`` (int64) and
+        optionally ``description``
+    """
+    columns = [
+        type_coerce(Transaction.date, String),
+        Transaction.amount_cents,
+        func.coalesce(Transaction.category_id, UNCATEGORIZED_ID),
+        Transaction.account_id,
+    ]
+    dtypes: List[Any] = ["datetime64[s]", np.int64, np.int64, np.int64]
+    if descriptions:
+        columns.append(Transaction.description)
+        dtypes.append(object)
+    query = filter_transactions(select(*columns), start_date, end_date, category, account_id)
+
+    chunks: List[List[np.ndarray]] = [[] for _ in columns]
+    with archive_scope(db, start_date, end_date):
+        result = db.connection().execute(query.execution_options(yield_per=chunk_size))
+        for partition in result.partitions():
+            for arrays, dtype, values in zip(chunks, dtypes, zip(*partition)):
+                arrays.append(np.array(values, dtype=dtype))
+    dates, amounts, category_ids, account_ids, *rest = (
+        np.concatenate(arrays) if arrays else np.array([], dtype=dtype)
+        for arrays, dtype in zip(chunks, dtypes)
+    )
+
+    names = {
+        UNCATEGORIZED_ID: UNCATEGORIZED,
+        **category_cache.get_names(db, set(np.unique(category_ids).tolist()) - {UNCATEGORIZED_ID}),
+    }
+    ids = np.array(sorted(names), dtype=np.int64)
+    # Ids of categories deleted since their transactions were archived
+    category_ids = np.where(np.isin(category_ids, ids), category_ids, UNCATEGORIZED_ID)
+    codes = np.searchsorted(ids, category_ids)
+
+    frame = pd.DataFrame({
+        "date": dates,
+        "amount_cents": amounts,
+        "category": pd.Categorical.from_codes(codes, [names[i] for i in ids]),
+        "account_id": account_ids,
+    })
+    if descriptions:
+        frame["description"] = rest[0]
+    return frame
+
+
+def _split_amounts(frame: pd.DataFrame) -> pd.DataFrame:
+    """Amounts split into income and expense columns, in cents."""
+    amount = frame["amount_cents"]
+    return pd.DataFrame({
+        "income_cents": amount.clip(lower=0),
+        "expenses_cents": amount.clip(upper=0),
+        "total_cents": amount,
+    })
+
+
+def category_summary(frame: pd.DataFrame) -> pd.DataFrame:
+    """Income, expenses, net total and count per category, in cents."""
+    grouped = _split_amounts(frame).groupby(frame["category"], observed=True)
+    summary = grouped.sum()
+    summary["count"] = grouped.size()
+    return summary
+
+
+def income_expense_summary(frame: pd.DataFrame) -> Dict[str, Tuple[Decimal, Decimal]]:
+    """Per-category (income, expenses), matching analysis.get_income_expense_summary."""
+    summary = category_summary(frame)
+    return {
+        str(name): (from_cents(int(income)), from_cents(int(expenses)))
+        for name, income, expenses in zip(
+            summary.index, summary["income_cents"], summary["expenses_cents"]
+        )
+    }
+
+
+def monthly_trend(frame: pd.DataFrame) -> pd.DataFrame:
+    """Income, expenses, net total and count per month, in cents.
+
+    Months without transactions are included with zero totals so that
+    rolling windows span calendar months.
+    """
+    months = frame["date"].to_numpy().astype("datetime64[M]")
+    grouped = _split_amounts(frame).groupby(months)
+    trend = grouped.sum()
+    trend["count"] = grouped.size()
+    if not trend.empty:
+        span = np.arange(months.min(), months.max() + 1)
+        trend = trend.reindex(span, fill_value=0)
+    trend.index = pd.Index(np.datetime_as_string(trend.index.to_numpy(), unit="M"), name="period")
+    return trend
+
+
+def rolling_average(trend: pd.DataFrame, window: int = 3, column: str = "total_cents") -> pd.Series:
+    """Rolling mean of a monthly trend column, in cents.
+
+    The first months average over as many months as are available.
+    """
+    return trend[column].rolling(window, min_periods=1).mean()
+
+
+def top_merchants(frame: pd.DataFrame, n: int = 10) -> pd.DataFrame:
+    """The n merchants with the highest spending.
+
+    Merchants are descriptions with trailing store numbers and reference
+    codes removed, so "Corner Cafe #12" and "Corner Cafe #407" group
+    together. Requires a frame loaded with descriptions.
+
+    Returns:
+        pd.DataFrame: ``spent_cents`` (positive) and ``count``, indexed by
+        merchant, largest spending first
+    """
+    expenses = frame[frame["amount_cents"] < 0]
+    merchants = (
+        expenses["description"].str.replace(MERCHANT_SUFFIX, "", regex=True).str.strip()
+    )
+    grouped = (-expenses["amount_cents"]).groupby(merchants.to_numpy())
+    spending = pd.DataFrame({"spent_cents": grouped.sum(), "count": grouped.size()})
+    spending.index.name = "merchant"
+    return spending.nlargest(n, "spent_cents")
+
+
+def _money(cents: float) -> str:
+    amount = from_cents(int(round(cents)))
+    sign = "" if amount >= 0 else "-"
+    return f"{sign}${abs(amount):,.2f}"
+
+
+def print_trends(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    account_id: Optional[int] = None,
+    category: Optional[str] = None,
+    window: int = 3,
+    top: int = 10,
+) -> None:
+    """Print monthly trends with a rolling average and the top merchants."""
+    frame = load_transactions(db, start_date, end_date, category, account_id, descriptions=True)
+    if frame.empty:
+        console.print("[yellow]No transactions found.[/yellow]")
+        return
+
+    trend = monthly_trend(frame)
+    average = rolling_average(trend, window)
+    table = Table(title="Monthly Trend")
+    table.add_column("Period")
+    table.add_column("Income", justify="right", style="green")
+    table.add_column("Expenses", justify="right", style="red")
+    table.add_column("Net", justify="right")
+    table.add_column(f"{window}-month avg", justify="right")
+    for period, income, expenses, total, avg in zip(
+        trend.index, trend["income_cents"], trend["expenses_cents"],
+        trend["total_cents"], average,
+    ):
+        table.add_row(period, _money(income), _money(-expenses), _money(total), _money(avg))
+    console.print(table)
+
+    merchants = top_merchants(frame, top)
+    table = Table(title=f"Top {top} Merchants")
+    table.add_column("Merchant")
+    table.add_column("Spent", justify="right", style="red")
+    table.add_column("Transactions", justify="right")
+    for merchant, spent, count in zip(merchants.index, merchants["spent_cents"], merchants["count"]):
+        table.add_row(merchant or "(blank)", _money(spent), f"{count:,}")
+    console.print(table)
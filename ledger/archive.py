@@ -0,0 +1,414 @@
+"""
+Per-year archive databases for old transactions.
+
+`ledger archive --before YEAR` moves older transactions into one SQLite
+file per year under ``archive/``, keeping the hot database and its
+indexes small. Read paths wrap their queries in archive_scope, which
+attaches only the partitions overlapping the requested dates and shadows
+``transactions`` with a temporary view over the hot table and those
+partitions. SQLite resolves unqualified names in ``temp`` first, so the
+existing queries, ORM ones included, read across partitions unchanged,
+and each date filter is pushed down into every partition's own index.
+
+Monthly rollups and balance checkpoints stay in the hot database and keep
+covering archived years, so balances carry forward from them. So does the
+search index, whose entries for archived transactions resolve through the
+view like any other read.
+
+Once there are more archive files than SQLite can attach at once, the
+oldest are merged into one, so a scope over every year still fits.
+
+SQLite commits a transaction spanning several WAL databases atomically in
+each file but not across them, so a move never writes both files in one
+transaction. The rows are copied into the archive first, and recorded in
+its ``archive_moves`` table with the move's run time. The hot database
+then deletes them and stamps the year's partition with that run time in
+one transaction of its own. The view skips recorded rows whose run the
+hot database has not stamped, so an interrupted move shows every
+transaction once, and the next archive run finishes or discards it.
+"""
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Generator, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column, Connection, DateTime, Engine, Index, Integer, MetaData, Table, create_engine,
+    delete, event, func, literal, select, update,
+)
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import ConnectionPoolEntry, NullPool
+
+from .config import DB_PATH
+from .models import ArchivePartition, Transaction, driver_connection, search_triggers_suspended
+
+# SQLite's default SQLITE_MAX_ATTACHED
+DEFAULT_ATTACH_LIMIT = 10
+
+SCOPE_KEY = "archive_scope"
+
+
+def archive_dir(db_path: str = DB_PATH) -> Path:
+    return Path(db_path).parent / "archive"
+
+
+def schema_name(path: str) -> str:
+    """Name an archive file is attached under, e.g. archive_2021 for
+    ledger_2021.db and archive_2010_2015 for ledger_2010-2015.db."""
+    years = Path(path).stem.rsplit("_", 1)[-1]
+    return "archive_" + years.replace("-", "_")
+
+
+def partition_table(schema: Optional[str] = None) -> Table:
+    """A transactions table shaped like the hot one, with its indexes, as
+    in an archive file."""
+    table = Table(
+        "transactions",
+        MetaData(),
+        *(
+            Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+            for column in Transaction.__table__.columns
+        ),
+        schema=schema,
+    )
+    for index in Transaction.__table__.indexes:
+        Index(index.name, *(table.c[column.name] for column in index.columns))
+    return table
+
+
+def moves_table(schema: Optional[str] = None) -> Table:
+    """Rows of an archive file whose move out of the hot table may not have
+    committed, with the run that copied them."""
+    return Table(
+        "archive_moves",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("year", Integer, nullable=False),
+        Column("run", DateTime, nullable=False),
+        schema=schema,
+    )
+
+
+def _year_range(year: int) -> Tuple[datetime, datetime]:
+    return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+
+def overlapping_partitions(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> List[ArchivePartition]:
+    """Archive partitions holding transactions between the dates, oldest first."""
+    query = select(ArchivePartition).order_by(ArchivePartition.year)
+    if start_date:
+        query = query.where(ArchivePartition.year >= start_date.year)
+    if end_date:
+        query = query.where(ArchivePartition.year <= end_date.year)
+    try:
+        return list(db.scalars(query))
+    except OperationalError:
+        # Ledger created before archiving existed
+        return []
+
+
+def _attach_limit(conn: Connection) -> int:
+    # Connection.getlimit() is new in Python 3.11
+    getlimit = getattr(driver_connection(conn), "getlimit", None)
+    if getlimit is None:
+        return DEFAULT_ATTACH_LIMIT
+    return int(getlimit(getattr(sqlite3, "SQLITE_LIMIT_ATTACHED")))
+
+
+def _attach(conn: Connection, partitions: Dict[str, str]) -> None:
+    """Attach the given partitions, detaching any others where possible.
+
+    SQLite cannot detach a database read in the open transaction, so
+    inside one the others stay attached unless they would exceed the
+    limit; the scope's view only lists the partitions it needs anyway.
+    """
+    attached = {
+        name for _, name, _ in conn.exec_driver_sql("PRAGMA database_list")
+        if name.startswith("archive_")
+    }
+    stale = attached - partitions.keys()
+    if (
+        not driver_connection(conn).in_transaction
+        or len(attached | partitions.keys()) > _attach_limit(conn)
+    ):
+        for name in stale:
+            conn.exec_driver_sql(f"DETACH DATABASE {name}")
+        attached -= stale
+    if len(partitions) > _attach_limit(conn):
+        raise ValueError(
+            f"This query spans {len(partitions)} archived years, more than SQLite can "
+            f"attach at once ({_attach_limit(conn)}); narrow the date range"
+        )
+    for name, path in partitions.items():
+        if name not in attached:
+            conn.exec_driver_sql(f"ATTACH DATABASE ? AS {name}", (path,))
+
+
+# Filters recorded rows whose move the hot database has not stamped, so
+# they are read from the hot table only
+UNSTAMPED_MOVES = """
+    WHERE id NOT IN (
+        SELECT m.id FROM {schema}.archive_moves AS m
+        WHERE m.run IS NOT (
+            SELECT p.archived_at FROM main.archive_partitions AS p WHERE p.year = m.year
+        )
+    )
+"""
+
+
+def _create_view(conn: Connection, schemas: List[str]) -> None:
+    columns = ", ".join(column.name for column in Transaction.__table__.columns)
+    conn.exec_driver_sql("DROP VIEW IF EXISTS temp.transactions")
+    if not schemas:
+        return
+    selects = [f"SELECT {columns} FROM main.transactions"]
+    for name in sorted(schemas):
+        records_moves = conn.exec_driver_sql(
+            f"SELECT 1 FROM {name}.sqlite_master WHERE name = 'archive_moves'"
+        ).first()
+        selects.append(
+            f"SELECT {columns} FROM {name}.transactions"
+            + (UNSTAMPED_MOVES.format(schema=name) if records_moves else "")
+        )
+    conn.exec_driver_sql("CREATE TEMP VIEW transactions AS " + " UNION ALL ".join(selects))
+
+
+@contextmanager
+def archive_scope(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Generator[None, None, None]:
+    """Make reads of ``transactions`` include the archived years between
+    the dates.
+
+    Only for reads: the view cannot be written through. Scopes can nest;
+    an inner scope widens the view and restores it on exit.
+
+    Raises:
+        ValueError: If more partitions overlap than SQLite can attach
+    """
+    partitions = overlapping_partitions(db, start_date, end_date)
+    conn = db.connection()
+    outer: Dict[str, str] = conn.info.get(SCOPE_KEY, {})
+    needed = {**outer, **{schema_name(p.path): p.path for p in partitions}}
+    if needed.keys() == outer.keys():
+        yield
+        return
+
+    _attach(conn, needed)
+    _create_view(conn, list(needed))
+    conn.info[SCOPE_KEY] = needed
+    try:
+        yield
+    finally:
+        # A generator closed after its session is cleaned up on checkin
+        if conn.closed:
+            return
+        _create_view(conn, list(outer))
+        if outer:
+            conn.info[SCOPE_KEY] = outer
+        else:
+            conn.info.pop(SCOPE_KEY, None)
+
+
+def reset_archive_scope(
+    dbapi_connection: Optional[sqlite3.Connection], connection_record: ConnectionPoolEntry
+) -> None:
+    """Pool checkin hook that drops a scope left open on a connection."""
+    if connection_record.info.pop(SCOPE_KEY, None) and dbapi_connection is not None:
+        dbapi_connection.execute("DROP VIEW IF EXISTS temp.transactions")
+
+
+def _now() -> datetime:
+    # Naive UTC, like the ledger's other timestamps
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _partition_engine(path: str, db_path: str) -> Engine:
+    """Engine on an archive file, with the hot database attached as ``ledger``."""
+    engine = create_engine(f"sqlite:///{path}", poolclass=NullPool)
+
+    @event.listens_for(engine, "connect")
+    def attach_ledger(dbapi_connection: sqlite3.Connection, connection_record: object) -> None:
+        dbapi_connection.execute("ATTACH DATABASE ? AS ledger", (db_path,))
+
+    return engine
+
+
+def _prepare_partition(engine: Engine) -> None:
+    """Create the tables of an archive file, and settle earlier moves into it.
+
+    Moves the hot database stamped are complete, so only their records
+    go. The other recorded rows are copies of transactions the hot
+    database still holds, or has deleted since, and go with their records.
+    """
+    partition, moves = partition_table(), moves_table()
+    stamps = ArchivePartition.__table__.to_metadata(MetaData(), schema="ledger")
+    stamp = select(stamps.c.archived_at).where(stamps.c.year == moves.c.year).scalar_subquery()
+    with engine.begin() as conn:
+        partition.create(conn, checkfirst=True)
+        moves.create(conn, checkfirst=True)
+        unstamped = select(moves.c.id).where(moves.c.run.is_distinct_from(stamp))
+        conn.execute(delete(partition).where(partition.c.id.in_(unstamped)))
+        conn.execute(delete(moves))
+
+
+def _consolidate(db: Session, db_path: str) -> None:
+    """Merge the oldest archive files into one while there are more than
+    SQLite can attach at once, so a scope over every year still fits."""
+    from .storage import begin_immediate
+
+    partitions = overlapping_partitions(db)
+    paths = list(dict.fromkeys(p.path for p in partitions))
+    excess = len(paths) - _attach_limit(db.connection())
+    if excess <= 0:
+        return
+    merged = paths[:excess + 1]
+    years = [p.year for p in partitions if p.path in merged]
+    target = str(archive_dir(db_path) / f"{Path(db_path).stem}_{years[0]}-{years[-1]}.db")
+
+    columns = ", ".join(column.name for column in Transaction.__table__.columns)
+    for path in merged:
+        _prepare_partition(_partition_engine(path, db_path))
+    engine = _partition_engine(target, db_path)
+    _prepare_partition(engine)
+    with engine.connect() as conn:
+        for path in merged:
+            conn.exec_driver_sql("ATTACH DATABASE ? AS merged", (path,))
+            conn.exec_driver_sql(
+                f"INSERT OR REPLACE INTO transactions ({columns}) "
+                f"SELECT {columns} FROM merged.transactions"
+            )
+            conn.commit()
+            conn.exec_driver_sql("DETACH DATABASE merged")
+
+    # Readers switch files when this commits; until then the old ones serve
+    begin_immediate(db)
+    db.execute(
+        update(ArchivePartition).where(ArchivePartition.path.in_(merged)).values(path=target)
+    )
+    db.commit()
+    for path in merged:
+        Path(path).unlink(missing_ok=True)
+
+
+def archive_transactions(db: Session, before: int, db_path: str = DB_PATH) -> Dict[int, int]:
+    """Move transactions dated before January 1st of a year into per-year
+    archive files.
+
+    Rollups, checkpoints and search entries are left as they are, since
+    they still describe the same transactions. The transaction with the highest id
+    always stays, so new transactions never reuse an archived id.
+
+    Each year holds the ledger's write lock while its rows are copied and
+    deleted, so no other write can change them in between. An interrupted
+    run leaves every transaction readable once, and can simply be repeated.
+
+    Returns:
+        Dict[int, int]: Rows moved per year
+
+    Raises:
+        RuntimeError: If the hot table lost rows the archive did not get
+    """
+    from .storage import begin_immediate
+
+    cutoff = datetime(before, 1, 1)
+    # BEGIN IMMEDIATE locks every attached database too, which would keep
+    # the archive files' own transactions below waiting
+    _attach(db.connection(), {})
+    begin_immediate(db)
+    year_of = func.strftime("%Y", Transaction.date)
+    years = [
+        int(y) for y in db.scalars(
+            select(year_of).where(Transaction.date < cutoff).distinct().order_by(year_of)
+        )
+    ]
+    if not years:
+        db.rollback()
+        return {}
+    newest_id = db.scalar(select(func.max(Transaction.id)))
+    paths = {p.year: p.path for p in overlapping_partitions(db)}
+
+    directory = archive_dir(db_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = Path(db_path).stem
+    partition, moves = partition_table(), moves_table()
+    hot = partition_table("ledger")
+    columns = [column.name for column in Transaction.__table__.columns]
+    moved: Dict[int, int] = {}
+    for year in years:
+        begin_immediate(db)
+        path = paths.get(year, str(directory / f"{stem}_{year}.db"))
+        engine = _partition_engine(path, db_path)
+        _prepare_partition(engine)
+
+        # The archive's own transaction, which commits before the hot
+        # database changes at all
+        start, end = _year_range(year)
+        run = _now()
+        in_year = (hot.c.date >= start) & (hot.c.date < end) & (hot.c.id != newest_id)
+        with engine.begin() as conn:
+            conn.execute(
+                insert(partition)
+                .from_select(columns, select(*hot.c).where(in_year))
+                .prefix_with("OR REPLACE")
+            )
+            conn.execute(
+                insert(moves).from_select(
+                    ["id", "year", "run"],
+                    select(hot.c.id, literal(year), literal(run, DateTime)).where(in_year),
+                )
+            )
+            copied, first_id, last_id = conn.execute(
+                select(func.count(), func.min(moves.c.id), func.max(moves.c.id))
+            ).one()
+            count = conn.scalar(
+                select(func.count()).select_from(partition)
+                .where(partition.c.date >= start, partition.c.date < end)
+            )
+
+        rows = (
+            (Transaction.date >= start) & (Transaction.date < end)
+            & Transaction.id.between(first_id, last_id) & (Transaction.id != newest_id)
+        )
+        hot_conn = db.connection()
+        # The moved rows keep their search entries
+        with search_triggers_suspended(hot_conn, "delete"):
+            moved[year] = hot_conn.execute(delete(Transaction).where(rows)).rowcount
+        if moved[year] != copied:
+            db.rollback()
+            raise RuntimeError(
+                f"Archiving {year} copied {copied} transactions but would delete "
+                f"{moved[year]}; nothing was removed from the ledger"
+            )
+        hot_conn.execute(
+            insert(ArchivePartition)
+            .values(year=year, path=path, rows=count, archived_at=run)
+            .on_conflict_do_update(
+                index_elements=[ArchivePartition.year],
+                set_={"path": path, "rows": count, "archived_at": run},
+            )
+        )
+        db.commit()
+        _prepare_partition(engine)
+        engine.dispose()
+
+    _consolidate(db, db_path)
+    return moved
+
+
+def vacuum_database(db_path: str = DB_PATH) -> None:
+    """Return the space freed by archiving to the filesystem."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
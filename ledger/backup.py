@@ -0,0 +1,265 @@
+"""
+Online backups, incremental snapshots and restore for the ledger file.
+
+Backups use SQLite's online backup API, which copies the database a few
+pages at a time and restarts around concurrent writes, so each backup is
+a consistent snapshot even in WAL mode and writers are never blocked for
+long.
+
+A full backup is a standalone copy of the database, optionally gzipped.
+An incremental snapshot splits the copy into fixed-size chunks stored by
+content hash under ``backups/chunks``. Its JSON manifest lists the
+chunks, so only chunks that changed since an earlier snapshot take new
+space.
+"""
+import gzip
+import hashlib
+import json
+import shutil
+import sqlite3
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Set
+
+from .config import DB_PATH
+
+# Pages copied per backup step, and the pause between steps in seconds
+# that lets writers get the lock
+PAGES_PER_STEP = 1024
+STEP_SLEEP = 0.005
+
+# Snapshot chunk size; a multiple of every SQLite page size
+CHUNK_SIZE = 64 * 1024
+
+BACKUP_PREFIX = "ledger_backup_"
+BACKUP_SUFFIXES = (".db", ".db.gz", ".json")
+
+
+class SnapshotStats(NamedTuple):
+    """Size of an incremental snapshot and how much of it was new."""
+    path: Path
+    chunks: int
+    new_chunks: int
+    new_bytes: int
+
+
+def default_backup_dir(db_path: str = DB_PATH) -> Path:
+    return Path(db_path).parent / "backups"
+
+
+def copy_database(source: Path, target: Path, pages: int = PAGES_PER_STEP) -> None:
+    """Copy a live database into a standalone file with the backup API."""
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    try:
+        dst = sqlite3.connect(target)
+        try:
+            src.backup(dst, pages=pages, sleep=STEP_SLEEP)
+            # A WAL-mode source would leave the copy expecting a -wal file
+            dst.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+
+def _new_backup_path(backup_dir: Path, suffix: str) -> Path:
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = backup_dir / f"{BACKUP_PREFIX}{stamp}{suffix}"
+    counter = 1
+    while path.exists():
+        path = backup_dir / f"{BACKUP_PREFIX}{stamp}_{counter}{suffix}"
+        counter += 1
+    return path
+
+
+def _read_chunks(path: Path) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _chunk_path(chunk_dir: Path, name: str) -> Path:
+    return chunk_dir / name[:2] / name
+
+
+def write_snapshot(copy: Path, manifest: Path, compress: bool = False) -> SnapshotStats:
+    """Store a database copy as content-addressed chunks plus a manifest."""
+    chunk_dir = manifest.parent / "chunks"
+    names = []
+    new_chunks = new_bytes = 0
+    for chunk in _read_chunks(copy):
+        name = hashlib.sha256(chunk).hexdigest() + (".z" if compress else "")
+        names.append(name)
+        path = _chunk_path(chunk_dir, name)
+        if path.exists():
+            continue
+        data = zlib.compress(chunk, 1) if compress else chunk
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(path.name + ".tmp")
+        partial.write_bytes(data)
+        partial.replace(path)
+        new_chunks += 1
+        new_bytes += len(data)
+
+    manifest.write_text(json.dumps({
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "size": copy.stat().st_size,
+        "chunk_size": CHUNK_SIZE,
+        "chunks": names,
+    }))
+    return SnapshotStats(manifest, len(names), new_chunks, new_bytes)
+
+
+def backup_database(
+    compress: bool = False,
+    incremental: bool = False,
+    keep: Optional[int] = None,
+    db_path: str = DB_PATH,
+    backup_dir: Optional[Path] = None,
+) -> Path:
+    """Back up the ledger while it stays available to other connections.
+
+    Args:
+        compress: Gzip a full backup, or zlib-compress new snapshot chunks
+        incremental: Write a deduplicated snapshot instead of a full copy
+        keep: Prune to this many most recent backups afterwards
+
+    Returns:
+        Path: The backup file or snapshot manifest
+    """
+    backup_dir = backup_dir or default_backup_dir(db_path)
+    backup_dir.mkdir(parents=True, exist_ok=True)
+
+    if incremental:
+        path = _new_backup_path(backup_dir, ".json")
+    else:
+        path = _new_backup_path(backup_dir, ".db.gz" if compress else ".db")
+    copy = backup_dir / f".{path.name}.tmp"
+    try:
+        copy_database(Path(db_path), copy)
+        if incremental:
+            write_snapshot(copy, path, compress)
+        elif compress:
+            with open(copy, "rb") as src, gzip.open(path, "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        else:
+            copy.replace(path)
+    finally:
+        copy.unlink(missing_ok=True)
+
+    if keep is not None:
+        prune_backups(keep, backup_dir)
+    return path
+
+
+def list_backups(backup_dir: Optional[Path] = None) -> List[Path]:
+    """Backups and snapshot manifests, oldest first."""
+    backup_dir = backup_dir or default_backup_dir()
+    if not backup_dir.is_dir():
+        return []
+    backups = [
+        path for path in backup_dir.iterdir()
+        if path.name.startswith(BACKUP_PREFIX) and path.name.endswith(BACKUP_SUFFIXES)
+    ]
+    # Names only have second resolution and sort by suffix within a second
+    return sorted(backups, key=lambda path: (path.stat().st_mtime, path.name))
+
+
+def _manifest_chunks(manifest: Path) -> List[str]:
+    chunks: List[str] = json.loads(manifest.read_text())["chunks"]
+    return chunks
+
+
+def prune_backups(keep: int, backup_dir: Optional[Path] = None) -> List[Path]:
+    """Delete all but the newest keep backups, then any chunks no remaining
+    snapshot uses.
+
+    Returns:
+        List[Path]: The deleted backups
+    """
+    if keep < 1:
+        raise ValueError("Must keep at least one backup")
+    backup_dir = backup_dir or default_backup_dir()
+    backups = list_backups(backup_dir)
+    removed = backups[:-keep]
+    for path in removed:
+        path.unlink()
+
+    chunk_dir = backup_dir / "chunks"
+    if chunk_dir.is_dir():
+        used: Set[str] = set()
+        for manifest in backups[-keep:]:
+            if manifest.suffix == ".json":
+                used.update(_manifest_chunks(manifest))
+        for path in chunk_dir.glob("*/*"):
+            if path.name not in used:
+                path.unlink()
+    return removed
+
+
+def _materialize(backup: Path, target: Path) -> None:
+    """Write the database contained in a compressed backup or snapshot."""
+    if backup.name.endswith(".db.gz"):
+        with gzip.open(backup, "rb") as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        return
+
+    chunk_dir = backup.parent / "chunks"
+    with open(target, "wb") as dst:
+        for name in _manifest_chunks(backup):
+            data = _chunk_path(chunk_dir, name).read_bytes()
+            if name.endswith(".z"):
+                data = zlib.decompress(data)
+            if hashlib.sha256(data).hexdigest() != name.split(".")[0]:
+                raise ValueError(f"Snapshot chunk {name} is corrupt")
+            dst.write(data)
+
+
+def restore_backup(backup: Path, db_path: str = DB_PATH) -> None:
+    """Replace the ledger's contents with a backup.
+
+    The backup is checked with PRAGMA quick_check first, then copied in
+    with the backup API in a single step, so other connections see either
+    the old or the restored database. The restored ledger gets a new
+    version token so no cached report from before the restore is reused.
+
+    Raises:
+        ValueError: If the backup is not a ledger backup or is corrupt
+    """
+    if not backup.name.endswith(BACKUP_SUFFIXES):
+        raise ValueError(f"Not a ledger backup: {backup}")
+
+    scratch = None
+    source = backup
+    if not backup.name.endswith(".db"):
+        scratch = source = Path(db_path).with_name(Path(db_path).name + ".restore")
+    try:
+        if scratch is not None:
+            _materialize(backup, scratch)
+
+        src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+        try:
+            (check,) = src.execute("PRAGMA quick_check").fetchone()
+            if check != "ok":
+                raise ValueError(f"Backup {backup} failed the integrity check: {check}")
+
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            dst = sqlite3.connect(db_path)
+            try:
+                src.backup(dst)
+                try:
+                    dst.execute("UPDATE ledger_version SET token = lower(hex(randomblob(8)))")
+                    dst.commit()
+                except sqlite3.OperationalError:
+                    pass  # backup predates the version counter
+            finally:
+                dst.close()
+        finally:
+            src.close()
+    finally:
+        if scratch is not None:
+            scratch.unlink(missing_ok=True)
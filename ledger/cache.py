@@ -0,0 +1,264 @@
+"""
+Persistent result cache for analysis queries.
+
+Results are stored in a small SQLite file beside the ledger, keyed by the
+query name and its normalized arguments. Each entry records the ledger's
+(token, version) stamp from the ``ledger_version`` table, which every
+write transaction bumps as it commits, so an entry is only served while
+the ledger is unchanged. The file is bounded in size with least-recently-used eviction.
+"""
+import functools
+import inspect
+import json
+import pickle
+import sqlite3
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, TypeVar
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .config import DB_PATH, get_report_cache_settings
+from .models import driver_connection
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# (token, version) of the ledger a result was computed from
+Stamp = Tuple[str, int]
+
+CACHE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        token TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        value BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        used_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_entries_used_at ON entries (used_at)",
+    """
+    CREATE TABLE IF NOT EXISTS counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """,
+]
+
+
+class CacheStats(NamedTuple):
+    """Contents and hit rate of a report cache."""
+    path: Path
+    entries: int
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ReportCache:
+    """Size-bounded LRU store of pickled report results in a SQLite file.
+
+    Only entries for the latest ledger stamp are kept: storing a result for
+    a new stamp drops every entry computed from an older state.
+    """
+
+    def __init__(self, path: Path, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            for statement in CACHE_SCHEMA:
+                conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    def _count(self, conn: sqlite3.Connection, name: str) -> None:
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, key: str, stamp: Stamp) -> Tuple[bool, Any]:
+        """Look up a result computed at stamp.
+
+        Returns:
+            Tuple[bool, Any]: Whether the entry was found, and its value
+        """
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value FROM entries WHERE key = ? AND token = ? AND version = ?",
+            (key, *stamp),
+        ).fetchone()
+        if row is None:
+            self._count(conn, "misses")
+            return False, None
+
+        conn.execute("UPDATE entries SET used_at = ? WHERE key = ?", (time.time(), key))
+        self._count(conn, "hits")
+        return True, pickle.loads(row[0])
+
+    def put(self, key: str, stamp: Stamp, value: Any) -> None:
+        """Store a result computed at stamp, evicting to stay within max_size."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_size:
+            return
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM entries WHERE token != ? OR version != ?", stamp
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, token, version, value, size, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, *stamp, blob, len(blob), time.time()),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_size:
+                for old_key, size in conn.execute(
+                    "SELECT key, size FROM entries WHERE key != ? ORDER BY used_at", (key,)
+                ).fetchall():
+                    if total <= self.max_size:
+                        break
+                    conn.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                    total -= size
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> CacheStats:
+        """Current entries, size and lifetime hit/miss counts."""
+        conn = self._connect()
+        entries, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        counters = dict(conn.execute("SELECT name, value FROM counters"))
+        return CacheStats(
+            self.path, entries, size, self.max_size,
+            counters.get("hits", 0), counters.get("misses", 0),
+        )
+
+    def clear(self) -> int:
+        """Drop every entry and reset the counters.
+
+        Returns:
+            int: Number of entries removed
+        """
+        conn = self._connect()
+        removed = conn.execute("DELETE FROM entries").rowcount
+        conn.execute("DELETE FROM counters")
+        conn.execute("VACUUM")
+        return removed
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_caches: Dict[str, ReportCache] = {}
+
+
+def cache_path(database: str) -> Path:
+    """Location of the report cache for a ledger file."""
+    path = Path(database)
+    return path.with_name(path.name + ".cache")
+
+
+def open_report_cache(database: str = DB_PATH) -> ReportCache:
+    """The report cache of a ledger file, whether or not caching is enabled."""
+    path = str(cache_path(database))
+    if path not in _caches:
+        _caches[path] = ReportCache(Path(path), get_report_cache_settings()[1])
+    return _caches[path]
+
+
+def get_report_cache(db: Session) -> Optional[ReportCache]:
+    """The report cache of the session's ledger, or None when disabled.
+
+    In-memory ledgers have nowhere to keep a cache and never use one.
+    """
+    enabled, _ = get_report_cache_settings()
+    database = db.get_bind().engine.url.database
+    if not enabled or not database or database == ":memory:":
+        return None
+    return open_report_cache(database)
+
+
+def ledger_stamp(db: Session) -> Optional[Stamp]:
+    """The ledger's current (token, version), or None if it cannot be trusted.
+
+    Returns None for ledgers without the version table, and while the
+    session holds uncommitted writes that could still be rolled back.
+    """
+    connection = db.connection()
+    if driver_connection(connection).in_transaction:
+        return None
+    try:
+        row = connection.exec_driver_sql(
+            "SELECT token, version FROM ledger_version WHERE id = 1"
+        ).first()
+    except OperationalError:
+        return None
+    return (row[0], row[1]) if row else None
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot use {type(value).__name__} in a report cache key")
+
+
+def cached_report(func: F) -> F:
+    """Serve an analysis query from the report cache while the ledger is
+    unchanged.
+
+    The wrapped function takes the session first; its other arguments,
+    with defaults applied, form the cache key. A falsy account_id means
+    all accounts, as in filter_transactions.
+    """
+    signature = inspect.signature(func)
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(db: Session, *args: Any, **kwargs: Any) -> Any:
+        cache = get_report_cache(db)
+        stamp = ledger_stamp(db) if cache is not None else None
+        if cache is None or stamp is None:
+            return func(db, *args, **kwargs)
+
+        bound = signature.bind(db, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(list(bound.arguments.items())[1:])
+        if "account_id" in arguments and not arguments["account_id"]:
+            arguments["account_id"] = None
+        key = name + json.dumps(arguments, default=_normalize, sort_keys=True)
+
+        hit, value = cache.get(key, stamp)
+        if hit:
+            return value
+        value = func(db, *args, **kwargs)
+        cache.put(key, stamp, value)
+        return value
+
+    return wrapper  # type: ignore[return-value]
@@ -1,30 +1,54 @@
 """
 CLI interface for the ledger application.
 """
-from datetime import datetime
+import os
+import sys
+from datetime import datetime, time
 from decimal import Decimal
-from typing import Optional
-import questionary
-from questionary import Choice
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 import typer
 from colorama import init, Fore, Style
 
-from .storage import (
-    get_db, create_transaction, get_transactions,
-    get_or_create_category, delete_category,
-    get_bank_accounts, create_bank_account
-)
-from .analysis import print_financial_report
-from .models import Category
+from .config import DEFAULT_BATCH_SIZE, DEFAULT_PAGE_SIZE
+from .money import parse_amount
+
+# Heavy modules (SQLAlchemy via storage, questionary, rich via analysis) are
+# imported inside the commands that need them so that startup stays fast.
 
 # Initialize colorama
 init()
 
 app = typer.Typer(help="Personal finance tracking CLI")
+rollup_app = typer.Typer(help="Maintain the monthly summary rollups")
+app.add_typer(rollup_app, name="rollup")
+cache_app = typer.Typer(help="Inspect and clear the report result cache")
+app.add_typer(cache_app, name="cache")
+rules_app = typer.Typer(help="Manage the auto-categorization rules")
+app.add_typer(rules_app, name="rules")
+
+def format_cursor(transaction: Any) -> str:
+    """Format a transaction's position as a keyset cursor for --after."""
+    return f"{transaction.date.strftime('%Y-%m-%d')}:{transaction.id}"
+
+def parse_cursor(value: str) -> Tuple[datetime, int]:
+    """Parse a keyset cursor.
+    
+    A bare date resumes after the end of that day, a DATE:ID cursor
+    resumes after that exact transaction.
+    """
+    date_str, _, id_str = value.partition(":")
+    date = datetime.strptime(date_str, "%Y-%m-%d")
+    if not id_str:
+        return datetime.combine(date.date(), time.max), 0
+    return date, int(id_str)
 
-def interactive_menu():
+def interactive_menu() -> None:
     """Show interactive main menu."""
+    import questionary
+    from questionary import Choice
+    
     choices = [
         Choice("Add Transaction", "add"),
         Choice("List Transactions", "list"),
@@ -53,8 +77,14 @@ def interactive_menu():
         elif action == "analysis":
             show_analysis()
 
-def interactive_add():
+def interactive_add() -> None:
     """Interactive transaction addition."""
+    import questionary
+    from questionary import Choice
+    from .models import Category
+    from .rules import load_rules
+    from .storage import get_db, get_bank_accounts, add_transaction
+    
     try:
         # First, select a bank account
         with get_db() as db:
@@ -85,7 +115,7 @@ def interactive_add():
         
         amount = questionary.text(
             "Enter amount (negative for expenses):",
-            validate=lambda x: x.replace(".", "").replace("-", "").isdigit()
+            validate=lambda x: x.replace(".", "", 1).removeprefix("-").isdigit()
         ).ask()
         
         # Show category selection with existing categories
@@ -99,9 +129,13 @@ def interactive_add():
             choices = [Choice(c, c) for c in sorted(categories)]
             choices.append(Choice("Add new category", "new"))
             
+            # Preselect the category the rules would choose
+            suggested = load_rules(db).match(description)
+            
         category = questionary.select(
             "Select category:",
-            choices=choices
+            choices=choices,
+            default=suggested.category if suggested else None,
         ).ask()
         
         if category == "new":
@@ -113,16 +147,17 @@ def interactive_add():
                 category = new_category
         
         # Create the transaction
-        with get_db() as db:
-            transaction = create_transaction(
-                db,
-                date=datetime.strptime(date_str, "%Y-%m-%d"),
-                description=description,
-                amount=Decimal(amount),
-                category=category,
-                account_id=account_id,
-            )
-            
+        transaction = add_transaction(
+            date=datetime.strptime(date_str, "%Y-%m-%d"),
+            description=description,
+            amount=parse_amount(amount),
+            category=category,
+            account_id=account_id,
+        )
+        if transaction is None:
+            typer.echo(f"{Fore.YELLOW}Already in the ledger; nothing added.{Style.RESET_ALL}")
+            return
+        
         typer.echo(
             f"{Fore.GREEN}Transaction added successfully: "
             f"{transaction.description} (${transaction.amount}){Style.RESET_ALL}"
@@ -131,8 +166,15 @@ def interactive_add():
     except Exception as e:
         typer.echo(f"{Fore.RED}Error adding transaction: {str(e)}{Style.RESET_ALL}")
 
-def interactive_list():
+def interactive_list() -> None:
     """Interactive transaction listing."""
+    import questionary
+    from .models import Category
+    from .render import (
+        TransactionViewport, batch_lines, colored, is_terminal, transaction_line, use_color, write_chunks
+    )
+    from .storage import get_db, iter_transaction_records
+    
     try:
         use_filters = questionary.confirm("Do you want to use filters?").ask()
         
@@ -157,32 +199,42 @@ def interactive_list():
                     choices=categories
                 ).ask()
         
+        filters: Dict[str, Any] = dict(
+            start_date=datetime.strptime(start_date, "%Y-%m-%d") if start_date else None,
+            end_date=datetime.strptime(end_date, "%Y-%m-%d") if end_date else None,
+            category=category,
+        )
         with get_db() as db:
-            transactions = get_transactions(
-                db,
-                start_date=datetime.strptime(start_date, "%Y-%m-%d") if start_date else None,
-                end_date=datetime.strptime(end_date, "%Y-%m-%d") if end_date else None,
-                category=category,
-            )
-            
-            if not transactions:
-                typer.echo(f"{Fore.YELLOW}No transactions found.{Style.RESET_ALL}")
+            if is_terminal():
+                # Fetch one screenful per keypress instead of the whole listing
+                TransactionViewport(
+                    lambda after, limit: [
+                        *iter_transaction_records(db, after=after, limit=limit, page_size=limit, **filters)
+                    ]
+                ).run()
                 return
             
-            for t in transactions:
-                typer.echo(
-                    f"{Fore.BLUE}{t.date.strftime('%Y-%m-%d')} | "
-                    f"{t.description} | "
-                    f"{Fore.GREEN if t.amount >= 0 else Fore.RED}"
-                    f"${abs(t.amount)}{Style.RESET_ALL}"
-                    f"{f' | {t.category}' if t.category else ''}"
-                )
+            color = use_color()
+            
+            def lines() -> Iterator[str]:
+                found = False
+                for t in iter_transaction_records(db, **filters):
+                    found = True
+                    yield transaction_line(t, color)
+                if not found:
+                    yield colored("No transactions found.", Fore.YELLOW, color)
+            
+            write_chunks(batch_lines(lines()), color)
     
     except Exception as e:
         typer.echo(f"{Fore.RED}Error listing transactions: {str(e)}{Style.RESET_ALL}")
 
-def manage_bank_accounts():
+def manage_bank_accounts() -> None:
     """Manage bank accounts."""
+    import questionary
+    from questionary import Choice
+    from .storage import get_db, get_bank_accounts, create_bank_account
+    
     try:
         with get_db() as db:
             accounts = get_bank_accounts(db)
@@ -231,8 +283,13 @@ def manage_bank_accounts():
     except Exception as e:
         typer.echo(f"{Fore.RED}Error managing bank accounts: {str(e)}{Style.RESET_ALL}")
 
-def show_analysis():
+def show_analysis() -> None:
     """Show financial analysis and reports."""
+    import questionary
+    from questionary import Choice
+    from .analysis import print_financial_report
+    from .storage import get_db, get_bank_accounts
+    
     try:
         with get_db() as db:
             # Get filter preferences
@@ -278,8 +335,12 @@ def show_analysis():
     except Exception as e:
         typer.echo(f"{Fore.RED}Error generating analysis: {str(e)}{Style.RESET_ALL}")
 
-def show_categories():
+def show_categories() -> None:
     """Display available categories and allow management."""
+    import questionary
+    from questionary import Choice
+    from .storage import get_db, get_or_create_category, delete_category
+    
     try:
         with get_db() as db:
             from .models import Category
@@ -342,42 +403,385 @@ def show_categories():
     except Exception as e:
         typer.echo(f"{Fore.RED}Error managing categories: {str(e)}{Style.RESET_ALL}")
 
+def start_profiling(ctx: typer.Context, output: Optional[Path]) -> None:
+    """Record SQL statements, and Python calls when output is set, until the
+    command finishes, then print the summary to stderr."""
+    from .profiling import QueryProfiler
+
+    profiler = QueryProfiler()
+    python_profile = None
+    if output is not None:
+        import cProfile
+        python_profile = cProfile.Profile()
+
+    def finish() -> None:
+        if python_profile is not None and output is not None:
+            python_profile.disable()
+            python_profile.dump_stats(output)
+        profiler.stop()
+        typer.echo(f"{Fore.CYAN}Profile:{Style.RESET_ALL}", err=True)
+        for line in profiler.summary():
+            color = Fore.YELLOW if line.startswith(("N+1", "Repeated")) else ""
+            typer.echo(f"{color}  {line}{Style.RESET_ALL if color else ''}", err=True)
+        if python_profile is not None:
+            typer.echo(f"  Python profile written to {output} (open with pstats)", err=True)
+
+    ctx.call_on_close(finish)
+    profiler.start()
+    if python_profile is not None:
+        python_profile.enable()
+
 @app.callback(invoke_without_command=True)
-def main(ctx: typer.Context):
+def main(
+    ctx: typer.Context,
+    profile: bool = typer.Option(
+        False, "--profile", help="Print SQL query counts, timings and N+1 warnings after the command"
+    ),
+    profile_output: Optional[Path] = typer.Option(
+        None, "--profile-output", help="Also write a cProfile dump to this file (implies --profile)"
+    ),
+) -> None:
     """Personal finance tracking CLI."""
+    if profile or profile_output is not None:
+        start_profiling(ctx, profile_output)
     if ctx.invoked_subcommand is None:
         interactive_menu()
 
 @app.command()
 def add(
-    amount: float = typer.Argument(..., help="Transaction amount"),
+    amount: Decimal = typer.Argument(
+        ..., parser=parse_amount, help="Transaction amount, negative for expenses"
+    ),
     description: str = typer.Option(..., help="Transaction description"),
     category: Optional[str] = typer.Option(None, help="Transaction category"),
-    date: str = typer.Option(
-        datetime.now().strftime("%Y-%m-%d"),
-        help="Transaction date (YYYY-MM-DD)",
+    date: Optional[str] = typer.Option(
+        None, help="Transaction date (YYYY-MM-DD), today by default",
+    ),
+    account_id: Optional[int] = typer.Option(
+        None, "--account-id", help="Bank account (required when there are several)"
     ),
-):
+    skip_duplicate: bool = typer.Option(
+        False, "--skip-duplicate", help="Do nothing if the ledger already has this transaction"
+    ),
+) -> None:
     """Add a new transaction."""
+    from .rules import load_rules
+    from .storage import get_db, get_bank_accounts, add_transaction
+    
+    try:
+        with get_db() as db:
+            if account_id is None:
+                account_ids = [account.id for account in get_bank_accounts(db)]
+                if len(account_ids) != 1:
+                    typer.echo(f"{Fore.RED}Use --account-id to choose a bank account.{Style.RESET_ALL}")
+                    raise typer.Exit(1)
+                account_id = account_ids[0]
+            if category is None:
+                rule = load_rules(db).match(description)
+                category = rule.category if rule else None
+        
+        transaction = add_transaction(
+            date=datetime.strptime(date or datetime.now().strftime("%Y-%m-%d"), "%Y-%m-%d"),
+            description=description,
+            amount=amount,
+            category=category,
+            account_id=account_id,
+            skip_duplicate=skip_duplicate,
+        )
+        if transaction is None:
+            typer.echo(f"{Fore.YELLOW}Already in the ledger; nothing added.{Style.RESET_ALL}")
+            return
+        typer.echo(
+            f"{Fore.GREEN}Transaction added successfully: "
+            f"{transaction.description} (${transaction.amount}){Style.RESET_ALL}"
+        )
+    except typer.Exit:
+        raise
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error adding transaction: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@app.command()
+def list(
+    start_date: Optional[str] = typer.Option(
+        None, help="Start date (YYYY-MM-DD)"
+    ),
+    end_date: Optional[str] = typer.Option(
+        None, help="End date (YYYY-MM-DD)"
+    ),
+    category: Optional[str] = typer.Option(
+        None, help="Filter by category"
+    ),
+    limit: Optional[int] = typer.Option(
+        None, min=1, help="Maximum number of transactions to show"
+    ),
+    after: Optional[str] = typer.Option(
+        None, help="Resume after a cursor (YYYY-MM-DD or YYYY-MM-DD:ID)"
+    ),
+    page_size: int = typer.Option(
+        DEFAULT_PAGE_SIZE, min=1, help="Rows fetched per database query"
+    ),
+    pager: bool = typer.Option(
+        True, "--pager/--no-pager", help="Page output longer than the terminal"
+    ),
+) -> None:
+    """List transactions with optional filtering."""
+    from .render import batch_lines, colored, is_terminal, transaction_line, use_color, write_chunks
+    from .storage import get_db, iter_transaction_records
+    
     try:
         with get_db() as db:
-            transaction = create_transaction(
+            transactions = iter_transaction_records(
                 db,
-                date=datetime.strptime(date, "%Y-%m-%d"),
-                description=description,
-                amount=Decimal(str(amount)),
+                start_date=datetime.strptime(start_date, "%Y-%m-%d") if start_date else None,
+                end_date=datetime.strptime(end_date, "%Y-%m-%d") if end_date else None,
                 category=category,
+                after=parse_cursor(after) if after else None,
+                limit=limit,
+                page_size=page_size,
+            )
+            
+            color = use_color()
+            
+            def lines() -> Iterator[str]:
+                count = 0
+                last = None
+                for t in transactions:
+                    yield transaction_line(t, color)
+                    count += 1
+                    last = t
+                
+                if not count:
+                    yield colored("No transactions found.", Fore.YELLOW, color)
+                elif limit is not None and count == limit:
+                    yield colored(
+                        f"More results may follow: --after {format_cursor(last)}", Fore.YELLOW, color
+                    )
+            
+            write_chunks(batch_lines(lines()), color, pager=pager and is_terminal())
+    
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error listing transactions: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@app.command("import")
+def import_(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, help="Statement file"),
+    account_id: int = typer.Option(..., "--account-id", help="Bank account to import into"),
+    format: Optional[str] = typer.Option(
+        None, "--format", help="Statement format (csv/ofx/qif), detected from extension by default"
+    ),
+    date_format: str = typer.Option(
+        "%Y-%m-%d", help="Date format used by CSV statements"
+    ),
+    batch_size: int = typer.Option(
+        DEFAULT_BATCH_SIZE, min=1, help="Rows per insert batch"
+    ),
+    skip_duplicates: bool = typer.Option(
+        False, "--skip-duplicates", help="Leave out transactions already in the ledger"
+    ),
+    use_rules: bool = typer.Option(
+        True, "--rules/--no-rules", help="Categorize uncategorized rows with the rules"
+    ),
+) -> None:
+    """Import transactions from a CSV, OFX or QIF statement file."""
+    from .importers import parse_statement
+    from .rules import load_rules
+    from .storage import get_db, get_bank_account, bulk_insert_transactions, BatchProgress
+
+    skipped = 0
+
+    def report(p: BatchProgress) -> None:
+        nonlocal skipped
+        skipped = p.skipped_rows
+        typer.echo(
+            f"{Fore.BLUE}Batch {p.batch}: {p.total_rows:,} rows "
+            f"({p.rows_per_second:,.0f} rows/s){Style.RESET_ALL}"
+        )
+
+    try:
+        with get_db() as db:
+            if get_bank_account(db, account_id) is None:
+                typer.echo(f"{Fore.RED}Bank account {account_id} not found.{Style.RESET_ALL}")
+                raise typer.Exit(1)
+
+            rows = parse_statement(path, format, date_format)
+            total = bulk_insert_transactions(
+                db, rows, account_id=account_id, batch_size=batch_size, progress=report,
+                skip_duplicates=skip_duplicates, rules=load_rules(db) if use_rules else None,
             )
-            typer.echo(
-                f"{Fore.GREEN}Transaction added successfully: "
-                f"{transaction.description} (${transaction.amount}){Style.RESET_ALL}"
+            typer.echo(f"{Fore.GREEN}Imported {total:,} transactions from {path}{Style.RESET_ALL}")
+            if skipped:
+                typer.echo(f"{Fore.YELLOW}Skipped {skipped:,} duplicates.{Style.RESET_ALL}")
+    except typer.Exit:
+        raise
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error importing transactions: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@app.command()
+def dedupe(
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only list the duplicates"),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Do not ask for confirmation"),
+) -> None:
+    """Merge transactions with the same account, day, amount and description."""
+    from .dedupe import find_duplicates, merge_duplicates
+    from .money import from_cents
+    from .storage import begin_immediate, get_db
+
+    try:
+        with get_db() as db:
+            groups = [*find_duplicates(db)]
+            if not groups:
+                typer.echo(f"{Fore.GREEN}No duplicate transactions.{Style.RESET_ALL}")
+                return
+            for group in groups:
+                typer.echo(
+                    f"{group.date.strftime('%Y-%m-%d')} | {group.description} | "
+                    f"${from_cents(group.amount_cents)} | {len(group.duplicates)} duplicate(s)"
+                )
+            count = sum(len(group.duplicates) for group in groups)
+            if dry_run:
+                typer.echo(f"{count:,} duplicates in {len(groups):,} groups.")
+                return
+            if not yes and not typer.confirm(f"Delete {count:,} duplicate transactions?"):
+                raise typer.Exit(1)
+        
+        # Find them again under the write lock, in case the ledger changed
+        # while the prompt was open
+        with get_db() as db:
+            begin_immediate(db)
+            removed = merge_duplicates(db, find_duplicates(db))
+        typer.echo(f"{Fore.GREEN}Removed {removed:,} duplicate transactions.{Style.RESET_ALL}")
+    except typer.Exit:
+        raise
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error removing duplicates: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@rules_app.command("list")
+def rules_list() -> None:
+    """Show the rules, highest priority first."""
+    from .rules import load_rules
+    from .storage import get_db
+
+    try:
+        with get_db() as db:
+            rule_set = load_rules(db)
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error reading rules: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+    if not rule_set.rules:
+        typer.echo(f"{Fore.YELLOW}No rules yet; add one with `ledger rules add`.{Style.RESET_ALL}")
+    for rule in rule_set.rules:
+        kind = "regex" if rule.regex else "contains"
+        line = f"{rule.id:>4} | {kind:<8} | {rule.pattern} -> {rule.category} (priority {rule.priority})"
+        if rule in rule_set.invalid:
+            line = f"{Fore.RED}{line} [invalid, skipped]{Style.RESET_ALL}"
+        typer.echo(line)
+
+@rules_app.command("add")
+def rules_add(
+    pattern: str = typer.Argument(..., help="Phrase the description contains, or a regex"),
+    category: str = typer.Argument(..., help="Category to assign"),
+    regex: bool = typer.Option(False, "--regex", help="Treat the pattern as a regular expression"),
+    priority: int = typer.Option(0, help="Higher priorities win when several rules match"),
+) -> None:
+    """Add a rule that categorizes matching transactions."""
+    from .models import CategoryRule
+    from .rules import validate_pattern
+    from .storage import get_db, get_or_create_category
+
+    try:
+        validate_pattern(pattern, regex)
+        with get_db() as db:
+            rule = CategoryRule(
+                pattern=pattern,
+                regex=regex,
+                category_id=get_or_create_category(db, category),
+                priority=priority,
             )
+            db.add(rule)
+            db.flush()
+            rule_id = rule.id
+        typer.echo(f"{Fore.GREEN}Added rule {rule_id}: {pattern} -> {category}{Style.RESET_ALL}")
     except Exception as e:
-        typer.echo(f"{Fore.RED}Error adding transaction: {str(e)}{Style.RESET_ALL}")
+        typer.echo(f"{Fore.RED}Error adding rule: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@rules_app.command("remove")
+def rules_remove(rule_id: int = typer.Argument(..., help="Rule id from `ledger rules list`")) -> None:
+    """Delete a rule."""
+    from sqlalchemy import delete
+    from .models import CategoryRule
+    from .storage import get_db
+
+    try:
+        with get_db() as db:
+            removed = db.execute(
+                delete(CategoryRule).where(CategoryRule.id == rule_id).returning(CategoryRule.id)
+            ).first()
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error removing rule: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+    if not removed:
+        typer.echo(f"{Fore.RED}Rule {rule_id} not found.{Style.RESET_ALL}")
         raise typer.Exit(1)
+    typer.echo(f"{Fore.GREEN}Removed rule {rule_id}.{Style.RESET_ALL}")
 
 @app.command()
-def list(
+def categorize(
+    apply: bool = typer.Option(False, "--apply", help="Write the new categories"),
+    overwrite: bool = typer.Option(
+        False, "--overwrite", help="Also recategorize transactions that have a category"
+    ),
+    batch_size: int = typer.Option(
+        DEFAULT_BATCH_SIZE, min=1, help="Transactions per UPDATE batch"
+    ),
+) -> None:
+    """Run the rules over existing transactions; a dry run without --apply."""
+    from .rules import CategorizeStats, categorize_transactions, load_rules
+    from .storage import begin_immediate, get_db
+
+    def report(p: CategorizeStats) -> None:
+        typer.echo(
+            f"{Fore.BLUE}{p.scanned:,} scanned, {p.changed:,} to change "
+            f"({p.rows_per_second:,.0f} rows/s){Style.RESET_ALL}"
+        )
+
+    try:
+        with get_db() as db:
+            rules = load_rules(db)
+            if not rules:
+                typer.echo(f"{Fore.YELLOW}No rules yet; add one with `ledger rules add`.{Style.RESET_ALL}")
+                return
+            if apply:
+                begin_immediate(db)
+            stats = categorize_transactions(
+                db, rules, overwrite=overwrite, apply=apply, batch_size=batch_size, progress=report
+            )
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error categorizing transactions: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+    typer.echo(
+        f"{len(rules):,} rules: {stats.scanned:,} scanned, {stats.matched:,} matched, "
+        f"{stats.changed:,} {'changed' if apply else 'would change'} "
+        f"in {stats.elapsed:.2f}s ({stats.rows_per_second:,.0f} rows/s)"
+    )
+    if not apply and stats.changed:
+        typer.echo("Run again with --apply to write them.")
+
+@app.command()
+def export(
+    format: str = typer.Option("csv", "--format", help="Output format (csv/jsonl/parquet)"),
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", dir_okay=False, help="Output file (default: stdout)"
+    ),
+    compress: Optional[str] = typer.Option(
+        None, help="Compression (gzip/zstd)"
+    ),
     start_date: Optional[str] = typer.Option(
         None, help="Start date (YYYY-MM-DD)"
     ),
@@ -387,22 +791,77 @@ def list(
     category: Optional[str] = typer.Option(
         None, help="Filter by category"
     ),
-):
-    """List transactions with optional filtering."""
+    account_id: Optional[int] = typer.Option(
+        None, "--account-id", help="Filter by bank account"
+    ),
+) -> None:
+    """Export transactions to CSV, JSONL or Parquet."""
+    from .export import export_transactions
+    from .storage import get_db
+
     try:
         with get_db() as db:
-            transactions = get_transactions(
+            count = export_transactions(
                 db,
+                format,
+                output=output,
+                compression=compress,
                 start_date=datetime.strptime(start_date, "%Y-%m-%d") if start_date else None,
                 end_date=datetime.strptime(end_date, "%Y-%m-%d") if end_date else None,
                 category=category,
+                account_id=account_id,
+            )
+        if output:
+            typer.echo(f"{Fore.GREEN}Exported {count:,} transactions to {output}{Style.RESET_ALL}")
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); silence the final flush
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error exporting transactions: {str(e)}{Style.RESET_ALL}", err=True)
+        raise typer.Exit(1)
+
+@app.command()
+def search(
+    query: str = typer.Argument(..., help='Words to find; use "quotes" for phrases and word* for prefixes'),
+    start_date: Optional[str] = typer.Option(
+        None, help="Start date (YYYY-MM-DD)"
+    ),
+    end_date: Optional[str] = typer.Option(
+        None, help="End date (YYYY-MM-DD)"
+    ),
+    category: Optional[str] = typer.Option(
+        None, help="Filter by category"
+    ),
+    account_id: Optional[int] = typer.Option(
+        None, "--account-id", help="Filter by bank account"
+    ),
+    limit: int = typer.Option(20, min=1, help="Maximum number of results"),
+    raw: bool = typer.Option(
+        False, "--raw", help="Use FTS5 query syntax directly (OR, NOT, NEAR, column:term)"
+    ),
+) -> None:
+    """Search transactions by description and category."""
+    from .search import search_transactions
+    from .storage import get_db
+
+    try:
+        with get_db() as db:
+            results = search_transactions(
+                db,
+                query,
+                start_date=datetime.strptime(start_date, "%Y-%m-%d") if start_date else None,
+                end_date=datetime.strptime(end_date, "%Y-%m-%d") if end_date else None,
+                category=category,
+                account_id=account_id,
+                limit=limit,
+                raw=raw,
             )
             
-            if not transactions:
-                typer.echo(f"{Fore.YELLOW}No transactions found.{Style.RESET_ALL}")
+            if not results:
+                typer.echo(f"{Fore.YELLOW}No matching transactions found.{Style.RESET_ALL}")
                 return
             
-            for t in transactions:
+            for t, _ in results:
                 typer.echo(
                     f"{Fore.BLUE}{t.date.strftime('%Y-%m-%d')} | "
                     f"{t.description} | "
@@ -410,10 +869,332 @@ def list(
                     f"${abs(t.amount)}{Style.RESET_ALL}"
                     f"{f' | {t.category}' if t.category else ''}"
                 )
-    
     except Exception as e:
-        typer.echo(f"{Fore.RED}Error listing transactions: {str(e)}{Style.RESET_ALL}")
+        typer.echo(f"{Fore.RED}Error searching transactions: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@app.command()
+def summary(
+    period: str = typer.Option("monthly", help="Summary period (monthly/yearly)"),
+    start_date: Optional[str] = typer.Option(
+        None, help="Start date (YYYY-MM-DD)"
+    ),
+    end_date: Optional[str] = typer.Option(
+        None, help="End date (YYYY-MM-DD)"
+    ),
+    category: Optional[str] = typer.Option(
+        None, help="Filter by category"
+    ),
+    account_id: Optional[int] = typer.Option(
+        None, "--account-id", help="Filter by bank account"
+    ),
+) -> None:
+    """Show income and expenses per month or year."""
+    from .analysis import print_period_summary
+    from .storage import get_db
+
+    try:
+        with get_db() as db:
+            print_period_summary(
+                db,
+                period,
+                start_date=datetime.strptime(start_date, "%Y-%m-%d") if start_date else None,
+                end_date=datetime.strptime(end_date, "%Y-%m-%d") if end_date else None,
+                account_id=account_id,
+                category=category,
+            )
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error generating summary: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@app.command()
+def report(
+    start_date: Optional[str] = typer.Option(
+        None, help="Start date (YYYY-MM-DD)"
+    ),
+    end_date: Optional[str] = typer.Option(
+        None, help="End date (YYYY-MM-DD)"
+    ),
+    account_id: Optional[int] = typer.Option(
+        None, "--account-id", help="Filter by bank account"
+    ),
+    backend: str = typer.Option(
+        "sql", help="Analysis engine (sql/pandas)"
+    ),
+) -> None:
+    """Show the financial report with income and expenses by category."""
+    from .analysis import print_financial_report
+    from .storage import get_db
+
+    try:
+        with get_db() as db:
+            print_financial_report(
+                db,
+                start_date=datetime.strptime(start_date, "%Y-%m-%d") if start_date else None,
+                end_date=datetime.strptime(end_date, "%Y-%m-%d") if end_date else None,
+                account_id=account_id,
+                backend=backend,
+            )
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error generating report: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@app.command()
+def trends(
+    start_date: Optional[str] = typer.Option(
+        None, help="Start date (YYYY-MM-DD)"
+    ),
+    end_date: Optional[str] = typer.Option(
+        None, help="End date (YYYY-MM-DD)"
+    ),
+    category: Optional[str] = typer.Option(
+        None, help="Filter by category"
+    ),
+    account_id: Optional[int] = typer.Option(
+        None, "--account-id", help="Filter by bank account"
+    ),
+    window: int = typer.Option(3, min=1, help="Months in the rolling average"),
+    top: int = typer.Option(10, min=1, help="Number of merchants to show"),
+) -> None:
+    """Show monthly trends with a rolling average and the top merchants."""
+    from .analytics import print_trends
+    from .storage import get_db
+
+    try:
+        with get_db() as db:
+            print_trends(
+                db,
+                start_date=datetime.strptime(start_date, "%Y-%m-%d") if start_date else None,
+                end_date=datetime.strptime(end_date, "%Y-%m-%d") if end_date else None,
+                account_id=account_id,
+                category=category,
+                window=window,
+                top=top,
+            )
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error generating trends: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@rollup_app.command("rebuild")
+def rollup_rebuild() -> None:
+    """Recompute the monthly rollups from all transactions."""
+    from .rollups import rebuild_rollups
+    from .storage import get_db
+
+    try:
+        with get_db() as db:
+            rows = rebuild_rollups(db)
+        typer.echo(f"{Fore.GREEN}Rebuilt {rows:,} rollup rows.{Style.RESET_ALL}")
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error rebuilding rollups: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@cache_app.command("stats")
+def cache_stats() -> None:
+    """Show the size and hit rate of the report cache."""
+    from .cache import open_report_cache
+    from .config import get_report_cache_settings
+
+    try:
+        enabled, _ = get_report_cache_settings()
+        stats = open_report_cache().stats()
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error reading report cache: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+    state = f"{Fore.GREEN}enabled" if enabled else f"{Fore.YELLOW}disabled"
+    typer.echo(f"Report cache: {stats.path} ({state}{Style.RESET_ALL})")
+    typer.echo(f"Entries:      {stats.entries:,}")
+    typer.echo(f"Size:         {stats.size / 1024:,.1f} KiB of {stats.max_size / 1024:,.0f} KiB")
+    typer.echo(f"Hits:         {stats.hits:,} ({stats.hit_rate:.0%})")
+    typer.echo(f"Misses:       {stats.misses:,}")
+
+@cache_app.command("clear")
+def cache_clear() -> None:
+    """Remove every cached report result."""
+    from .cache import open_report_cache
+
+    try:
+        removed = open_report_cache().clear()
+        typer.echo(f"{Fore.GREEN}Removed {removed:,} cached results.{Style.RESET_ALL}")
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error clearing report cache: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@app.command()
+def backup(
+    compress: bool = typer.Option(False, "--compress", help="Compress the backup"),
+    incremental: bool = typer.Option(
+        False, "--incremental", help="Store only the chunks that changed since earlier snapshots"
+    ),
+    keep: Optional[int] = typer.Option(
+        None, min=1, help="Delete all but this many most recent backups afterwards"
+    ),
+    list_backups: bool = typer.Option(False, "--list", help="List existing backups instead"),
+) -> None:
+    """Back up the ledger without blocking other ledger commands."""
+    from . import backup as backups
+
+    try:
+        if list_backups:
+            paths = backups.list_backups()
+            if not paths:
+                typer.echo(f"{Fore.YELLOW}No backups found.{Style.RESET_ALL}")
+            for path in paths:
+                typer.echo(f"{path.name}  {path.stat().st_size / 1024:,.0f} KiB")
+            return
+
+        path = backups.backup_database(compress=compress, incremental=incremental, keep=keep)
+        typer.echo(f"{Fore.GREEN}Backed up to {path}{Style.RESET_ALL}")
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error backing up ledger: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@app.command()
+def restore(
+    path: Optional[Path] = typer.Argument(
+        None, dir_okay=False, help="Backup file or snapshot manifest; the latest by default"
+    ),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Do not ask for confirmation"),
+) -> None:
+    """Replace the ledger with a backup."""
+    from . import backup as backups
+
+    if path is None:
+        paths = backups.list_backups()
+        if not paths:
+            typer.echo(f"{Fore.RED}No backups found.{Style.RESET_ALL}")
+            raise typer.Exit(1)
+        path = paths[-1]
+
+    if not yes and not typer.confirm(f"Replace the ledger with {path.name}?"):
+        raise typer.Exit(1)
+
+    try:
+        backups.restore_backup(path)
+        typer.echo(f"{Fore.GREEN}Restored ledger from {path}{Style.RESET_ALL}")
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error restoring ledger: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@app.command()
+def migrate(
+    batch_size: Optional[int] = typer.Option(
+        None, "--batch-size", min=1, help="Rows per transaction in data migrations"
+    ),
+    pause: Optional[float] = typer.Option(
+        None, "--pause", min=0, help="Seconds between batches for other commands to write; 0 if none run"
+    ),
+) -> None:
+    """Back up the ledger and upgrade it to the latest schema.
+
+    Safe to run again after an interruption: data migrations continue from
+    their last committed batch.
+    """
+    from .migrations import MigrationProgress
+    from .storage import migrate_database
+
+    def report(progress: MigrationProgress) -> None:
+        eta = "?" if progress.eta is None else f"{progress.eta:,.0f}s"
+        typer.echo(
+            f"{progress.step}: {progress.rows_done:,}/{progress.rows_total:,} rows, "
+            f"{progress.rows_per_second:,.0f} rows/s, ETA {eta}"
+        )
+
+    try:
+        backup_path = migrate_database(batch_size=batch_size, pause=pause, progress=report)
+        typer.echo(f"{Fore.GREEN}Ledger is up to date (backup: {backup_path}){Style.RESET_ALL}")
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error migrating ledger: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@app.command()
+def archive(
+    before: Optional[int] = typer.Option(
+        None, "--before", min=1900, help="Archive transactions dated before this year"
+    ),
+    vacuum: bool = typer.Option(True, "--vacuum/--no-vacuum", help="Compact the ledger afterwards"),
+) -> None:
+    """Move old years into per-year archive files, or list the archived years."""
+    from .archive import archive_transactions, overlapping_partitions, vacuum_database
+    from .storage import get_db
+
+    try:
+        if before is None:
+            with get_db() as db:
+                partitions = overlapping_partitions(db)
+                if not partitions:
+                    typer.echo(f"{Fore.YELLOW}No archived years.{Style.RESET_ALL}")
+                for partition in partitions:
+                    typer.echo(f"{partition.year}  {partition.rows:>9,} rows  {partition.path}")
+            return
+
+        with get_db() as db:
+            moved = archive_transactions(db, before)
+        if not moved:
+            typer.echo(f"{Fore.YELLOW}No transactions before {before}.{Style.RESET_ALL}")
+            return
+        for year, rows in moved.items():
+            typer.echo(f"{year}: archived {rows:,} transactions")
+        if vacuum:
+            vacuum_database()
+        typer.echo(f"{Fore.GREEN}Archived {sum(moved.values()):,} transactions.{Style.RESET_ALL}")
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error archiving transactions: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+@app.command()
+def serve(
+    socket_path: Optional[str] = typer.Option(
+        None, "--socket", help="Unix socket to listen on, next to the ledger by default"
+    ),
+) -> None:
+    """Run a warm daemon that serves add, list, search and report commands."""
+    from .config import SOCKET_PATH
+    from .daemon import LedgerDaemon
+
+    try:
+        daemon = LedgerDaemon(socket_path or SOCKET_PATH)
+        daemon.warm()
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error starting daemon: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+    typer.echo(f"{Fore.GREEN}Serving ledger commands on {daemon.socket_path}{Style.RESET_ALL}")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.server_close()
+
+@app.command("check-plans")
+def check_plans() -> None:
+    """Verify that filtered queries use indexes instead of table scans."""
+    from .diagnostics import explain_query_plans
+    from .storage import get_db
+
+    try:
+        with get_db() as db:
+            plans = explain_query_plans(db)
+    except Exception as e:
+        typer.echo(f"{Fore.RED}Error checking query plans: {str(e)}{Style.RESET_ALL}")
+        raise typer.Exit(1)
+
+    scans = 0
+    for plan in plans:
+        if plan.is_scan:
+            scans += 1
+            typer.echo(f"{Fore.RED}SCAN {plan.name}{Style.RESET_ALL}")
+        else:
+            typer.echo(f"{Fore.GREEN}OK   {plan.name}{Style.RESET_ALL}")
+        for step in plan.steps:
+            typer.echo(f"       {step}")
+
+    if scans:
+        typer.echo(f"{Fore.RED}{scans} of {len(plans)} queries fall back to a table scan.{Style.RESET_ALL}")
         raise typer.Exit(1)
+    typer.echo(f"{Fore.GREEN}All {len(plans)} queries use an index.{Style.RESET_ALL}")
 
 if __name__ == "__main__":
     app()
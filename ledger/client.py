@@ -0,0 +1,116 @@
+"""
+Thin `ledger` entry point that hands commands to a running daemon.
+
+When `ledger serve` is listening on the ledger's socket, served commands
+run in the warm daemon and only this module and the standard library are
+imported here. Otherwise, or with LEDGER_NO_DAEMON set, the full CLI runs
+in-process.
+
+Protocol: the client sends one JSON request line and shuts down its write
+side. The daemon answers with frames of a one-byte channel, a 4-byte
+big-endian length and the payload: ``o`` for stdout, ``e`` for stderr and
+a final ``x`` carrying the exit code.
+"""
+import json
+import os
+import shutil
+import socket
+import struct
+import sys
+from typing import BinaryIO, Dict, List, Optional
+
+from .config import SOCKET_PATH
+
+# Commands the daemon runs. Interactive prompts, file imports and exports
+# stay in-process.
+SERVED_COMMANDS = frozenset({"add", "list", "search", "summary", "report", "trends"})
+
+# Environment variables the daemon applies for the duration of a command,
+# as they would apply to the CLI running in-process
+FORWARDED_ENV = ("NO_COLOR", "LEDGER_CACHE", "LEDGER_DB_PROFILE")
+
+FRAME_HEADER = struct.Struct(">cI")
+STDOUT, STDERR, EXIT = b"o", b"e", b"x"
+
+
+class DaemonError(Exception):
+    """The daemon accepted a request but did not complete it."""
+
+
+def connect(socket_path: str = SOCKET_PATH) -> Optional[socket.socket]:
+    """Connect to the daemon, or return None if none is listening."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) < size:
+        raise DaemonError("Connection to the ledger daemon was lost")
+    return data
+
+
+def run_remote(
+    sock: socket.socket,
+    argv: List[str],
+    stdout: BinaryIO,
+    stderr: BinaryIO,
+) -> int:
+    """Run a command on the daemon, copying its output as it arrives.
+
+    Returns:
+        int: The command's exit code
+
+    Raises:
+        DaemonError: If the connection ends before the command finishes
+    """
+    request: Dict[str, object] = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "tty": sys.stdout.isatty(),
+        "columns": shutil.get_terminal_size().columns,
+        "env": {name: os.environ[name] for name in FORWARDED_ENV if name in os.environ},
+    }
+    with sock, sock.makefile("rb") as responses:
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        while True:
+            channel, size = FRAME_HEADER.unpack(_read_exact(responses, FRAME_HEADER.size))
+            payload = _read_exact(responses, size)
+            if channel == EXIT:
+                return int(payload)
+            target = stdout if channel == STDOUT else stderr
+            target.write(payload)
+            target.flush()
+
+
+def main() -> None:
+    """Console script entry point."""
+    argv = sys.argv[1:]
+    if argv and argv[0] in SERVED_COMMANDS and not os.getenv("LEDGER_NO_DAEMON"):
+        sock = connect()
+        if sock is not None:
+            try:
+                code = run_remote(sock, argv, sys.stdout.buffer, sys.stderr.buffer)
+            except DaemonError as e:
+                sys.stderr.write(f"{e}\n")
+                code = 1
+            except BrokenPipeError:
+                # Output piped into a command that exited early, e.g. head
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+                code = 0
+            sys.exit(code)
+
+    from .cli import app
+    app()
+
+
+if __name__ == "__main__":
+    main()
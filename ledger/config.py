@@ -2,7 +2,9 @@
 Configuration settings for the ledger application.
 """
 import os
+from configparser import ConfigParser
 from pathlib import Path
+from typing import Dict, Tuple, Union
 
 # Database configuration
 DB_PATH = os.getenv(
@@ -10,8 +12,141 @@ DB_PATH = os.getenv(
     str(Path.home() / ".ledger" / "ledger.db")
 )
 
-# Ensure the database directory exists
-os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-
 # Database URL
-DATABASE_URL = f"sqlite:///{DB_PATH}"
\ No newline at end of file
+DATABASE_URL = f"sqlite:///{DB_PATH}"
+
+# Rows per INSERT batch in bulk imports
+DEFAULT_BATCH_SIZE = 5000
+
+# Rows fetched per keyset page when streaming transactions
+DEFAULT_PAGE_SIZE = 500
+
+# Group commit: how long in seconds the write queue waits for more writes
+# to join a group, and the most writes it commits together
+DEFAULT_GROUP_COMMIT_WINDOW = 0.002
+DEFAULT_GROUP_COMMIT_SIZE = 256
+
+# Retries, and the first backoff in seconds, when SQLite still reports the
+# database busy after busy_timeout
+DEFAULT_BUSY_RETRIES = 5
+DEFAULT_BUSY_BACKOFF = 0.05
+
+# Unix socket of the `ledger serve` daemon for this ledger file
+SOCKET_PATH = os.getenv("LEDGER_SOCKET", DB_PATH + ".sock")
+
+# Upper bound in bytes on the report result cache of each ledger
+DEFAULT_REPORT_CACHE_SIZE = 16 * 1024 * 1024
+
+# Optional config file, e.g.
+#
+#   [database]
+#   profile = fast
+#   cache_size = -131072
+#
+#   [cache]
+#   enabled = yes
+#   max_size = 33554432
+CONFIG_PATH = os.getenv(
+    "LEDGER_CONFIG",
+    str(Path(DB_PATH).parent / "config.ini")
+)
+
+# SQLite connection settings applied through PRAGMAs on every new connection.
+# cache_size is in KiB when negative, mmap_size in bytes, busy_timeout in ms.
+PERFORMANCE_PROFILES: Dict[str, Dict[str, Union[int, str]]] = {
+    # SQLite defaults: rollback journal and an fsync on every commit
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    # WAL with fsync only at checkpoints; durable against application crashes
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # No fsync at all; a power loss can lose the most recent commits
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def load_config() -> ConfigParser:
+    """Read the optional config file."""
+    parser = ConfigParser()
+    parser.read(CONFIG_PATH)
+    return parser
+
+
+def get_sqlite_pragmas() -> Dict[str, Union[int, str]]:
+    """Resolve the SQLite PRAGMAs for the selected performance profile.
+
+    The profile comes from LEDGER_DB_PROFILE, then the ``profile`` key of
+    the ``[database]`` config section, then DEFAULT_PROFILE. Individual
+    PRAGMAs can be overridden in the same config section.
+
+    Raises:
+        ValueError: If the profile or an overridden PRAGMA is unknown
+    """
+    config = load_config()
+    section = config["database"] if config.has_section("database") else {}
+    profile = os.getenv("LEDGER_DB_PROFILE") or section.get("profile", DEFAULT_PROFILE)
+    if profile not in PERFORMANCE_PROFILES:
+        raise ValueError(
+            f"Unknown performance profile '{profile}', "
+            f"expected one of: {', '.join(PERFORMANCE_PROFILES)}"
+        )
+
+    pragmas = dict(PERFORMANCE_PROFILES[profile])
+    for name, value in section.items():
+        if name == "profile":
+            continue
+        if name not in pragmas:
+            raise ValueError(f"Unknown database setting '{name}' in {CONFIG_PATH}")
+        if value.lstrip("-").isdigit():
+            pragmas[name] = int(value)
+        elif value.isalpha():
+            pragmas[name] = value.upper()
+        else:
+            raise ValueError(f"Invalid value for '{name}' in {CONFIG_PATH}: {value}")
+    return pragmas
+
+
+def get_report_cache_settings() -> Tuple[bool, int]:
+    """Resolve whether the report cache is enabled, and its size in bytes.
+
+    LEDGER_CACHE=off disables the cache regardless of the ``[cache]``
+    config section.
+
+    Raises:
+        ValueError: If a ``[cache]`` setting is invalid
+    """
+    config = load_config()
+    try:
+        enabled = config.getboolean("cache", "enabled", fallback=True)
+        max_size = config.getint("cache", "max_size", fallback=DEFAULT_REPORT_CACHE_SIZE)
+    except ValueError as e:
+        raise ValueError(f"Invalid [cache] setting in {CONFIG_PATH}: {e}")
+    if os.getenv("LEDGER_CACHE", "").lower() in ("0", "off", "no", "false"):
+        enabled = False
+    return enabled, max_size
+
+
+def ensure_db_dir() -> None:
+    """Create the database directory if it doesn't exist."""
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
@@ -0,0 +1,238 @@
+"""
+Warm daemon that runs CLI commands in a long-lived process.
+
+`ledger serve` keeps the interpreter, imported modules, engine, category
+cache and SQLite page cache alive between commands, so a served command
+costs a socket round trip plus the query itself. Requests are handled one
+at a time, like separate CLI invocations against the same ledger, each in
+the client's directory, terminal width and forwarded environment.
+"""
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+import typer
+
+from .cache import Stamp, ledger_stamp
+from .client import EXIT, FORWARDED_ENV, FRAME_HEADER, STDERR, STDOUT, connect
+from .config import SOCKET_PATH
+
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+
+# Modules whose rich consoles are rebuilt for each client terminal
+CONSOLE_MODULES = ("ledger.analysis", "ledger.analytics")
+
+
+def _pragmas_key() -> str:
+    """The SQLite PRAGMAs the environment selects, as a dict key."""
+    from .config import get_sqlite_pragmas
+
+    return json.dumps(get_sqlite_pragmas(), sort_keys=True)
+
+
+class FrameWriter(io.TextIOBase):
+    """Text stream that forwards writes to the client as output frames."""
+
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, sock: socket.socket, channel: bytes, tty: bool):
+        self._sock = sock
+        self._channel = channel
+        self._tty = tty
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self.closed_by_client = False
+
+    encoding = "utf-8"
+
+    def isatty(self) -> bool:
+        return self._tty
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: Union[str, bytes]) -> int:
+        if self.closed_by_client:
+            raise BrokenPipeError("Client disconnected")
+        # click writes bytes when it strips colors for a non-terminal
+        data = text.encode() if isinstance(text, str) else bytes(text)
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.BUFFER_SIZE:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if not self._buffer or self.closed_by_client:
+            return
+        payload = b"".join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        try:
+            self._sock.sendall(FRAME_HEADER.pack(self._channel, len(payload)) + payload)
+        except OSError:
+            self.closed_by_client = True
+            raise BrokenPipeError("Client disconnected")
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        except BrokenPipeError:
+            pass
+        super().close()
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    """Run one CLI command per connection."""
+
+    server: "LedgerDaemon"
+
+    def handle(self) -> None:
+        request = json.loads(self.rfile.readline())
+        tty = bool(request.get("tty"))
+        stdout = FrameWriter(self.connection, STDOUT, tty)
+        stderr = FrameWriter(self.connection, STDERR, tty)
+        code = self.server.run_command(request, stdout, stderr)
+        try:
+            stdout.flush()
+            stderr.flush()
+            payload = str(code).encode()
+            self.connection.sendall(FRAME_HEADER.pack(EXIT, len(payload)) + payload)
+        except OSError:
+            pass
+
+
+class LedgerDaemon(socketserver.UnixStreamServer):
+    """Serves CLI commands for one ledger over a Unix domain socket."""
+
+    def __init__(self, socket_path: str = SOCKET_PATH):
+        existing = connect(socket_path)
+        if existing is not None:
+            existing.close()
+            raise RuntimeError(f"A ledger daemon is already listening on {socket_path}")
+        if os.path.exists(socket_path):
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(socket_path)
+
+        from .cli import app
+        from .storage import get_engine
+        self.command = typer.main.get_command(app)
+        self.socket_path = socket_path
+        self.stamp: Optional[Stamp] = None
+        # Engines by the PRAGMAs they apply; the daemon's own serves its profile
+        self.engines: Dict[str, "Engine"] = {_pragmas_key(): get_engine()}
+        # Created owner-only, so there is no moment another user could connect
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, CommandHandler)
+        finally:
+            os.umask(umask)
+
+    def warm(self) -> None:
+        """Import the report modules, open the engine and load the category cache."""
+        from . import analysis  # noqa: F401
+        from .storage import category_cache, get_db
+
+        with get_db() as db:
+            category_cache.names(db)
+            self.stamp = ledger_stamp(db)
+
+    def _use_engine(self) -> Optional["Engine"]:
+        """Switch to an engine for the performance profile the environment
+        selects, returning the engine it replaces."""
+        from .storage import create_ledger_engine, set_engine
+
+        key = _pragmas_key()
+        if key not in self.engines:
+            self.engines[key] = create_ledger_engine(pragmas=json.loads(key))
+        return set_engine(self.engines[key])
+
+    def _check_ledger(self) -> None:
+        """Drop process caches if another process wrote to the ledger."""
+        from .storage import category_cache, get_db
+
+        with get_db() as db:
+            stamp = ledger_stamp(db)
+        if stamp is None or stamp != self.stamp:
+            category_cache.invalidate()
+
+    def _remember_ledger(self) -> None:
+        from .storage import get_db
+
+        with get_db() as db:
+            self.stamp = ledger_stamp(db)
+
+    def _invoke(self, argv: List[str]) -> int:
+        # Standalone mode reports usage errors and aborts exactly like the
+        # CLI does, and ends every command with SystemExit
+        try:
+            self.command.main(args=argv, prog_name="ledger", standalone_mode=True)
+        except SystemExit as e:
+            if e.code is None:
+                return 0
+            return e.code if isinstance(e.code, int) else 1
+        return 0
+
+    def run_command(self, request: Dict[str, Any], stdout: FrameWriter, stderr: FrameWriter) -> int:
+        """Run a CLI command in the client's directory, terminal width and
+        forwarded environment.
+
+        Returns:
+            int: The command's exit code
+        """
+        from rich.console import Console
+
+        from .storage import set_engine
+
+        cwd = os.getcwd()
+        saved = {name: os.environ.get(name) for name in ("COLUMNS",) + FORWARDED_ENV}
+        forwarded = request.get("env", {})
+        engine: Optional["Engine"] = None
+        try:
+            os.chdir(request["cwd"])
+            os.environ["COLUMNS"] = str(request.get("columns", 80))
+            for name in FORWARDED_ENV:
+                if name in forwarded:
+                    os.environ[name] = str(forwarded[name])
+                else:
+                    os.environ.pop(name, None)
+            engine = self._use_engine()
+            self._check_ledger()
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                console = Console()
+                for name in CONSOLE_MODULES:
+                    if name in sys.modules:
+                        setattr(sys.modules[name], "console", console)
+                return self._invoke(request["argv"])
+        except BrokenPipeError:
+            return 1
+        except Exception:
+            try:
+                stderr.write(traceback.format_exc())
+            except BrokenPipeError:
+                pass
+            return 1
+        finally:
+            os.chdir(cwd)
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+            self._remember_ledger()
+            if engine is not None:
+                set_engine(engine)
+
+    def server_close(self) -> None:
+        super().server_close()
+        for engine in self.engines.values():
+            engine.dispose()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
@@ -0,0 +1,196 @@
+"""
+Transaction fingerprints and duplicate merging.
+
+A fingerprint hashes the fields that identify a statement line: account,
+day, amount in cents and the description with case and spacing
+normalized. It is stored in the indexed ``transactions.fingerprint``
+column, so imports can skip lines already in the ledger and `ledger
+dedupe` can find duplicates with one pass over the index.
+"""
+import hashlib
+from datetime import datetime
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from .archive import archive_scope
+from .models import Transaction
+from .rollups import RollupRow, apply_rollup_deltas
+
+# Ids or fingerprints bound per IN (...) statement
+IN_BATCH_SIZE = 500
+
+
+def normalize_description(description: str) -> str:
+    """Case-fold and collapse whitespace."""
+    return " ".join(description.casefold().split())
+
+
+def transaction_fingerprint(
+    account_id: int, date: datetime, amount_cents: int, description: str
+) -> str:
+    """16 hex digit hash of the fields that identify a transaction."""
+    key = f"{account_id}|{date:%Y-%m-%d}|{amount_cents}|{normalize_description(description)}"
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+def existing_fingerprints(
+    db: Session,
+    fingerprints: Set[str],
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """How many transactions already have each of the fingerprints.
+
+    Archived years between the dates are searched too, so statements
+    covering them are not imported again.
+    """
+    counts: Dict[str, int] = {}
+    ordered = sorted(fingerprints)
+    with archive_scope(db, start_date, end_date):
+        for start in range(0, len(ordered), IN_BATCH_SIZE):
+            chunk = ordered[start:start + IN_BATCH_SIZE]
+            rows = db.execute(
+                select(Transaction.fingerprint, func.count())
+                .where(Transaction.fingerprint.in_(chunk))
+                .group_by(Transaction.fingerprint)
+            )
+            counts.update(
+                (fingerprint, count) for fingerprint, count in rows if fingerprint is not None
+            )
+    return counts
+
+
+class DuplicateFilter:
+    """Drops rows already in the ledger from a stream of new transactions.
+
+    Matching counts occurrences: a statement with the same purchase twice
+    against a ledger holding it once still adds the second one. Ledger
+    counts are looked up once per fingerprint, through the index.
+    """
+
+    def __init__(self) -> None:
+        self._unmatched: Dict[str, int] = {}
+        self.skipped = 0
+
+    def new_rows(self, db: Session, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The rows, which must carry a ``fingerprint``, that are not duplicates."""
+        unknown = {row["fingerprint"] for row in rows} - self._unmatched.keys()
+        if unknown:
+            dates = [row["date"] for row in rows if row["fingerprint"] in unknown]
+            counts = existing_fingerprints(db, unknown, min(dates), max(dates))
+            for fingerprint in unknown:
+                self._unmatched[fingerprint] = counts.get(fingerprint, 0)
+
+        kept = []
+        for row in rows:
+            if self._unmatched[row["fingerprint"]] > 0:
+                self._unmatched[row["fingerprint"]] -= 1
+                self.skipped += 1
+            else:
+                kept.append(row)
+        return kept
+
+
+class DuplicateGroup(NamedTuple):
+    """Transactions with the same fingerprint; the oldest one is kept."""
+    keep: int
+    duplicates: List[int]
+    date: datetime
+    description: str
+    amount_cents: int
+
+
+def find_duplicates(db: Session) -> Iterator[DuplicateGroup]:
+    """Groups of duplicate transactions, found by grouping the fingerprint
+    index."""
+    repeated = (
+        select(Transaction.fingerprint)
+        .group_by(Transaction.fingerprint)
+        .having(func.count() > 1)
+    )
+    rows = db.execute(
+        select(
+            Transaction.id, Transaction.fingerprint, Transaction.account_id,
+            Transaction.date, Transaction.amount_cents, Transaction.description,
+        )
+        .where(Transaction.fingerprint.in_(repeated))
+        .order_by(Transaction.fingerprint, Transaction.id)
+    )
+    for _, same_hash in groupby(rows, key=lambda row: row.fingerprint):
+        # Compare the fields themselves, in case two keys share a hash
+        for _, group in groupby(sorted(same_hash, key=_identity), key=_identity):
+            members = sorted(group, key=lambda row: row.id)
+            if len(members) > 1:
+                first = members[0]
+                yield DuplicateGroup(
+                    first.id, [row.id for row in members[1:]],
+                    first.date, first.description, first.amount_cents,
+                )
+
+
+def _identity(row: Any) -> Tuple[Any, ...]:
+    return (
+        row.account_id, row.date.date(), row.amount_cents, normalize_description(row.description)
+    )
+
+
+def merge_duplicates(db: Session, groups: Iterable[DuplicateGroup]) -> int:
+    """Delete every duplicate, keeping the oldest transaction of each group.
+
+    A kept transaction without a category takes the category of its first
+    categorized duplicate. Rollups and checkpoints are updated to match.
+
+    Returns:
+        int: Number of transactions deleted
+    """
+    groups = list(groups)
+    ids = [i for group in groups for i in [group.keep, *group.duplicates]]
+    rows = {}
+    for start in range(0, len(ids), IN_BATCH_SIZE):
+        for row in db.execute(
+            select(
+                Transaction.id, Transaction.account_id, Transaction.category_id,
+                Transaction.date, Transaction.amount_cents,
+            ).where(Transaction.id.in_(ids[start:start + IN_BATCH_SIZE]))
+        ):
+            rows[row.id] = row
+
+    removed: List[RollupRow] = []
+    added: List[RollupRow] = []
+    doomed: List[int] = []
+    adopted: List[Dict[str, int]] = []
+    for group in groups:
+        keeper = rows[group.keep]
+        duplicates = [rows[i] for i in group.duplicates]
+        doomed.extend(group.duplicates)
+        removed.extend(
+            (row.account_id, row.category_id, row.date, row.amount_cents) for row in duplicates
+        )
+        if keeper.category_id is not None:
+            continue
+        category_id = next(
+            (row.category_id for row in duplicates if row.category_id is not None), None
+        )
+        if category_id is None:
+            continue
+        removed.append((keeper.account_id, None, keeper.date, keeper.amount_cents))
+        added.append((keeper.account_id, category_id, keeper.date, keeper.amount_cents))
+        adopted.append({"t_id": keeper.id, "c_id": category_id})
+
+    if adopted:
+        db.execute(
+            update(Transaction.__table__)
+            .where(Transaction.__table__.c.id == bindparam("t_id"))
+            .values(category_id=bindparam("c_id")),
+            adopted,
+        )
+    apply_rollup_deltas(db, removed, sign=-1)
+    apply_rollup_deltas(db, added)
+    for start in range(0, len(doomed), IN_BATCH_SIZE):
+        db.execute(delete(Transaction).where(
+            Transaction.id.in_(doomed[start:start + IN_BATCH_SIZE])
+        ))
+    return len(doomed)
@@ -0,0 +1,79 @@
+"""
+Diagnostics for checking that ledger queries are served by indexes.
+"""
+from datetime import datetime
+from itertools import combinations
+from typing import Any, Dict, List, NamedTuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models import Transaction
+from .storage import AnySelect, filter_transactions
+
+# Representative values; the plan does not depend on the actual values
+SAMPLE_FILTERS: Dict[str, Any] = {
+    "start_date": datetime(2000, 1, 1),
+    "end_date": datetime(2000, 12, 31),
+    "category": "Food",
+    "account_id": 1,
+}
+
+
+class QueryPlan(NamedTuple):
+    """The query plan for one filter combination."""
+    name: str
+    steps: List[str]
+
+    @property
+    def is_scan(self) -> bool:
+        """True if any step walks the whole transactions table or index."""
+        return any(step.startswith("SCAN transactions") for step in self.steps)
+
+
+def explain(db: Session, query: AnySelect) -> List[str]:
+    """Return the EXPLAIN QUERY PLAN detail lines for a select statement."""
+    compiled = query.compile(dialect=db.get_bind().dialect)
+    params = []
+    for name in compiled.positiontup or ():
+        value = compiled.params[name]
+        if isinstance(value, datetime):
+            value = value.isoformat(" ")
+        params.append(value)
+
+    rows = db.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {compiled}", tuple(params)
+    )
+    return [row[-1] for row in rows]
+
+
+def _filter_combinations(names: List[str]) -> List[Dict[str, Any]]:
+    """All non-empty combinations of the given filter names."""
+    return [
+        {name: SAMPLE_FILTERS[name] for name in combo}
+        for size in range(1, len(names) + 1)
+        for combo in combinations(names, size)
+    ]
+
+
+def explain_query_plans(db: Session) -> List[QueryPlan]:
+    """Explain every supported filter combination of the hot read paths.
+
+    Covers ``storage.get_transactions`` with each combination of date range,
+    category and account filters, and the ``SUM`` in
+    ``analysis.get_account_balance``. Unfiltered queries are left out since
+    they read every row by definition.
+    """
+    plans = []
+
+    for filters in _filter_combinations(list(SAMPLE_FILTERS)):
+        query = filter_transactions(select(Transaction), **filters)
+        name = "get_transactions(" + ", ".join(filters) + ")"
+        plans.append(QueryPlan(name, explain(db, query)))
+
+    for filters in _filter_combinations(["end_date", "account_id"]):
+        query = filter_transactions(select(func.sum(Transaction.amount_cents)), **filters)
+        name = "get_account_balance(" + ", ".join(filters) + ")"
+        plans.append(QueryPlan(name, explain(db, query)))
+
+    return plans
@@ -0,0 +1,224 @@
+"""
+Streaming export of transactions to CSV, JSONL and Parquet.
+
+Rows are fetched from the database in chunks and written out as they
+arrive, so memory use stays flat regardless of ledger size.
+"""
+import csv
+import gzip
+import io
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Generator, Iterator, Optional, Sequence, cast
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .archive import archive_scope
+from .models import BankAccount, Category, Transaction
+from .money import from_cents
+from .storage import AnySelect, filter_transactions
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+COMPRESSIONS = ("gzip", "zstd")
+
+EXPORT_COLUMNS = [
+    "id", "date", "description", "amount", "category",
+    "account_id", "account_name", "account_type",
+]
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Rows of export_query(), as fetched together
+Chunk = Sequence[Sequence[Any]]
+
+
+def export_query(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    account_id: Optional[int] = None,
+) -> AnySelect:
+    """Transactions joined with their category and bank account, in
+    (date, id) order."""
+    query = select(
+        Transaction.id,
+        Transaction.date,
+        Transaction.description,
+        Transaction.amount_cents,
+        Category.name,
+        Transaction.account_id,
+        BankAccount.name,
+        BankAccount.account_type,
+    ).join(BankAccount, Transaction.account_id == BankAccount.id).outerjoin(
+        Category, Transaction.category_id == Category.id
+    )
+    query = filter_transactions(query, start_date, end_date, category, account_id)
+    return query.order_by(Transaction.date, Transaction.id)
+
+
+def iter_chunks(db: Session, query: AnySelect, chunk_size: int) -> Iterator[Chunk]:
+    """Fetch query results in chunks from a streaming cursor."""
+    result = db.execute(query.execution_options(stream_results=True, yield_per=chunk_size))
+    yield from result.partitions()
+
+
+@contextmanager
+def open_output(
+    path: Optional[Path],
+    compression: Optional[str] = None,
+) -> Generator[BinaryIO, None, None]:
+    """Open a binary output stream, optionally compressed.
+
+    Writes to stdout when no path is given.
+
+    Raises:
+        ValueError: If the compression is unknown or its library is missing
+    """
+    raw = open(path, "wb") if path else sys.stdout.buffer
+    try:
+        if compression is None:
+            yield raw
+        elif compression == "gzip":
+            with gzip.GzipFile(fileobj=raw, mode="wb") as stream:
+                yield cast(BinaryIO, stream)
+        elif compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("zstd compression requires the 'zstandard' package")
+            with zstandard.ZstdCompressor().stream_writer(raw, closefd=False) as stream:
+                yield stream
+        else:
+            raise ValueError(f"Unknown compression '{compression}'")
+    finally:
+        if path:
+            raw.close()
+        else:
+            raw.flush()
+
+
+def write_csv(chunks: Iterator[Chunk], stream: BinaryIO) -> int:
+    """Write chunks of export rows as CSV with a header."""
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for chunk in chunks:
+        writer.writerows(
+            (id, date.strftime("%Y-%m-%d"), description, from_cents(amount), category or "",
+             account_id, account_name, account_type)
+            for id, date, description, amount, category, account_id, account_name, account_type
+            in chunk
+        )
+        count += len(chunk)
+    text.detach()
+    return count
+
+
+def write_jsonl(chunks: Iterator[Chunk], stream: BinaryIO) -> int:
+    """Write chunks of export rows as one JSON object per line.
+
+    Amounts are decimal strings, as in the CSV export, since a JSON number
+    would be read back as a binary float.
+    """
+    count = 0
+    for chunk in chunks:
+        lines = []
+        for id, date, description, amount, category, account_id, account_name, account_type in chunk:
+            lines.append(json.dumps({
+                "id": id,
+                "date": date.strftime("%Y-%m-%d"),
+                "description": description,
+                "amount": str(from_cents(amount)),
+                "category": category,
+                "account_id": account_id,
+                "account_name": account_name,
+                "account_type": account_type,
+            }))
+        lines.append("")
+        stream.write("\n".join(lines).encode("utf-8"))
+        count += len(chunk)
+    return count
+
+
+def write_parquet(
+    chunks: Iterator[Chunk],
+    path: Path,
+    compression: Optional[str] = None,
+) -> int:
+    """Write chunks of export rows as row groups of a Parquet file.
+
+    Raises:
+        ValueError: If pyarrow is not installed
+    """
+    import pandas as pd
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export requires the 'pyarrow' package")
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.timestamp("us")),
+        ("description", pa.string()),
+        ("amount", pa.decimal128(12, 2)),
+        ("category", pa.string()),
+        ("account_id", pa.int64()),
+        ("account_name", pa.string()),
+        ("account_type", pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema, compression=compression or "snappy") as writer:
+        for chunk in chunks:
+            frame = pd.DataFrame.from_records(chunk, columns=EXPORT_COLUMNS)
+            frame["amount"] = frame["amount"].map(from_cents)
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            count += len(chunk)
+    return count
+
+
+def export_transactions(
+    db: Session,
+    fmt: str,
+    output: Optional[Path] = None,
+    compression: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    account_id: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Stream filtered transactions to a file or stdout.
+
+    Parquet output applies the compression codec inside the file and needs
+    an output path; CSV and JSONL are wrapped in a gzip or zstd stream.
+
+    Returns:
+        int: Number of transactions exported
+
+    Raises:
+        ValueError: If the format or compression is unsupported
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of: {', '.join(EXPORT_FORMATS)}")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(
+            f"Unknown compression '{compression}', expected one of: {', '.join(COMPRESSIONS)}"
+        )
+
+    query = export_query(start_date, end_date, category, account_id)
+    with archive_scope(db, start_date, end_date):
+        chunks = iter_chunks(db, query, chunk_size)
+        if fmt == "parquet":
+            if output is None:
+                raise ValueError("Parquet export needs an --output file")
+            return write_parquet(chunks, output, compression)
+
+        writer = write_csv if fmt == "csv" else write_jsonl
+        with open_output(output, compression) as stream:
+            return writer(chunks, stream)
@@ -0,0 +1,240 @@
+"""
+Streaming parsers for bank statement files (CSV, OFX and QIF).
+
+Each parser yields one dict per transaction with ``date``, ``description``,
+``amount`` and ``category`` keys, ready for ``storage.bulk_insert_transactions``.
+Files are read incrementally so memory use does not grow with file size.
+"""
+import csv
+import html
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, TextIO, Tuple
+
+SUPPORTED_FORMATS = ("csv", "ofx", "qif")
+
+# Header aliases accepted for each field in CSV statements
+CSV_COLUMNS = {
+    "date": ("date", "posted", "transaction date", "posting date"),
+    "description": ("description", "payee", "name", "memo"),
+    "amount": ("amount", "value"),
+    "category": ("category",),
+}
+
+# An opening or closing tag and the text up to the next tag
+OFX_TOKEN = re.compile(r"<(/?)(\w+)>([^<]*)")
+
+# Characters read at a time from OFX files, which may be a single line
+OFX_CHUNK_SIZE = 64 * 1024
+
+
+class StatementParseError(ValueError):
+    """Raised when a statement file cannot be parsed."""
+
+
+def _parse_amount(value: str, location: str) -> Decimal:
+    """Parse an amount, tolerating thousands separators and currency signs."""
+    cleaned = value.strip().replace(",", "").replace("$", "")
+    if cleaned.startswith("(") and cleaned.endswith(")"):
+        cleaned = "-" + cleaned[1:-1]
+    try:
+        return Decimal(cleaned)
+    except InvalidOperation:
+        raise StatementParseError(f"{location}: invalid amount {value!r}")
+
+
+def parse_csv(path: Path, date_format: str = "%Y-%m-%d") -> Iterator[Dict[str, Any]]:
+    """Stream transactions from a CSV file with a header row."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        normalized = [h.strip().lower() for h in header]
+        positions: Dict[str, int] = {}
+        for field, aliases in CSV_COLUMNS.items():
+            for alias in aliases:
+                if alias in normalized:
+                    positions[field] = normalized.index(alias)
+                    break
+
+        missing = {"date", "description", "amount"} - positions.keys()
+        if missing:
+            raise StatementParseError(
+                f"{path}: missing required column(s): {', '.join(sorted(missing))}"
+            )
+
+        # Statements repeat a small set of dates, so memoize the slow strptime
+        parse_date = lru_cache(maxsize=4096)(
+            lambda value: datetime.strptime(value, date_format)
+        )
+        date_pos = positions["date"]
+        desc_pos = positions["description"]
+        amount_pos = positions["amount"]
+        category_pos = positions.get("category")
+        required = max(date_pos, desc_pos, amount_pos) + 1
+
+        for line_no, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            location = f"{path}:{line_no}"
+            if len(row) < required:
+                raise StatementParseError(
+                    f"{location}: row has {len(row)} column(s), expected at least {required}"
+                )
+            try:
+                date = parse_date(row[date_pos].strip())
+            except ValueError:
+                raise StatementParseError(f"{location}: invalid date")
+            category = ""
+            if category_pos is not None and category_pos < len(row):
+                category = row[category_pos].strip()
+            yield {
+                "date": date,
+                "description": row[desc_pos].strip(),
+                "amount": _parse_amount(row[amount_pos], location),
+                "category": category or None,
+            }
+
+
+def _parse_ofx_date(value: str, location: str) -> datetime:
+    """Parse an OFX date such as ``20240131`` or ``20240131120000[-5:EST]``."""
+    try:
+        return datetime.strptime(value.strip()[:8], "%Y%m%d")
+    except ValueError:
+        raise StatementParseError(f"{location}: invalid date {value!r}")
+
+
+def _ofx_tokens(f: TextIO) -> Iterator[Tuple[int, bool, str, str]]:
+    """Yield (line number, closing, tag, text) for each tag in an OFX stream.
+
+    Tags are found across the whole stream, not per line, since many
+    banks write the entire statement on one line.
+    """
+    buffer = ""
+    line_no = 1
+    while True:
+        chunk = f.read(OFX_CHUNK_SIZE)
+        buffer += chunk
+        # The text after the last tag may continue in the next chunk
+        end = buffer.rfind("<") if chunk else len(buffer)
+        if end > 0:
+            position = 0
+            for found in OFX_TOKEN.finditer(buffer, 0, end):
+                line_no += buffer.count("\n", position, found.start())
+                position = found.start()
+                yield line_no, found.group(1) == "/", found.group(2).upper(), found.group(3)
+            line_no += buffer.count("\n", position, end)
+            buffer = buffer[end:]
+        if not chunk:
+            return
+
+
+def parse_ofx(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream transactions from an OFX (SGML or XML) file."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        record: Optional[Dict[str, str]] = None
+        for line_no, closing, tag, text in _ofx_tokens(f):
+            if tag != "STMTTRN":
+                value = html.unescape(text.strip())
+                if record is not None and not closing and value:
+                    record.setdefault(tag, value)
+                continue
+            if not closing:
+                record = {}
+                continue
+            if record is None:
+                continue
+
+            location = f"{path}:{line_no}"
+            if "DTPOSTED" not in record or "TRNAMT" not in record:
+                raise StatementParseError(f"{location}: incomplete transaction")
+            yield {
+                "date": _parse_ofx_date(record["DTPOSTED"], location),
+                "description": record.get("NAME") or record.get("MEMO", ""),
+                "amount": _parse_amount(record["TRNAMT"], location),
+                "category": None,
+            }
+            record = None
+
+
+def _parse_qif_date(value: str, location: str) -> datetime:
+    """Parse a QIF date such as ``1/31/2024``, ``01/31'24`` or ``2024-01-31``."""
+    value = value.strip().replace("'", "/").replace("-", "/")
+    parts = [p.strip() for p in value.split("/")]
+    try:
+        if len(parts[0]) == 4:
+            year, month, day = (int(p) for p in parts)
+        else:
+            month, day, year = (int(p) for p in parts)
+        if year < 100:
+            year += 2000
+        return datetime(year, month, day)
+    except ValueError:
+        raise StatementParseError(f"{location}: invalid date {value!r}")
+
+
+def _qif_transaction(record: Dict[str, str], location: str) -> Dict[str, Any]:
+    amount = record.get("T") or record.get("U")
+    if "D" not in record or not amount:
+        raise StatementParseError(f"{location}: incomplete transaction")
+    return {
+        "date": _parse_qif_date(record["D"], location),
+        "description": record.get("P") or record.get("M", ""),
+        "amount": _parse_amount(amount, location),
+        "category": record.get("L") or None,
+    }
+
+
+def parse_qif(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream transactions from a QIF file.
+
+    A last record without its closing ``^`` line still counts.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        record: Dict[str, str] = {}
+        line_no = 0
+        for line_no, line in enumerate(f, start=1):
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("!"):
+                continue
+
+            code, value = line[0], line[1:]
+            if code != "^":
+                record.setdefault(code, value)
+                continue
+
+            yield _qif_transaction(record, f"{path}:{line_no}")
+            record = {}
+        if record:
+            yield _qif_transaction(record, f"{path}:{line_no}")
+
+
+def detect_format(path: Path) -> str:
+    """Guess the statement format from the file extension."""
+    fmt = path.suffix.lower().lstrip(".")
+    if fmt not in SUPPORTED_FORMATS:
+        raise StatementParseError(
+            f"{path}: cannot detect format, use one of {', '.join(SUPPORTED_FORMATS)}"
+        )
+    return fmt
+
+
+def parse_statement(
+    path: Path,
+    fmt: Optional[str] = None,
+    date_format: str = "%Y-%m-%d",
+) -> Iterator[Dict[str, Any]]:
+    """Stream transactions from a statement file in any supported format."""
+    fmt = (fmt or detect_format(path)).lower()
+    if fmt == "csv":
+        return parse_csv(path, date_format)
+    if fmt == "ofx":
+        return parse_ofx(path)
+    if fmt == "qif":
+        return parse_qif(path)
+    raise StatementParseError(f"Unsupported format: {fmt}")
@@ -0,0 +1,256 @@
+"""
+Batched data migrations that can be interrupted and resumed.
+
+A data step rewrites a table in batches of consecutive ids. Each batch is
+its own short write transaction, which also records in
+``migration_checkpoints`` the last id the step has done, so other ledger
+commands can read and write between batches. A step that was interrupted
+continues after its last committed batch when the migration runs again,
+and a step that finished is skipped.
+
+Revisions call batched_upgrade() from upgrade(). Rows added while a step
+runs are migrated if their id is above the checkpoint; code writing new
+rows must already produce the migrated form, as for any online change.
+A change SQLite cannot ALTER a table into, like dropping a column or
+making one NOT NULL, rebuilds the table with batched_copy() instead.
+
+Batch size and the pause between batches are set with ``alembic -x
+batch_size=N -x pause=SECONDS upgrade head`` or the --batch-size and
+--pause options of `ledger migrate`. A pause of 0 is fastest when nothing
+else uses the ledger.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select, text
+from sqlalchemy.engine import Connection
+
+from .models import bump_ledger_version, driver_connection
+from .storage import retry_busy
+
+logger = logging.getLogger(__name__)
+
+# Rows rewritten per transaction by a data step
+DEFAULT_MIGRATION_BATCH_SIZE = 5000
+
+# Seconds between batches, in which commands waiting to write get the lock
+DEFAULT_MIGRATION_PAUSE = 0.02
+
+# Seconds between progress reports of a running step
+PROGRESS_INTERVAL = 2.0
+
+# Kept out of the models' metadata: the table belongs to the migration
+# machinery, like alembic_version, and exists only while steps are pending
+checkpoint_metadata = MetaData()
+
+migration_checkpoints = Table(
+    "migration_checkpoints",
+    checkpoint_metadata,
+    Column("step", String(100), primary_key=True),
+    Column("last_id", Integer, nullable=False),
+    Column("rows_done", Integer, nullable=False),
+    Column("started_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+    Column("finished_at", DateTime),
+)
+
+# Rewrites the rows of a table with first_id <= id <= last_id
+BatchRewrite = Callable[[Connection, int, int], None]
+
+
+class MigrationProgress(NamedTuple):
+    """How far a data step has got."""
+    step: str
+    rows_done: int
+    rows_total: int
+    # Rows done by earlier, interrupted runs
+    resumed_rows: int
+    elapsed: float
+
+    @property
+    def finished(self) -> bool:
+        return self.rows_done >= self.rows_total
+
+    @property
+    def rows_per_second(self) -> float:
+        return (self.rows_done - self.resumed_rows) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left at the current rate, if there is one yet."""
+        if self.finished:
+            return 0.0
+        rate = self.rows_per_second
+        return (self.rows_total - self.rows_done) / rate if rate else None
+
+
+def log_progress(progress: MigrationProgress) -> None:
+    """Report progress through the migration log."""
+    eta = "?" if progress.eta is None else f"{progress.eta:.0f}s"
+    logger.info(
+        "%s: %d/%d rows, %.0f rows/s, ETA %s",
+        progress.step, progress.rows_done, progress.rows_total, progress.rows_per_second, eta,
+    )
+
+
+def _commit(connection: Connection) -> None:
+    # The connection is usually Alembic's, inside its per-revision
+    # transaction; committing on the driver ends SQLite's transaction
+    # without ending Alembic's, which commits nothing more when it closes
+    driver = driver_connection(connection)
+    if driver.in_transaction:
+        bump_ledger_version(connection)
+        driver.commit()
+
+
+def run_batched(
+    connection: Connection,
+    step: str,
+    table: str,
+    rewrite: BatchRewrite,
+    batch_size: int = DEFAULT_MIGRATION_BATCH_SIZE,
+    pause: float = DEFAULT_MIGRATION_PAUSE,
+    progress: Optional[Callable[[MigrationProgress], None]] = None,
+) -> MigrationProgress:
+    """Rewrite a table batch by batch, committing after each batch.
+
+    Batches hold ``batch_size`` rows, by id order, so gaps in the ids do
+    not shrink them. Work done on the connection before the step is
+    committed first, since each batch is a transaction of its own.
+
+    Args:
+        step: Checkpoint name, unique across revisions, e.g. "<revision>:<what>"
+        table: Table with an integer ``id`` primary key
+        rewrite: Called with the connection and the first and last id of
+            each batch, inside the batch's transaction
+        progress: Called every PROGRESS_INTERVAL seconds and at the end
+    """
+    checkpoints = migration_checkpoints
+    checkpoint_metadata.create_all(connection, checkfirst=True)
+    _commit(connection)
+
+    started = time.perf_counter()
+    saved = connection.execute(
+        select(checkpoints.c.last_id, checkpoints.c.rows_done, checkpoints.c.finished_at)
+        .where(checkpoints.c.step == step)
+    ).first()
+    if saved is not None and saved.finished_at is not None:
+        logger.info("%s: already done", step)
+        return MigrationProgress(step, saved.rows_done, saved.rows_done, saved.rows_done, 0.0)
+
+    last_id, rows_done = (saved.last_id, saved.rows_done) if saved is not None else (0, 0)
+    resumed_rows = rows_done
+    if saved is None:
+        now = datetime.now()
+        connection.execute(checkpoints.insert().values(
+            step=step, last_id=0, rows_done=0, started_at=now, updated_at=now,
+        ))
+    elif rows_done:
+        logger.info("%s: resuming after id %d, %d rows already done", step, last_id, rows_done)
+    rows_total = rows_done + connection.execute(
+        text(f"SELECT count(*) FROM {table} WHERE id > :last_id"), {"last_id": last_id}
+    ).scalar_one()
+    _commit(connection)
+
+    next_ids = text(f"SELECT id FROM {table} WHERE id > :last_id ORDER BY id LIMIT :limit")
+    reported = started
+    while True:
+        retry_busy(lambda: connection.exec_driver_sql("BEGIN IMMEDIATE"))
+        ids = connection.execute(next_ids, {"last_id": last_id, "limit": batch_size}).scalars().all()
+        if ids:
+            rewrite(connection, ids[0], ids[-1])
+            last_id = ids[-1]
+            rows_done += len(ids)
+            # Rows inserted since the count are migrated too
+            rows_total = max(rows_total, rows_done)
+        now = datetime.now()
+        connection.execute(
+            checkpoints.update()
+            .where(checkpoints.c.step == step)
+            .values(
+                last_id=last_id, rows_done=rows_done, updated_at=now,
+                finished_at=None if ids else now,
+            )
+        )
+        _commit(connection)
+
+        state = MigrationProgress(
+            step, rows_done, rows_total if ids else rows_done, resumed_rows,
+            time.perf_counter() - started,
+        )
+        if not ids:
+            break
+        # SQLite's busy handler polls, so a writer waiting on the lock
+        # would rarely catch it free if the next batch took it straight away
+        time.sleep(pause)
+        if progress and time.perf_counter() - reported >= PROGRESS_INTERVAL:
+            reported = time.perf_counter()
+            progress(state)
+
+    if progress:
+        progress(state)
+    return state
+
+
+def batched_upgrade(step: str, table: str, rewrite: BatchRewrite) -> MigrationProgress:
+    """run_batched() on the connection of the running Alembic migration,
+    with the batch size, pause and progress reporting env.py configured."""
+    from alembic import context, op
+
+    attributes = context.config.attributes
+    return run_batched(
+        op.get_bind(), step, table, rewrite,
+        batch_size=attributes.get("batch_size", DEFAULT_MIGRATION_BATCH_SIZE),
+        pause=attributes.get("pause", DEFAULT_MIGRATION_PAUSE),
+        progress=attributes.get("progress", log_progress),
+    )
+
+
+def clear_finished_steps(connection: Connection) -> None:
+    """Forget the checkpoints of finished steps once their revisions are
+    recorded, so that a downgrade and upgrade runs them again."""
+    if not connection.dialect.has_table(connection, migration_checkpoints.name):
+        return
+    connection.execute(
+        migration_checkpoints.delete().where(migration_checkpoints.c.finished_at.isnot(None))
+    )
+    if connection.execute(select(func.count()).select_from(migration_checkpoints)).scalar_one() == 0:
+        migration_checkpoints.drop(connection)
+    _commit(connection)
+
+
+def batched_copy(
+    step: str, source: str, target: str, columns: Sequence[str], select: str
+) -> MigrationProgress:
+    """batched_upgrade() that copies the rows of ``source`` into ``target``,
+    to rebuild a table with a schema SQLite cannot ALTER it to.
+
+    ``select`` is the SELECT list producing ``columns`` from a row of
+    ``source``, which it names ``s``. Rows added to ``source`` since the
+    last batch are copied in a write transaction that is left open, so
+    the revision replaces ``source`` with ``target`` and is recorded in
+    that same transaction. Rows changed or deleted after their batch was
+    copied are not carried over.
+    """
+    from alembic import op
+
+    copy_rows = text(
+        f"INSERT INTO {target} ({', '.join(columns)})"
+        f" SELECT {select} FROM {source} AS s WHERE s.id BETWEEN :first_id AND :last_id"
+    )
+
+    def copy(connection: Connection, first_id: int, last_id: int) -> None:
+        connection.execute(copy_rows, {"first_id": first_id, "last_id": last_id})
+
+    state = batched_upgrade(step, source, copy)
+    connection = op.get_bind()
+    retry_busy(lambda: connection.exec_driver_sql("BEGIN IMMEDIATE"))
+    copied, newest = (
+        connection.execute(text(f"SELECT coalesce(max(id), 0) FROM {table}")).scalar_one()
+        for table in (target, source)
+    )
+    if newest > copied:
+        copy(connection, copied + 1, newest)
+    return state
@@ -1,16 +1,28 @@
 """
 Database models for the ledger application.
 """
+import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, List
+from typing import ClassVar, Dict, Iterator, Optional, List, cast
 
-from sqlalchemy import String, Numeric, DateTime, Text, ForeignKey
+from sqlalchemy import (
+    DDL, BigInteger, Connection, String, DateTime, Table, Text, ForeignKey, Index, event, text
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
+from .money import from_cents
+
 
 class Base(DeclarativeBase):
-    pass
+    # Every model is mapped to a Table, which Core statements are built on
+    __table__: ClassVar[Table]
+
+
+def driver_connection(conn: Connection) -> sqlite3.Connection:
+    """The pysqlite connection under a SQLAlchemy connection."""
+    return cast(sqlite3.Connection, conn.connection.driver_connection)
 
 
 class BankAccount(Base):
@@ -40,20 +52,249 @@ class Category(Base):
         DateTime, nullable=False, default=datetime.utcnow
     )
 
+class CategoryRule(Base):
+    """Assigns a category to transactions whose description contains a
+    phrase, or matches a regex when ``regex`` is set. See ledger.rules."""
+    
+    __tablename__ = "category_rules"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    pattern: Mapped[str] = mapped_column(String(200), nullable=False)
+    regex: Mapped[bool] = mapped_column(nullable=False, default=False)
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), nullable=False)
+    # Higher priorities win when several rules match
+    priority: Mapped[int] = mapped_column(nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    
+    category_ref: Mapped["Category"] = relationship()
+
 class Transaction(Base):
     """Represents a financial transaction."""
     
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_account_id_date", "account_id", "date"),
+        Index("ix_transactions_category_id_date", "category_id", "date"),
+        Index("ix_transactions_date", "date"),
+        Index("ix_transactions_fingerprint", "fingerprint"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     description: Mapped[str] = mapped_column(String(200), nullable=False)
-    amount: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
-    category: Mapped[Optional[str]] = mapped_column(String(50))
+    amount_cents: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    category_id: Mapped[Optional[int]] = mapped_column(ForeignKey("categories.id"))
     account_id: Mapped[int] = mapped_column(ForeignKey("bank_accounts.id"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, default=datetime.utcnow
     )
+    # Hash of account, day, amount and description; see dedupe.transaction_fingerprint
+    fingerprint: Mapped[Optional[str]] = mapped_column(String(16))
     
     # Relationship to bank account
     account: Mapped["BankAccount"] = relationship(back_populates="transactions")
+    
+    # Categories are few, so they are loaded with one IN query per result set
+    category_ref: Mapped[Optional["Category"]] = relationship(lazy="selectin")
+    
+    @property
+    def amount(self) -> Decimal:
+        """The amount in currency units."""
+        return from_cents(self.amount_cents)
+    
+    @property
+    def category(self) -> Optional[str]:
+        """Name of the transaction's category, if any."""
+        return self.category_ref.name if self.category_ref else None
+
+
+# Contentless FTS5 index over transaction descriptions and category names.
+# The rowid is the transaction id; triggers keep it in sync with every write.
+# Category names are looked up at write time, which is safe because
+# categories are never renamed and delete_category uncategorizes their
+# transactions before removing them.
+TRANSACTIONS_FTS_TABLE_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description, category,
+        content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+# Trigger DDL by the operation it follows
+TRANSACTIONS_FTS_TRIGGERS: Dict[str, str] = {
+    "insert": """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts (rowid, description, category)
+        VALUES (
+            new.id, new.description,
+            (SELECT name FROM categories WHERE id = new.category_id)
+        );
+    END
+    """,
+    "delete": """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+        VALUES (
+            'delete', old.id, old.description,
+            (SELECT name FROM categories WHERE id = old.category_id)
+        );
+    END
+    """,
+    "update": """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_update
+    AFTER UPDATE OF description, category_id ON transactions BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+        VALUES (
+            'delete', old.id, old.description,
+            (SELECT name FROM categories WHERE id = old.category_id)
+        );
+        INSERT INTO transactions_fts (rowid, description, category)
+        VALUES (
+            new.id, new.description,
+            (SELECT name FROM categories WHERE id = new.category_id)
+        );
+    END
+    """,
+}
+
+TRANSACTIONS_FTS_DDL = [TRANSACTIONS_FTS_TABLE_DDL, *TRANSACTIONS_FTS_TRIGGERS.values()]
+
+# What the insert trigger does, for all transactions above an id at once
+INDEX_NEW_TRANSACTIONS = text("""
+    INSERT INTO transactions_fts (rowid, description, category)
+    SELECT t.id, t.description, c.name
+    FROM transactions AS t LEFT JOIN categories AS c ON c.id = t.category_id
+    WHERE t.id > :last_id
+""")
+
+
+@contextmanager
+def search_triggers_suspended(conn: Connection, *operations: str) -> Iterator[None]:
+    """Drop the search index triggers of some operations for a block.
+
+    For bulk writes that update transactions_fts themselves, or must leave
+    it as it is. The triggers are dropped and recreated inside the
+    caller's write transaction, so other connections never see them
+    missing, and a rollback restores them.
+
+    Raises:
+        RuntimeError: If no write transaction is open on the connection
+    """
+    if not driver_connection(conn).in_transaction:
+        raise RuntimeError("Search triggers can only be suspended inside a write transaction")
+    names = {f"transactions_fts_{operation}": operation for operation in operations}
+    existing = [
+        names[name] for (name,) in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'transactions'"
+        )
+        if name in names
+    ]
+    for operation in existing:
+        conn.exec_driver_sql(f"DROP TRIGGER transactions_fts_{operation}")
+    try:
+        yield
+    finally:
+        for operation in existing:
+            conn.exec_driver_sql(TRANSACTIONS_FTS_TRIGGERS[operation])
+
+
+for statement in TRANSACTIONS_FTS_DDL:
+    event.listen(Transaction.__table__, "after_create", DDL(statement))  # type: ignore[no-untyped-call]
+
+
+class MonthlyRollup(Base):
+    """Transaction totals per account, category and month.
+    
+    Maintained incrementally by every write path so period summaries read
+    one row per month instead of every transaction.
+    """
+    
+    __tablename__ = "monthly_rollups"
+    
+    account_id: Mapped[int] = mapped_column(ForeignKey("bank_accounts.id"), primary_key=True)
+    category_id: Mapped[int] = mapped_column(primary_key=True)  # 0 when uncategorized
+    period: Mapped[str] = mapped_column(String(7), primary_key=True)  # YYYY-MM
+    total_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    count: Mapped[int] = mapped_column(nullable=False, default=0)
+    income_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    expenses_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class BalanceCheckpoint(Base):
+    """Account balance at the end of each month that has transactions.
+    
+    A balance at any date is the nearest earlier checkpoint plus the
+    transactions since the start of that date's month.
+    """
+    
+    __tablename__ = "balance_checkpoints"
+    
+    account_id: Mapped[int] = mapped_column(ForeignKey("bank_accounts.id"), primary_key=True)
+    period: Mapped[str] = mapped_column(String(7), primary_key=True)  # YYYY-MM
+    balance_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class ArchivePartition(Base):
+    """A year of transactions moved out to its own SQLite file.
+    
+    Monthly rollups and balance checkpoints keep covering archived years,
+    so balances and period summaries carry forward without opening the
+    archive.
+    """
+    
+    __tablename__ = "archive_partitions"
+    
+    year: Mapped[int] = mapped_column(primary_key=True)
+    path: Mapped[str] = mapped_column(String(500), nullable=False)
+    rows: Mapped[int] = mapped_column(nullable=False, default=0)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+
+
+class LedgerVersion(Base):
+    """Change counter of the ledger, bumped once by every write transaction.
+    
+    Cached report results are valid only for the (token, version) they were
+    computed at. The token is random per database, so a recreated ledger
+    never matches results cached for an earlier one.
+    """
+    
+    __tablename__ = "ledger_version"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    token: Mapped[str] = mapped_column(String(16), nullable=False)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+LEDGER_VERSION_DDL = [
+    """
+    INSERT OR IGNORE INTO ledger_version (id, token, version)
+    VALUES (1, lower(hex(randomblob(8))), 0)
+    """,
+]
+
+
+def bump_ledger_version(conn: Connection) -> None:
+    """Count the write transaction open on a connection, just before it commits.
+
+    Listens for the "commit" event of ledger engines, so a transaction
+    pays for one update however many rows it writes. Read-only
+    transactions leave the version alone, as do ledgers from before the
+    version table.
+    """
+    driver = driver_connection(conn)
+    if not driver.in_transaction:
+        return
+    try:
+        driver.execute("UPDATE ledger_version SET version = version + 1")
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+
+
+# Created with the schema; the counter lives in its only row
+for statement in LEDGER_VERSION_DDL:
+    event.listen(Base.metadata, "after_create", DDL(statement))  # type: ignore[no-untyped-call]
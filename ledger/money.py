@@ -0,0 +1,52 @@
+"""
+Money amounts as integer cents.
+
+Amounts are stored and aggregated as 64-bit integer cents, so sums are
+exact and computed natively by SQLite. Decimal only appears at the edges,
+when parsing input and presenting results.
+"""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Optional, Union
+
+CENT = Decimal("0.01")
+
+
+def to_cents(value: Union[Decimal, int, float, str]) -> int:
+    """Convert an amount in currency units to integer cents.
+
+    Fractions of a cent are rounded half away from zero. Floats are
+    converted through their shortest repr, so 0.1 becomes 10 cents.
+
+    Raises:
+        ValueError: If the value is not a number
+    """
+    if isinstance(value, float):
+        value = repr(value)
+    try:
+        amount = Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"Invalid amount {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount {value!r}")
+    return int(amount.scaleb(2))
+
+
+def from_cents(cents: Optional[int]) -> Decimal:
+    """Convert integer cents to a Decimal amount; None (an empty SUM) is zero."""
+    return Decimal(cents or 0).scaleb(-2)
+
+
+def format_cents(cents: int) -> str:
+    """Format integer cents like str(from_cents(cents)), without the Decimal."""
+    sign = "-" if cents < 0 else ""
+    whole, part = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{part:02d}"
+
+
+def parse_amount(value: str) -> Decimal:
+    """Parse an amount typed by the user, rounded to whole cents.
+
+    Raises:
+        ValueError: If the value is not a number
+    """
+    return from_cents(to_cents(value.strip()))
@@ -0,0 +1,190 @@
+"""
+Per-command SQL instrumentation for the `--profile` flag.
+
+QueryProfiler listens to engine events on every engine while it is
+active, recording each statement's time and rows, plus commits and
+connection checkouts. It flags statements that look like N+1 loops or
+exact repeats.
+"""
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Connection, Engine, event
+from sqlalchemy.engine.interfaces import ExecutionContext
+
+# Executions of one statement with varying parameters before it is
+# reported as a likely N+1 loop
+N_PLUS_ONE_THRESHOLD = 10
+
+# Executions with identical parameters before a statement is reported as
+# repeated work
+REPEAT_THRESHOLD = 3
+
+
+class StatementStats(NamedTuple):
+    """Totals for one distinct SQL statement."""
+    statement: str
+    executions: int
+    seconds: float
+    rows: int
+    distinct_params: int
+    max_repeats: int
+
+
+class _CountingCursor:
+    """DBAPI cursor proxy that counts the rows fetched through it."""
+
+    def __init__(self, cursor: Any, on_rows: Callable[[int], None]) -> None:
+        self._cursor = cursor
+        self._on_rows = on_rows
+
+    def fetchone(self) -> Any:
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._on_rows(1)
+        return row
+
+    def fetchmany(self, *args: Any) -> Any:
+        rows = self._cursor.fetchmany(*args)
+        self._on_rows(len(rows))
+        return rows
+
+    def fetchall(self) -> Any:
+        rows = self._cursor.fetchall()
+        self._on_rows(len(rows))
+        return rows
+
+    def __iter__(self) -> Iterator[Any]:
+        for row in self._cursor:
+            self._on_rows(1)
+            yield row
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+
+class QueryProfiler:
+    """Collects statement, commit and connection counts for all engines."""
+
+    def __init__(self) -> None:
+        self.started = 0.0
+        self.finished: Optional[float] = None
+        self.commits = 0
+        self.connections = 0
+        self._seconds: Dict[str, float] = {}
+        self._counts: Counter[str] = Counter()
+        self._rows: Counter[str] = Counter()
+        self._params: Dict[str, Counter[Tuple[Any, ...]]] = {}
+        self._listeners: List[Tuple[str, Callable[..., None]]] = [
+            ("before_cursor_execute", self._before_execute),
+            ("after_cursor_execute", self._after_execute),
+            ("commit", self._on_commit),
+            ("engine_connect", self._on_connect),
+        ]
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        for name, listener in self._listeners:
+            event.listen(Engine, name, listener)
+
+    def stop(self) -> None:
+        for name, listener in self._listeners:
+            event.remove(Engine, name, listener)
+        self.finished = time.perf_counter()
+
+    def _before_execute(
+        self, conn: Connection, cursor: Any, statement: str, parameters: Any,
+        context: Optional[ExecutionContext], executemany: bool,
+    ) -> None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    def _after_execute(
+        self, conn: Connection, cursor: Any, statement: str, parameters: Any,
+        context: Optional[ExecutionContext], executemany: bool,
+    ) -> None:
+        elapsed = time.perf_counter() - conn.info["profile_started"].pop()
+        self._counts[statement] += 1
+        self._seconds[statement] = self._seconds.get(statement, 0.0) + elapsed
+        self._params.setdefault(statement, Counter())[_params_key(parameters, executemany)] += 1
+
+        if context is not None and cursor.description is not None:
+            def on_rows(count: int, statement: str = statement) -> None:
+                self._rows[statement] += count
+            context.cursor = _CountingCursor(cursor, on_rows)
+        elif cursor.rowcount > 0:
+            self._rows[statement] += cursor.rowcount
+
+    def _on_commit(self, conn: Connection) -> None:
+        self.commits += 1
+
+    def _on_connect(self, conn: Connection) -> None:
+        self.connections += 1
+
+    @property
+    def wall_seconds(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    def statements(self) -> List[StatementStats]:
+        """Per-statement totals, slowest first."""
+        stats = [
+            StatementStats(
+                statement,
+                count,
+                self._seconds[statement],
+                self._rows[statement],
+                len(self._params[statement]),
+                max(self._params[statement].values()),
+            )
+            for statement, count in self._counts.items()
+        ]
+        return sorted(stats, key=lambda s: s.seconds, reverse=True)
+
+    def n_plus_one(self) -> List[StatementStats]:
+        """Statements run many times with different parameters, like a
+        lookup inside a loop."""
+        return [s for s in self.statements() if s.distinct_params >= N_PLUS_ONE_THRESHOLD]
+
+    def repeated(self) -> List[StatementStats]:
+        """Statements run several times with exactly the same parameters."""
+        return [s for s in self.statements() if s.max_repeats >= REPEAT_THRESHOLD]
+
+    def summary(self, top: int = 10) -> List[str]:
+        """Plain-text report lines."""
+        statements = self.statements()
+        queries = sum(s.executions for s in statements)
+        lines = [
+            f"{queries} queries in {sum(s.seconds for s in statements) * 1000:.1f} ms, "
+            f"{sum(s.rows for s in statements):,} rows, {self.commits} commits, "
+            f"{self.connections} connections; {self.wall_seconds * 1000:.1f} ms total",
+        ]
+        if statements:
+            lines.append(f"{'count':>6} {'total ms':>9} {'rows':>9}  statement")
+            for s in statements[:top]:
+                lines.append(
+                    f"{s.executions:>6} {s.seconds * 1000:>9.2f} {s.rows:>9,}  {_shorten(s.statement)}"
+                )
+        for s in self.n_plus_one():
+            lines.append(
+                f"N+1: {s.executions} runs with {s.distinct_params} different parameters: "
+                f"{_shorten(s.statement)}"
+            )
+        for s in self.repeated():
+            lines.append(
+                f"Repeated: same parameters up to {s.max_repeats} times: {_shorten(s.statement)}"
+            )
+        return lines
+
+
+def _params_key(parameters: Any, executemany: bool) -> Tuple[Any, ...]:
+    if executemany:
+        return ("executemany", len(parameters))
+    if isinstance(parameters, dict):
+        return tuple(sorted((k, repr(v)) for k, v in parameters.items()))
+    return tuple(repr(v) for v in parameters or ())
+
+
+def _shorten(statement: str, width: int = 100) -> str:
+    text = " ".join(statement.split())
+    return text if len(text) <= width else text[:width - 3] + "..."
@@ -0,0 +1,189 @@
+"""
+Buffered rendering of long transaction listings.
+
+Rows are formatted a batch at a time into one string and written with a
+single call, so a listing costs one write per batch instead of a write
+and flush per row. Color codes are only produced for a terminal, and
+output longer than the screen goes through the pager (click's, which
+honors $PAGER) when the CLI runs in a real terminal.
+
+TransactionViewport pages through a listing interactively and fetches
+only the rows on screen.
+"""
+import io
+import os
+import shutil
+import sys
+from datetime import datetime
+from itertools import chain, islice
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import click
+from colorama import Fore, Style
+
+from .money import format_cents
+
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.table import Table
+
+    from .storage import TransactionRecord
+
+# Lines formatted into each buffered write
+DEFAULT_RENDER_BATCH = 1000
+
+# Keyset position (date, id) a page starts after
+Cursor = Tuple[datetime, int]
+
+# Fetches at most ``limit`` records after a cursor, in (date, id) order
+PageFetch = Callable[[Optional[Cursor], int], List["TransactionRecord"]]
+
+# Screen lines the viewport needs besides the rows: title, table borders,
+# header and the key help
+VIEWPORT_CHROME = 7
+
+NEXT_KEYS = ("n", " ", "j", "\r", "\x1b[B", "\x1b[C", "\x1b[6~")
+PREVIOUS_KEYS = ("p", "b", "k", "\x1b[A", "\x1b[D", "\x1b[5~")
+QUIT_KEYS = ("q", "Q", "\x1b")
+
+
+def use_color(stream: Optional[TextIO] = None) -> bool:
+    """Whether to color output: only for a terminal, and not with NO_COLOR."""
+    stream = stream or sys.stdout
+    return stream.isatty() and not os.getenv("NO_COLOR")
+
+
+def is_terminal(stream: Optional[TextIO] = None) -> bool:
+    """Whether the stream is this process's own terminal.
+
+    Unlike isatty() this is false in the daemon, whose output streams
+    report the client's terminal but cannot host a pager or viewport.
+    """
+    stream = stream or sys.stdout
+    try:
+        return os.isatty(stream.fileno())
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+
+
+def colored(text: str, color_code: str, color: bool) -> str:
+    return f"{color_code}{text}{Style.RESET_ALL}" if color else text
+
+
+def transaction_line(t: "TransactionRecord", color: bool) -> str:
+    """One listing line: date | description | $amount[ | category]."""
+    # isoformat() is several times faster than strftime()
+    date = t.date.date().isoformat()
+    category = f" | {t.category}" if t.category else ""
+    amount = format_cents(abs(t.amount_cents))
+    if not color:
+        return f"{date} | {t.description} | ${amount}{category}"
+    sign_color = Fore.GREEN if t.amount_cents >= 0 else Fore.RED
+    return (
+        f"{Fore.BLUE}{date} | {t.description} | "
+        f"{sign_color}${amount}{Style.RESET_ALL}{category}"
+    )
+
+
+def batch_lines(lines: Iterable[str], batch_size: int = DEFAULT_RENDER_BATCH) -> Iterator[str]:
+    """Join lines into newline-terminated chunks of up to batch_size lines."""
+    lines = iter(lines)
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            return
+        batch.append("")
+        yield "\n".join(batch)
+
+
+def write_chunks(chunks: Iterable[str], color: bool, pager: bool = False) -> None:
+    """Write rendered chunks to stdout, through the pager if asked to and
+    they do not fit on one screen."""
+    chunks = iter(chunks)
+    if pager:
+        height = shutil.get_terminal_size().lines
+        head = []
+        lines = 0
+        for chunk in chunks:
+            head.append(chunk)
+            lines += chunk.count("\n")
+            if lines >= height:
+                click.echo_via_pager(chain(head, chunks), color=color)
+                return
+        chunks = iter(head)
+    for chunk in chunks:
+        click.echo(chunk, nl=False, color=color)
+
+
+class TransactionViewport:
+    """Interactive listing that shows one screenful of transactions at a time.
+
+    Each page is a keyset query for the rows after the previous page, so
+    only what is on screen is fetched however long the listing is; going
+    back re-runs the query of the remembered earlier page.
+    """
+
+    def __init__(
+        self, fetch: PageFetch, title: str = "Transactions", console: Optional["Console"] = None
+    ) -> None:
+        from rich.console import Console
+
+        self.fetch = fetch
+        self.title = title
+        self.console = console or Console()
+
+    @property
+    def page_size(self) -> int:
+        return max(1, self.console.height - VIEWPORT_CHROME)
+
+    def table(self, rows: List["TransactionRecord"], page: int) -> "Table":
+        from rich.table import Table
+        from rich.text import Text
+
+        table = Table(title=f"{self.title} (page {page})", expand=True)
+        table.add_column("Date", no_wrap=True)
+        table.add_column("Description", no_wrap=True, overflow="ellipsis", ratio=1)
+        table.add_column("Amount", justify="right", no_wrap=True)
+        table.add_column("Category", no_wrap=True, overflow="ellipsis")
+        for t in rows:
+            table.add_row(
+                f"{t.date:%Y-%m-%d}",
+                t.description,
+                Text(
+                    f"${format_cents(abs(t.amount_cents))}",
+                    style="green" if t.amount_cents >= 0 else "red",
+                ),
+                t.category or "",
+            )
+        return table
+
+    def run(self) -> None:
+        """Show pages until the user quits."""
+        starts: List[Optional[Cursor]] = [None]
+        while True:
+            size = self.page_size
+            # One extra row tells whether there is a next page
+            rows = self.fetch(starts[-1], size + 1)
+            more = len(rows) > size
+            rows = rows[:size]
+            if not rows and len(starts) == 1:
+                self.console.print("[yellow]No transactions found.[/yellow]")
+                return
+
+            self.console.clear()
+            self.console.print(self.table(rows, len(starts)))
+            keys = ["q quit"]
+            if len(starts) > 1:
+                keys.insert(0, "p previous")
+            if more:
+                keys.insert(0, "n next")
+            self.console.print(f"[dim]{' · '.join(keys)}[/dim]", end="")
+
+            key = click.getchar()
+            if key in QUIT_KEYS:
+                self.console.print()
+                return
+            if key in NEXT_KEYS and more:
+                starts.append((rows[-1].date, rows[-1].id))
+            elif key in PREVIOUS_KEYS and len(starts) > 1:
+                starts.pop()
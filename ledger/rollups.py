@@ -0,0 +1,281 @@
+"""
+Incrementally maintained monthly rollups and balance checkpoints.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, literal, select, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from .archive import archive_scope
+from .models import BalanceCheckpoint, MonthlyRollup, Transaction
+
+# (account_id, category_id, date, amount_cents) of a written transaction
+RollupRow = Tuple[int, Optional[int], datetime, int]
+
+# Rollup category_id of uncategorized transactions
+UNCATEGORIZED_ID = 0
+
+ROLLUP_COLUMNS = [
+    "account_id", "category_id", "period",
+    "total_cents", "count", "income_cents", "expenses_cents",
+]
+
+
+def month_key(date: datetime) -> str:
+    """Rollup period key (YYYY-MM) for a date."""
+    return f"{date.year:04d}-{date.month:02d}"
+
+
+def checkpoint_balance(
+    db: Session,
+    before_period: Optional[str] = None,
+    account_id: Optional[int] = None,
+) -> int:
+    """Balance in cents from the latest checkpoint of each account before a
+    period.
+
+    With no period, the latest checkpoints hold the full current balance.
+    Each lookup is a single seek on the (account_id, period) primary key.
+    """
+    latest_query = select(
+        BalanceCheckpoint.account_id,
+        func.max(BalanceCheckpoint.period).label("period"),
+    ).group_by(BalanceCheckpoint.account_id)
+    if before_period is not None:
+        latest_query = latest_query.where(BalanceCheckpoint.period < before_period)
+    if account_id:
+        latest_query = latest_query.where(BalanceCheckpoint.account_id == account_id)
+    latest = latest_query.subquery()
+
+    query = select(func.sum(BalanceCheckpoint.balance_cents)).join(
+        latest,
+        (BalanceCheckpoint.account_id == latest.c.account_id)
+        & (BalanceCheckpoint.period == latest.c.period),
+    )
+    return db.scalar(query) or 0
+
+
+# Deltas of one apply_checkpoint_deltas() call, so the checkpoints can be
+# shifted with a statement per step rather than per (account, month)
+CHECKPOINT_DELTAS_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS checkpoint_deltas (
+        account_id INTEGER NOT NULL,
+        period TEXT NOT NULL,
+        delta INTEGER NOT NULL,
+        PRIMARY KEY (account_id, period)
+    )
+"""
+
+# Sets the checkpoint of every delta's month to the balance at the latest
+# checkpoint up to that month, plus the account's deltas up to it. SQLite
+# computes the whole SELECT before inserting, since it reads the table it
+# inserts into, so the balances found are those before this statement.
+UPSERT_DELTA_CHECKPOINTS = text("""
+    INSERT INTO balance_checkpoints (account_id, period, balance_cents)
+    SELECT d.account_id, d.period,
+        COALESCE((
+            SELECT c.balance_cents FROM balance_checkpoints AS c
+            WHERE c.account_id = d.account_id AND c.period <= d.period
+            ORDER BY c.period DESC LIMIT 1
+        ), 0)
+        + (
+            SELECT SUM(e.delta) FROM checkpoint_deltas AS e
+            WHERE e.account_id = d.account_id AND e.period <= d.period
+        )
+    FROM checkpoint_deltas AS d WHERE true
+    ON CONFLICT (account_id, period) DO UPDATE SET balance_cents = excluded.balance_cents
+""")
+
+# Adds the deltas before each later month of one account to its checkpoint
+SHIFT_LATER_CHECKPOINTS = text("""
+    UPDATE balance_checkpoints
+    SET balance_cents = balance_cents + (
+        SELECT SUM(d.delta) FROM checkpoint_deltas AS d
+        WHERE d.account_id = balance_checkpoints.account_id
+            AND d.period < balance_checkpoints.period
+    )
+    WHERE account_id = :account_id AND period > :period
+        AND period NOT IN (SELECT period FROM checkpoint_deltas WHERE account_id = :account_id)
+""")
+
+
+def apply_checkpoint_deltas(db: Session, deltas: Dict[Tuple[int, str], int]) -> None:
+    """Shift the balance checkpoints of each (account, month) by a delta in
+    cents.
+
+    A missing checkpoint is created from the previous one, and the delta
+    is added to that month and every later month of the account. The
+    months with deltas are written by one upsert, then the later months
+    by one update per account.
+    """
+    if not deltas:
+        return
+    conn = db.connection()
+    conn.exec_driver_sql(CHECKPOINT_DELTAS_DDL)
+    conn.exec_driver_sql("DELETE FROM checkpoint_deltas")
+    conn.exec_driver_sql(
+        "INSERT INTO checkpoint_deltas (account_id, period, delta) VALUES (?, ?, ?)",
+        [(account_id, period, delta) for (account_id, period), delta in deltas.items()],
+    )
+    conn.execute(UPSERT_DELTA_CHECKPOINTS)
+
+    first_periods: Dict[int, str] = {}
+    for (account_id, period), delta in deltas.items():
+        if delta and period < first_periods.get(account_id, "9999-99"):
+            first_periods[account_id] = period
+    if first_periods:
+        conn.execute(SHIFT_LATER_CHECKPOINTS, [
+            {"account_id": account_id, "period": period}
+            for account_id, period in first_periods.items()
+        ])
+
+
+def apply_rollup_deltas(db: Session, rows: Iterable[RollupRow], sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) transactions from the monthly rollups.
+
+    Rows are aggregated in memory first, so a batch touching thousands of
+    transactions issues one upsert per (account, category, month).
+    """
+    deltas: Dict[Tuple[int, int, str], List[int]] = {}
+    for account_id, category_id, date, amount in rows:
+        key = (account_id, category_id or UNCATEGORIZED_ID, month_key(date))
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = [0, 0, 0, 0]
+        signed = amount * sign
+        delta[0] += signed
+        delta[1] += sign
+        if amount > 0:
+            delta[2] += signed
+        elif amount < 0:
+            delta[3] += signed
+
+    if not deltas:
+        return
+
+    table = MonthlyRollup.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.account_id, table.c.category_id, table.c.period],
+        set_={
+            "total_cents": table.c.total_cents + stmt.excluded.total_cents,
+            "count": table.c.count + stmt.excluded.count,
+            "income_cents": table.c.income_cents + stmt.excluded.income_cents,
+            "expenses_cents": table.c.expenses_cents + stmt.excluded.expenses_cents,
+        },
+    )
+    db.execute(stmt, [
+        {
+            "account_id": account_id,
+            "category_id": category_id,
+            "period": period,
+            "total_cents": total,
+            "count": count,
+            "income_cents": income,
+            "expenses_cents": expenses,
+        }
+        for (account_id, category_id, period), (total, count, income, expenses)
+        in deltas.items()
+    ])
+
+    if sign < 0:
+        # Drop months that no longer hold any transactions
+        db.execute(delete(table).where(table.c.count == 0))
+
+    balance_deltas: Dict[Tuple[int, str], int] = {}
+    for (account_id, _, period), delta in deltas.items():
+        balance_deltas[account_id, period] = balance_deltas.get((account_id, period), 0) + delta[0]
+    apply_checkpoint_deltas(db, balance_deltas)
+
+
+def merge_rollup_category(db: Session, category_id: int, into: int = UNCATEGORIZED_ID) -> None:
+    """Move the rollups of one category onto another, e.g. when a category
+    is deleted and its transactions become uncategorized.
+
+    Balances are unchanged, so the checkpoints are left alone.
+    """
+    table = MonthlyRollup.__table__
+    source = select(
+        table.c.account_id,
+        literal(into),
+        table.c.period,
+        table.c.total_cents,
+        table.c.count,
+        table.c.income_cents,
+        table.c.expenses_cents,
+    ).where(table.c.category_id == category_id)
+    stmt = insert(table).from_select(
+        ROLLUP_COLUMNS,
+        source,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.account_id, table.c.category_id, table.c.period],
+        set_={
+            "total_cents": table.c.total_cents + stmt.excluded.total_cents,
+            "count": table.c.count + stmt.excluded.count,
+            "income_cents": table.c.income_cents + stmt.excluded.income_cents,
+            "expenses_cents": table.c.expenses_cents + stmt.excluded.expenses_cents,
+        },
+    )
+    db.execute(stmt)
+    db.execute(delete(table).where(table.c.category_id == category_id))
+
+
+def rebuild_rollups(db: Session) -> int:
+    """Recompute all monthly rollups and balance checkpoints from the
+    transactions table and every archive partition.
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    period = func.strftime("%Y-%m", Transaction.date)
+    category_id = func.coalesce(Transaction.category_id, UNCATEGORIZED_ID)
+    source = (
+        select(
+            Transaction.account_id,
+            category_id,
+            period,
+            func.sum(Transaction.amount_cents),
+            func.count(),
+            func.sum(case((Transaction.amount_cents > 0, Transaction.amount_cents), else_=0)),
+            func.sum(case((Transaction.amount_cents < 0, Transaction.amount_cents), else_=0)),
+        )
+        .group_by(Transaction.account_id, category_id, period)
+    )
+
+    table = MonthlyRollup.__table__
+    with archive_scope(db):
+        db.execute(delete(table))
+        db.execute(table.insert().from_select(
+            ROLLUP_COLUMNS,
+            source,
+        ))
+    rebuild_checkpoints(db)
+    db.commit()
+    return db.execute(select(func.count()).select_from(table)).scalar_one()
+
+
+def rebuild_checkpoints(db: Session) -> None:
+    """Recompute balance checkpoints as running totals of the rollups."""
+    monthly = (
+        select(
+            MonthlyRollup.account_id,
+            MonthlyRollup.period,
+            func.sum(MonthlyRollup.total_cents).label("total"),
+        )
+        .group_by(MonthlyRollup.account_id, MonthlyRollup.period)
+        .subquery()
+    )
+    running = select(
+        monthly.c.account_id,
+        monthly.c.period,
+        func.sum(monthly.c.total).over(
+            partition_by=monthly.c.account_id, order_by=monthly.c.period
+        ),
+    )
+
+    table = BalanceCheckpoint.__table__
+    db.execute(delete(table))
+    db.execute(table.insert().from_select(["account_id", "period", "balance_cents"], running))
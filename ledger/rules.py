@@ -0,0 +1,235 @@
+"""
+Auto-categorization rules compiled into a single matcher.
+
+A rule assigns its category to transactions whose description contains a
+phrase, case-insensitively, or matches a regular expression. RuleSet
+compiles all phrases into one trie-shaped regex, so a description is
+scanned once however many phrase rules there are. Regex rules are
+compiled one by one and tried in precedence order, stopping at the first
+that matches or once no remaining rule could win.
+
+When several rules match a description, the highest priority wins, then
+the oldest rule. Every rule that matches counts, including phrases that
+overlap or contain each other, so "bucks" at a higher priority beats
+"starbucks" in "STARBUCKS #12".
+"""
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from .models import Category, CategoryRule, Transaction
+from .rollups import RollupRow, apply_rollup_deltas
+
+logger = logging.getLogger(__name__)
+
+# Transactions read and updated per batch by categorize_transactions
+DEFAULT_CATEGORIZE_BATCH_SIZE = 5000
+
+
+class Rule(NamedTuple):
+    """A rule with the name of its category."""
+    id: int
+    pattern: str
+    regex: bool
+    category_id: int
+    category: str
+    priority: int
+
+
+def validate_pattern(pattern: str, regex: bool) -> None:
+    """Check that a rule pattern can be compiled.
+
+    Raises:
+        ValueError: If the pattern is empty or not a usable regex
+    """
+    if not pattern.strip():
+        raise ValueError("Rule pattern is empty")
+    if not regex:
+        return
+    try:
+        re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Invalid regular expression '{pattern}': {e}")
+
+
+# A trie node: the child node by next character, "" marking a phrase end
+TrieNode = Dict[str, Any]
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    trie: TrieNode = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: TrieNode) -> str:
+    ends = "" in node
+    branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 and not ends else f"(?:{'|'.join(branches)})"
+    # Greedy, so the longest phrase at a position matches
+    return body + "?" if ends else body
+
+
+class RuleSet:
+    """All rules of a ledger, compiled once for matching many descriptions.
+
+    A regex rule that does not compile, e.g. one stored before validation
+    was stricter, is left out and listed in ``invalid`` instead of
+    breaking every other rule.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = sorted(rules, key=_precedence)
+        self.invalid: List[Rule] = []
+        by_phrase: Dict[str, Rule] = {}
+        self._regexes: List[Tuple[Pattern[str], Rule]] = []
+        for rule in self.rules:
+            if not rule.regex:
+                # Rules are in precedence order, so the first one per phrase wins
+                by_phrase.setdefault(rule.pattern.lower(), rule)
+                continue
+            try:
+                self._regexes.append((re.compile(rule.pattern, re.IGNORECASE), rule))
+            except re.error as e:
+                logger.warning("Skipping rule %d, invalid regex '%s': %s", rule.id, rule.pattern, e)
+                self.invalid.append(rule)
+
+        # The longest phrase found at a position stands for every phrase
+        # that is a prefix of it, so each phrase maps to the best of those
+        self._by_longest: Dict[str, Rule] = {}
+        for phrase, rule in by_phrase.items():
+            best = rule
+            for end in range(1, len(phrase)):
+                prefix = by_phrase.get(phrase[:end])
+                if prefix is not None:
+                    best = _better(best, prefix)
+            self._by_longest[phrase] = best
+
+        self._phrases: Optional[Pattern[str]] = None
+        if by_phrase:
+            # A lookahead matches at every position, so phrases inside or
+            # overlapping other matches are found too
+            self._phrases = re.compile(f"(?=({_trie_pattern(by_phrase)}))", re.IGNORECASE)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, description: str) -> Optional[Rule]:
+        """The rule that categorizes a description, if any matches."""
+        best: Optional[Rule] = None
+        if self._phrases is not None:
+            for found in self._phrases.finditer(description):
+                rule = self._by_longest.get(found.group(1).lower())
+                if rule is not None:
+                    best = _better(best, rule)
+        for pattern, rule in self._regexes:
+            if best is not None and _precedence(best) < _precedence(rule):
+                break
+            if pattern.search(description):
+                return rule
+        return best
+
+
+def _precedence(rule: Rule) -> Tuple[int, int]:
+    return -rule.priority, rule.id
+
+
+def _better(best: Optional[Rule], rule: Rule) -> Rule:
+    return rule if best is None or _precedence(rule) < _precedence(best) else best
+
+
+def load_rules(db: Session) -> RuleSet:
+    """Compile the ledger's rules."""
+    query = select(
+        CategoryRule.id, CategoryRule.pattern, CategoryRule.regex,
+        CategoryRule.category_id, Category.name, CategoryRule.priority,
+    ).join(Category, CategoryRule.category_id == Category.id)
+    return RuleSet(Rule._make(row) for row in db.execute(query))
+
+
+class CategorizeStats(NamedTuple):
+    """Outcome of running the rules over existing transactions."""
+    scanned: int
+    matched: int
+    changed: int
+    elapsed: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.scanned / self.elapsed if self.elapsed else 0.0
+
+
+def categorize_transactions(
+    db: Session,
+    rules: RuleSet,
+    overwrite: bool = False,
+    apply: bool = True,
+    batch_size: int = DEFAULT_CATEGORIZE_BATCH_SIZE,
+    progress: Optional[Callable[[CategorizeStats], None]] = None,
+) -> CategorizeStats:
+    """Run the rules over existing transactions.
+
+    Reads the transactions in id order, one batch at a time, and writes
+    each batch's changes with a single executemany UPDATE plus one
+    rollup update.
+
+    Args:
+        overwrite: Also recategorize transactions that have a category
+        apply: Write the changes; otherwise only count them
+    """
+    table = Transaction.__table__
+    query = select(
+        table.c.id, table.c.description, table.c.category_id,
+        table.c.account_id, table.c.date, table.c.amount_cents,
+    ).order_by(table.c.id).limit(batch_size)
+    if not overwrite:
+        query = query.where(table.c.category_id.is_(None))
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("t_id"))
+        .values(category_id=bindparam("c_id"))
+    )
+
+    scanned = matched = changed = 0
+    started = time.perf_counter()
+    last_id = 0
+    while True:
+        rows = db.execute(query.where(table.c.id > last_id)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        changes = []
+        removed: List[RollupRow] = []
+        added: List[RollupRow] = []
+        for row in rows:
+            rule = rules.match(row.description)
+            if rule is None:
+                continue
+            matched += 1
+            if rule.category_id == row.category_id:
+                continue
+            changes.append({"t_id": row.id, "c_id": rule.category_id})
+            removed.append((row.account_id, row.category_id, row.date, row.amount_cents))
+            added.append((row.account_id, rule.category_id, row.date, row.amount_cents))
+
+        scanned += len(rows)
+        changed += len(changes)
+        if apply and changes:
+            db.execute(statement, changes)
+            apply_rollup_deltas(db, removed, sign=-1)
+            apply_rollup_deltas(db, added)
+        if progress:
+            progress(CategorizeStats(scanned, matched, changed, time.perf_counter() - started))
+
+    return CategorizeStats(scanned, matched, changed, time.perf_counter() - started)
@@ -0,0 +1,93 @@
+"""
+Full-text search over transaction descriptions and categories.
+"""
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Column, Float, Integer, MetaData, Table, bindparam, literal_column, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .archive import archive_scope
+from .models import Transaction
+from .storage import TransactionRecord, filter_transactions, record_query
+
+# The FTS5 table is created by DDL in models, so it lives outside Base.metadata
+transactions_fts = Table(
+    "transactions_fts",
+    MetaData(),
+    Column("rowid", Integer),
+    Column("rank", Float),
+)
+
+# A double-quoted phrase or a bare term, each optionally ending in * for prefix
+QUERY_TERM = re.compile(r'"([^"]*)"(\*?)|(\S+)')
+
+
+def build_match_query(text: str) -> str:
+    """Turn plain search text into a safe FTS5 MATCH expression.
+
+    Words are matched as tokens, "quoted text" as a phrase and a trailing
+    ``*`` as a prefix. All terms must match. Characters that FTS5 would
+    treat as syntax are quoted away.
+
+    Raises:
+        ValueError: If the text contains no search terms
+    """
+    terms = []
+    for phrase, phrase_prefix, word in QUERY_TERM.findall(text):
+        if word:
+            prefix = "*" if word.endswith("*") else ""
+            phrase = word.rstrip("*").replace('"', "")
+            phrase_prefix = prefix
+        if phrase.strip():
+            terms.append(f'"{phrase}"{phrase_prefix}')
+    if not terms:
+        raise ValueError("Search query is empty")
+    return " ".join(terms)
+
+
+def search_transactions(
+    db: Session,
+    text: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    account_id: Optional[int] = None,
+    limit: int = 50,
+    raw: bool = False,
+) -> List[Tuple[TransactionRecord, float]]:
+    """Search transactions by description and category, best matches first.
+
+    Args:
+        text: Search text, see build_match_query
+        raw: Pass text to FTS5 unchanged, allowing OR, NOT, NEAR and
+            column filters such as ``category:food``
+
+    Returns:
+        List[Tuple[TransactionRecord, float]]: Matches with their bm25 rank,
+        where lower is better
+
+    Raises:
+        ValueError: If the search text is empty or not a valid FTS5 query,
+            or spans more archived years than can be attached
+    """
+    match = text if raw else build_match_query(text)
+    query = (
+        record_query()
+        .add_columns(transactions_fts.c.rank)
+        .join(transactions_fts, transactions_fts.c.rowid == Transaction.id)
+        .where(literal_column("transactions_fts").op("MATCH")(bindparam("match", match)))
+        .order_by(transactions_fts.c.rank)
+        .limit(limit)
+    )
+    query = filter_transactions(query, start_date, end_date, category, account_id)
+    try:
+        with archive_scope(db, start_date, end_date):
+            return [
+                (TransactionRecord._make(row[:-1]), row[-1])
+                for row in db.connection().execute(query)
+            ]
+    except OperationalError as e:
+        raise ValueError(f"Invalid search query: {e.orig}")
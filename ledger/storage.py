@@ -1,20 +1,120 @@
 """
 Database storage operations for the ledger application.
 """
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
 from contextlib import contextmanager
 from datetime import datetime
 from decimal import Decimal
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Generator, List, Optional
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Generator, Iterable, Iterator, List, NamedTuple,
+    Optional, Sequence, Set, Tuple, TypeVar
+)
 
-from sqlalchemy import create_engine, select, inspect
-from .config import DB_PATH
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Engine, Select, create_engine, delete, event, func, inspect, select, tuple_, update
+)
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, SessionTransaction
 
-from .config import DATABASE_URL
-from .models import Base, Transaction, BankAccount
+from .config import (
+    DATABASE_URL, DEFAULT_BATCH_SIZE, DEFAULT_BUSY_BACKOFF, DEFAULT_BUSY_RETRIES,
+    DEFAULT_GROUP_COMMIT_SIZE, DEFAULT_GROUP_COMMIT_WINDOW, DEFAULT_PAGE_SIZE,
+    ensure_db_dir, get_sqlite_pragmas
+)
+from .archive import archive_scope, reset_archive_scope
+from .dedupe import DuplicateFilter, existing_fingerprints, transaction_fingerprint
+from .rules import RuleSet
+from .models import (
+    INDEX_NEW_TRANSACTIONS, Base, Transaction, BankAccount, Category, CategoryRule,
+    bump_ledger_version, driver_connection, search_triggers_suspended,
+)
+from .money import from_cents, to_cents
+from .rollups import RollupRow, apply_rollup_deltas, merge_rollup_category
 
-engine = create_engine(DATABASE_URL)
+if TYPE_CHECKING:
+    from alembic.config import Config
+    from typing_extensions import Unpack
+
+    # A select of any number of columns of any type
+    AnySelect = Select[Unpack[Tuple[Any, ...]]]
+else:
+    AnySelect = Select
+
+# Columns bulk_insert_transactions writes, in the order of its parameter tuples
+BULK_INSERT_COLUMNS = (
+    "date", "description", "amount_cents", "category_id", "account_id", "created_at",
+    "fingerprint",
+)
+BULK_INSERT_TRANSACTIONS = (
+    f"INSERT INTO transactions ({', '.join(BULK_INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in BULK_INSERT_COLUMNS)})"
+)
+
+def create_ledger_engine(
+    url: str = DATABASE_URL,
+    pragmas: Optional[Dict[str, Any]] = None,
+) -> Engine:
+    """Create an engine that applies the SQLite performance PRAGMAs.
+    
+    Args:
+        url: Database URL
+        pragmas: PRAGMA settings; defaults to the configured performance profile
+    """
+    if pragmas is None:
+        pragmas = get_sqlite_pragmas()
+    if url == DATABASE_URL:
+        ensure_db_dir()
+    
+    new_engine = create_engine(url)
+    
+    @event.listens_for(new_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection: sqlite3.Connection, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+    
+    event.listen(new_engine, "checkin", reset_archive_scope)
+    event.listen(new_engine, "commit", bump_ledger_version)
+    return new_engine
+
+
+_engine: Optional[Engine] = None
+
+
+def get_engine() -> Engine:
+    """Get the application engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = create_ledger_engine()
+    return _engine
+
+
+def set_engine(engine: Engine) -> Optional[Engine]:
+    """Make an engine the application engine.
+
+    Returns:
+        Optional[Engine]: The engine it replaces, if one was created
+    """
+    global _engine
+    previous, _engine = _engine, engine
+    return previous
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `storage.engine` working without creating the engine at import time
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Default categories to populate the database with
 DEFAULT_CATEGORIES = [
@@ -24,26 +124,110 @@ DEFAULT_CATEGORIES = [
 ]
 
 
-def initialize_default_categories(db: Session):
-    """Initialize the database with default categories."""
-    from .models import Category
+class CategoryCache:
+    """Process-wide mapping between category names and ids.
+    
+    Loaded from the database on first use and updated by the functions in
+    this module that add or delete categories, so writes resolve category
+    names without a query per transaction. A name or id that is not cached
+    triggers one reload, which picks up categories added by other
+    processes.
+    
+    Names added by a transaction that ends without committing are not
+    trusted; the whole cache is reloaded on next use instead.
+    """
+    
+    def __init__(self) -> None:
+        self._ids: Optional[Dict[str, int]] = None
+        self._names: Dict[int, str] = {}
+        self._pending: Set[str] = set()
+    
+    def _load(self, db: Session) -> Dict[str, int]:
+        ids: Dict[str, int] = {name: id for name, id in db.execute(select(Category.name, Category.id))}
+        self._ids = ids
+        self._names = {id: name for name, id in ids.items()}
+        return ids
+    
+    def get_ids(self, db: Session, names: Set[str]) -> Dict[str, int]:
+        """Get the ids of those category names that exist."""
+        ids = self._ids
+        if ids is None or not names <= ids.keys():
+            ids = self._load(db)
+        return {name: ids[name] for name in names if name in ids}
+    
+    def get_id(self, db: Session, name: str) -> Optional[int]:
+        """Get the id of a category name, or None if it does not exist."""
+        return self.get_ids(db, {name}).get(name)
+    
+    def get_names(self, db: Session, category_ids: Set[int]) -> Dict[int, str]:
+        """Get the names of those category ids that exist."""
+        if self._ids is None or not category_ids <= self._names.keys():
+            self._load(db)
+        return {id: self._names[id] for id in category_ids if id in self._names}
     
-    # Get existing category names
-    existing = {c.name for c in db.query(Category).all()}
+    def get_name(self, db: Session, category_id: int) -> Optional[str]:
+        """Get the name of a category id, or None if it does not exist."""
+        return self.get_names(db, {category_id}).get(category_id)
     
-    # Add any missing default categories
-    for category_name in DEFAULT_CATEGORIES:
-        if category_name not in existing:
-            category = Category(name=category_name)
-            db.add(category)
+    def names(self, db: Session) -> Dict[int, str]:
+        """All category names by id."""
+        if self._ids is None:
+            self._load(db)
+        return self._names
     
+    def add(self, name: str, category_id: int) -> None:
+        """Record a category created in the current transaction."""
+        if self._ids is not None:
+            self._ids[name] = category_id
+            self._names[category_id] = name
+            self._pending.add(name)
+    
+    def discard(self, name: str) -> None:
+        if self._ids is not None and name in self._ids:
+            del self._names[self._ids.pop(name)]
+    
+    def invalidate(self) -> None:
+        """Forget all entries; the next lookup reloads from the database."""
+        self._ids = None
+        self._names = {}
+        self._pending = set()
+    
+    def confirm(self) -> None:
+        """Mark categories added so far as committed."""
+        self._pending.clear()
+    
+    def forget_uncommitted(self) -> None:
+        """Invalidate the cache if it holds categories that were never committed."""
+        if self._pending:
+            self.invalidate()
+
+
+category_cache = CategoryCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _confirm_category_cache(session: Session) -> None:
+    category_cache.confirm()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _check_category_cache(session: Session, transaction: SessionTransaction) -> None:
+    # Categories added by a transaction that was rolled back or closed
+    # without committing do not exist
+    if transaction.parent is None:
+        category_cache.forget_uncommitted()
+
+
+def initialize_default_categories(db: Session) -> None:
+    """Initialize the database with default categories."""
+    resolve_categories(db, set(DEFAULT_CATEGORIES))
     db.commit()
 
 
 @contextmanager
 def get_db() -> Generator[Session, None, None]:
     """Get a database session."""
-    session = Session(engine)
+    session = Session(get_engine())
     try:
         yield session
         session.commit()
@@ -54,69 +238,336 @@ def get_db() -> Generator[Session, None, None]:
         session.close()
 
 
-def get_or_create_category(db: Session, name: str) -> str:
-    """Get existing category or create new one."""
-    from .models import Category
+T = TypeVar("T")
+
+# SQLite primary result codes for a database or table locked by another connection
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+
+def is_busy(error: BaseException) -> bool:
+    """Whether an error means another connection holds a conflicting lock."""
+    orig = getattr(error, "orig", error)
+    if not isinstance(orig, sqlite3.OperationalError):
+        return False
+    code = getattr(orig, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (SQLITE_BUSY, SQLITE_LOCKED)
+    message = str(orig)
+    return "database is locked" in message or "database table is locked" in message
+
+
+def retry_busy(
+    operation: Callable[[], T],
+    retries: int = DEFAULT_BUSY_RETRIES,
+    backoff: float = DEFAULT_BUSY_BACKOFF,
+) -> T:
+    """Run an operation, retrying with jittered exponential backoff while
+    the database is busy.
+
+    Each attempt already waits up to busy_timeout inside SQLite; the
+    retries cover lock conflicts SQLite reports without waiting.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return operation()
+        except OperationalError as e:
+            if not is_busy(e) or attempt == retries:
+                raise
+        time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.0))
+    raise AssertionError("unreachable")
+
+
+def begin_immediate(db: Session, retries: int = DEFAULT_BUSY_RETRIES) -> None:
+    """Take the write lock at the start of a write transaction.
+
+    A deferred transaction that reads before it writes fails straight away
+    with "database is locked" if another process committed in between,
+    since busy_timeout cannot help it. Does nothing if the session's
+    connection is already in a transaction.
+    """
+    connection = db.connection()
+    if driver_connection(connection).in_transaction:
+        return
+    retry_busy(lambda: connection.exec_driver_sql("BEGIN IMMEDIATE"), retries)
+
+
+# Session.info key of the rollup rows a write group applies at the end
+GROUP_ROLLUPS = "group_rollups"
+
+
+class _QueuedWrite(NamedTuple):
+    write: Callable[[Session], Any]
+    future: "Future[Any]"
+
+
+class WriteCoordinator:
+    """Queues writes from any thread and group-commits them.
+    
+    A write is a function of a session that must not commit, and may run
+    more than once if its group is retried. One writer
+    thread per process takes each write plus whatever else is queued, up
+    to ``max_group`` writes, and runs them
+    in a single BEGIN IMMEDIATE transaction with one commit. Each write
+    runs in its own savepoint, so a write that raises fails alone. If the
+    database stays busy, the whole group is retried with backoff.
+    
+    Writes can append rollup rows to ``db.info[GROUP_ROLLUPS]`` instead of
+    applying them, so the rollups and checkpoints are updated once per
+    group rather than once per write.
+    
+    When more than one write is queued, the writer waits up to ``window``
+    seconds for others to join; a write queued on its own commits at once.
+    """
+    
+    def __init__(
+        self,
+        window: float = DEFAULT_GROUP_COMMIT_WINDOW,
+        max_group: int = DEFAULT_GROUP_COMMIT_SIZE,
+        retries: int = DEFAULT_BUSY_RETRIES,
+    ):
+        self.window = window
+        self.max_group = max_group
+        self.retries = retries
+        self._queue: "queue.Queue[_QueuedWrite]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = 0
+    
+    def submit(self, write: Callable[[Session], T]) -> "Future[T]":
+        """Queue a write; the future resolves once its group is committed."""
+        self._ensure_writer()
+        future: "Future[T]" = Future()
+        self._queue.put(_QueuedWrite(write, future))
+        return future
+    
+    def write(self, write: Callable[[Session], T]) -> T:
+        """Queue a write and wait until it is committed.
+        
+        Raises:
+            Exception: Whatever the write raised, or the error that made
+                its group fail to commit
+        """
+        return self.submit(write).result()
+    
+    def _ensure_writer(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # A forked child does not inherit the parent's writer thread
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="ledger-writer", daemon=True
+            )
+            self._thread.start()
+    
+    def _run(self) -> None:
+        while True:
+            group = [self._queue.get()]
+            self._fill_group(group, block=False)
+            # A lone write commits at once; only when writes are arriving
+            # concurrently is it worth waiting for more
+            if len(group) > 1:
+                self._fill_group(group, block=True)
+            self._commit_group(group)
+    
+    def _fill_group(self, group: List[_QueuedWrite], block: bool) -> None:
+        deadline = time.monotonic() + self.window
+        while len(group) < self.max_group:
+            try:
+                if block:
+                    group.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                else:
+                    group.append(self._queue.get_nowait())
+            except queue.Empty:
+                return
     
-    # Check if category exists
-    category = db.query(Category).filter(Category.name == name).first()
-    if not category:
-        # Create new category
-        category = Category(name=name)
-        db.add(category)
-        db.commit()
+    def _commit_group(self, group: List[_QueuedWrite]) -> None:
+        try:
+            results = retry_busy(lambda: self._run_group(group), self.retries)
+        except Exception as e:
+            for item in group:
+                item.future.set_exception(e)
+            return
+        for item, (result, error) in zip(group, results):
+            if error is None:
+                item.future.set_result(result)
+            else:
+                item.future.set_exception(error)
     
-    return category.name
+    def _run_group(self, group: List[_QueuedWrite]) -> List[Tuple[Any, Optional[BaseException]]]:
+        results: List[Tuple[Any, Optional[BaseException]]] = []
+        rollups: List[RollupRow] = []
+        with Session(get_engine(), expire_on_commit=False) as db:
+            begin_immediate(db, retries=0)
+            db.info[GROUP_ROLLUPS] = rollups
+            for item in group:
+                applied = len(rollups)
+                try:
+                    with db.begin_nested():
+                        results.append((item.write(db), None))
+                except Exception as e:
+                    if isinstance(e, OperationalError) and is_busy(e):
+                        raise
+                    # The savepoint took back the write, and any categories it added
+                    del rollups[applied:]
+                    category_cache.forget_uncommitted()
+                    results.append((None, e))
+            apply_rollup_deltas(db, rollups)
+            db.commit()
+        return results
+
+
+_write_coordinator: Optional[WriteCoordinator] = None
+
+
+def get_write_coordinator() -> WriteCoordinator:
+    """Get the process-wide write queue, creating it on first use."""
+    global _write_coordinator
+    if _write_coordinator is None:
+        _write_coordinator = WriteCoordinator()
+    return _write_coordinator
+
+
+def get_or_create_category(db: Session, name: str) -> int:
+    """Get existing category or create new one.
+    
+    Returns:
+        int: The category id
+    """
+    return resolve_categories(db, {name})[name]
 
 def delete_category(db: Session, name: str) -> bool:
     """Delete a category if it's not a default one.
     
+    Transactions in the category become uncategorized, and rules that
+    assign it are removed.
+    
     Returns:
         bool: True if category was deleted, False if it was a default category
     """
-    from .models import Category
-    
     if name in DEFAULT_CATEGORIES:
         return False
-        
-    category = db.query(Category).filter(Category.name == name).first()
-    if category:
-        db.delete(category)
-        db.commit()
-        return True
-    return False
-
-def backup_database():
-    """Create a backup of the database file."""
-    from datetime import datetime
-    import shutil
     
-    backup_dir = Path(DB_PATH).parent / "backups"
-    backup_dir.mkdir(exist_ok=True)
+    begin_immediate(db)
+    category_id = category_cache.get_id(db, name)
+    if category_id is None:
+        return False
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_path = backup_dir / f"ledger_backup_{timestamp}.db"
+    db.execute(
+        update(Transaction)
+        .where(Transaction.category_id == category_id)
+        .values(category_id=None)
+    )
+    merge_rollup_category(db, category_id)
+    db.execute(delete(CategoryRule).where(CategoryRule.category_id == category_id))
+    db.execute(delete(Category).where(Category.id == category_id))
+    db.commit()
+    category_cache.discard(name)
+    return True
+
+def backup_database() -> Path:
+    """Create a consistent full backup of the database file."""
+    from . import backup
     
-    # Copy the database file
-    shutil.copy2(DB_PATH, backup_path)
-    return backup_path
+    return backup.backup_database()
+
+def _alembic_config(progress: Optional[Callable[[Any], None]] = None) -> "Config":
+    """Alembic configuration for the scripts next to the package.
 
-def migrate_database():
+    Raises:
+        FileNotFoundError: If the Alembic scripts are not next to the package
     """
-    Placeholder for future database migrations.
-    This will be implemented when schema changes are needed.
+    from alembic.config import Config
+
+    root = Path(__file__).resolve().parent.parent
+    if not (root / "alembic.ini").exists():
+        raise FileNotFoundError(f"No alembic.ini in {root}; migrate from a source checkout")
+    config = Config(str(root / "alembic.ini"))
+    config.set_main_option("script_location", str(root / "alembic"))
+    config.attributes["configure_logger"] = progress is None
+    if progress is not None:
+        config.attributes["progress"] = progress
+    return config
+
+def _unversioned_current_schema(engine: Engine) -> bool:
+    """Whether the ledger has the current tables but no Alembic revision.
+
+    Ledgers made by initialize_database() before it stamped them look like
+    this. Their schema came from the models, so replaying the revisions
+    from the start would fail on tables that already exist.
     """
-    # First, create a backup
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    if "alembic_version" in tables:
+        return False
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            return False
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        if not {column.name for column in table.columns} <= columns:
+            return False
+    return True
+
+def migrate_database(
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+    progress: Optional[Callable[[Any], None]] = None,
+) -> Path:
+    """Back up the ledger, then upgrade its schema to the latest revision.
+
+    Data steps run in batches and resume where they stopped if the
+    upgrade is interrupted (see ledger.migrations). A ledger that already
+    has the current schema but no revision is stamped as up to date.
+
+    Args:
+        batch_size: Rows per batch of data steps
+        pause: Seconds between batches, for other commands to write in
+        progress: Called with the MigrationProgress of each running data step
+
+    Returns:
+        Path: The backup taken before migrating
+
+    Raises:
+        FileNotFoundError: If the Alembic scripts are not next to the package
+    """
+    from alembic import command
+
+    config = _alembic_config(progress)
     backup_path = backup_database()
-    print(f"Database backed up to: {backup_path}")
-    
-    # In the future, migration code will go here
-    pass
+    if _unversioned_current_schema(get_engine()):
+        command.stamp(config, "head")
+        return backup_path
+    if batch_size is not None:
+        config.attributes["batch_size"] = batch_size
+    if pause is not None:
+        config.attributes["pause"] = pause
+    command.upgrade(config, "head")
+    return backup_path
+
+def initialize_database() -> None:
+    """Initialize database schema and defaults if database doesn't exist.
 
-def initialize_database():
-    """Initialize database schema and defaults if database doesn't exist."""
+    A new ledger is stamped with the latest Alembic revision, so that
+    `ledger migrate` knows its schema is current.
+    """
+    engine = get_engine()
+    new = not inspect(engine).get_table_names()
     # Create tables if they don't exist
     Base.metadata.create_all(engine)
+    if new:
+        from alembic import command
+
+        try:
+            config = _alembic_config()
+        except FileNotFoundError:
+            # Installed without the scripts, which cannot migrate it anyway
+            pass
+        else:
+            # Creating a ledger is not a migration worth logging
+            config.attributes["configure_logger"] = False
+            command.stamp(config, "head")
     
     # Initialize defaults
     with get_db() as db:
@@ -159,43 +610,409 @@ def create_transaction(
     category: Optional[str] = None,
 ) -> Transaction:
     """Create a new transaction."""
+    begin_immediate(db)
+    transaction = _insert_transaction(db, date, description, amount, account_id, category)
+    db.commit()
+    db.refresh(transaction)
+    
+    return transaction
+
+
+def add_transaction(
+    date: datetime,
+    description: str,
+    amount: Decimal,
+    account_id: int,
+    category: Optional[str] = None,
+    skip_duplicate: bool = False,
+) -> Optional["TransactionRecord"]:
+    """Create a transaction through the write queue, so it is committed
+    together with any concurrent writes from this process.
+    
+    Args:
+        skip_duplicate: Add nothing if the ledger already has a transaction
+            with the same fingerprint
+    
+    Returns:
+        Optional[TransactionRecord]: The new transaction, or None if it was
+            skipped as a duplicate
+    """
+    amount_cents = to_cents(amount)
+    fingerprint = transaction_fingerprint(account_id, date, amount_cents, description)
+    
+    def write(db: Session) -> Optional[TransactionRecord]:
+        if skip_duplicate and existing_fingerprints(db, {fingerprint}, date, date):
+            return None
+        category_id = get_or_create_category(db, category) if category else None
+        table = Transaction.__table__
+        transaction_id = db.execute(table.insert().values(
+            date=date,
+            description=description,
+            amount_cents=amount_cents,
+            category_id=category_id,
+            account_id=account_id,
+            fingerprint=fingerprint,
+        ).returning(table.c.id)).scalar_one()
+        db.info[GROUP_ROLLUPS].append((account_id, category_id, date, amount_cents))
+        return TransactionRecord(
+            transaction_id, date, description, amount_cents, category, account_id
+        )
+    
+    return get_write_coordinator().write(write)
+
+
+def _insert_transaction(
+    db: Session,
+    date: datetime,
+    description: str,
+    amount: Decimal,
+    account_id: int,
+    category: Optional[str],
+) -> Transaction:
     # Create/get category if provided
-    if category:
-        category = get_or_create_category(db, category)
+    category_id = get_or_create_category(db, category) if category else None
     
-    # Create transaction
+    amount_cents = to_cents(amount)
     transaction = Transaction(
         date=date,
         description=description,
-        amount=amount,
-        category=category,
+        amount_cents=amount_cents,
+        category_id=category_id,
         account_id=account_id,
+        fingerprint=transaction_fingerprint(account_id, date, amount_cents, description),
     )
     
     db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
-    
+    apply_rollup_deltas(db, [(account_id, category_id, date, amount_cents)])
     return transaction
 
 
-def get_transactions(
-    db: Session,
+def delete_transaction(db: Session, transaction_id: int) -> bool:
+    """Delete a transaction and remove it from the rollups.
+    
+    Returns:
+        bool: True if the transaction existed and was deleted
+    """
+    begin_immediate(db)
+    transaction = db.get(Transaction, transaction_id)
+    if transaction is None:
+        return False
+    
+    apply_rollup_deltas(
+        db,
+        [(
+            transaction.account_id, transaction.category_id,
+            transaction.date, transaction.amount_cents,
+        )],
+        sign=-1,
+    )
+    db.delete(transaction)
+    db.commit()
+    return True
+
+
+def filter_transactions(
+    query: AnySelect,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     category: Optional[str] = None,
     account_id: Optional[int] = None,
-) -> List[Transaction]:
-    """Get transactions with optional filtering."""
-    query = select(Transaction)
-    
+) -> AnySelect:
+    """Apply the standard transaction filters to a select statement."""
     if start_date:
         query = query.where(Transaction.date >= start_date)
     if end_date:
         query = query.where(Transaction.date <= end_date)
     if category:
-        query = query.where(Transaction.category == category)
+        # Uncorrelated, so SQLite evaluates it once and seeks the index
+        category_id = select(Category.id).where(Category.name == category)
+        query = query.where(Transaction.category_id == category_id.scalar_subquery())
     if account_id:
         query = query.where(Transaction.account_id == account_id)
+    return query
+
+
+def get_transactions(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    account_id: Optional[int] = None,
+) -> List[Transaction]:
+    """Get transactions with optional filtering, ordered by date."""
+    query = filter_transactions(
+        select(Transaction), start_date, end_date, category, account_id
+    ).order_by(Transaction.date, Transaction.id)
+    with archive_scope(db, start_date, end_date):
+        return list(db.scalars(query))
+
+
+def iter_transactions(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    account_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: Optional[int] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[Transaction]:
+    """Stream transactions ordered by (date, id) using keyset pagination.
+
+    Each page is a separate indexed query that seeks past the last
+    (date, id) seen, so the first rows arrive in constant time and memory
+    stays bounded by ``page_size`` regardless of ledger size.
+
+    Args:
+        after: Keyset cursor; only transactions after this (date, id) are returned
+        limit: Maximum number of transactions to return
+        page_size: Number of rows fetched per query
+    """
+    query = filter_transactions(
+        select(Transaction), start_date, end_date, category, account_id
+    )
+    with archive_scope(db, start_date, end_date):
+        yield from _iter_pages(
+            query, lambda page_query: db.scalars(page_query).all(), after, limit, page_size
+        )
+
+
+class TransactionRecord(NamedTuple):
+    """A transaction as plain data, for display and reports.
     
-    return list(db.scalars(query))
+    Unlike ``Transaction`` it carries no session state, so building one
+    costs a single tuple allocation.
+    """
+    id: int
+    date: datetime
+    description: str
+    amount_cents: int
+    category: Optional[str]
+    account_id: int
+
+    @property
+    def amount(self) -> Decimal:
+        """The amount in currency units."""
+        return from_cents(self.amount_cents)
+
+
+def record_query() -> AnySelect:
+    """Select the columns of TransactionRecord, with the category name."""
+    return select(
+        Transaction.id,
+        Transaction.date,
+        Transaction.description,
+        Transaction.amount_cents,
+        Category.name,
+        Transaction.account_id,
+    ).outerjoin(Category, Transaction.category_id == Category.id)
+
+
+def get_transaction_records(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    account_id: Optional[int] = None,
+) -> List[TransactionRecord]:
+    """Like get_transactions, but returns lightweight read-only records."""
+    query = filter_transactions(
+        record_query(), start_date, end_date, category, account_id
+    ).order_by(Transaction.date, Transaction.id)
+    with archive_scope(db, start_date, end_date):
+        return [TransactionRecord._make(row) for row in db.connection().execute(query)]
+
+
+def iter_transaction_records(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    account_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: Optional[int] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[TransactionRecord]:
+    """Like iter_transactions, but yields lightweight read-only records."""
+    query = filter_transactions(record_query(), start_date, end_date, category, account_id)
+    with archive_scope(db, start_date, end_date):
+        connection = db.connection()
+        yield from _iter_pages(
+            query,
+            lambda page_query: [TransactionRecord._make(row) for row in connection.execute(page_query)],
+            after, limit, page_size,
+        )
+
+
+def _iter_pages(
+    query: AnySelect,
+    fetch: Callable[[AnySelect], Sequence[Any]],
+    after: Optional[Tuple[datetime, int]],
+    limit: Optional[int],
+    page_size: int,
+) -> Iterator[Any]:
+    """Run a keyset-paginated query in (date, id) order, one page per fetch."""
+    query = query.order_by(Transaction.date, Transaction.id)
+    key = tuple_(Transaction.date, Transaction.id)
+    remaining = limit
+
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        page_query = query if after is None else query.where(key > after)
+        page = fetch(page_query.limit(size))
+
+        yield from page
+
+        if len(page) < size:
+            return
+        after = (page[-1].date, page[-1].id)
+        if remaining is not None:
+            remaining -= len(page)
+
+
+class BatchProgress(NamedTuple):
+    """Progress report emitted after each bulk insert batch."""
+    batch: int
+    batch_rows: int
+    total_rows: int
+    elapsed: float
+    skipped_rows: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total_rows / self.elapsed if self.elapsed else 0.0
+
+
+def resolve_categories(db: Session, names: Set[str]) -> Dict[str, int]:
+    """Get the ids of category names, creating any that do not exist.
+    
+    Known names are served from the category cache; missing ones are added
+    with a single insert.
+    
+    Returns:
+        Dict[str, int]: Category id by name
+    """
+    ids = category_cache.get_ids(db, names)
+    missing = names - ids.keys()
+    if missing:
+        now = datetime.utcnow()
+        table = Category.__table__
+        created = db.execute(
+            table.insert().returning(table.c.name, table.c.id),
+            [{"name": name, "created_at": now} for name in sorted(missing)],
+        )
+        for name, category_id in created:
+            ids[name] = category_id
+            category_cache.add(name, category_id)
+    return ids
+
+
+def bulk_insert_transactions(
+    db: Session,
+    rows: Iterable[Dict[str, Any]],
+    account_id: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[Callable[[BatchProgress], None]] = None,
+    skip_duplicates: bool = False,
+    rules: Optional[RuleSet] = None,
+) -> int:
+    """Insert transactions in batches inside a single database transaction.
+
+    Rows are dicts with ``date``, ``description``, ``amount`` and optionally
+    ``category`` and ``account_id`` keys. ``rows`` may be any iterable, so
+    parsers can stream straight into the database without materializing the
+    whole file. Category names are resolved to ids once per batch, from the
+    category cache, and each batch is written with a single executemany
+    INSERT of plain tuples, run on the driver so SQLAlchemy does not
+    process each row's parameters; dates are converted once per distinct
+    value. The write lock is taken up front, so the import waits for
+    other writers instead of failing when one commits mid-import.
+    
+    With ``skip_duplicates``, rows whose fingerprint the ledger already
+    has are left out, one indexed lookup per batch. A row repeated in the
+    input is only skipped as often as the ledger already has it.
+    
+    Rows without a category are categorized by ``rules`` when given.
+    
+    The search index insert trigger is suspended for the import; each
+    batch is indexed with one INSERT ... SELECT instead, which saves the
+    trigger's per-row statement and category lookup.
+
+    Returns:
+        int: Number of transactions inserted
+    """
+    table = Transaction.__table__
+    rows = iter(rows)
+    total = 0
+    batch_no = 0
+    started = time.perf_counter()
+    duplicates = DuplicateFilter() if skip_duplicates else None
+    begin_immediate(db)
+    connection = db.connection()
+    # The dialect's own conversion, so the rows read back like ORM-written ones
+    to_stored = table.c.date.type.dialect_impl(connection.dialect).bind_processor(
+        connection.dialect
+    )
+    if to_stored is None:
+        raise RuntimeError(f"{connection.dialect.name} has no date conversion")
+    # Statements repeat a small set of dates, so each is converted once
+    stored_date = lru_cache(maxsize=4096)(to_stored)
+
+    with search_triggers_suspended(connection, "insert"):
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+
+            created_at = to_stored(datetime.utcnow())
+            batch = []
+            for row in chunk:
+                row_account_id = row.get("account_id") or account_id
+                if row_account_id is None:
+                    raise ValueError("Transaction has no account_id")
+                amount_cents = to_cents(row["amount"])
+                batch.append({
+                    "date": row["date"],
+                    "description": row["description"],
+                    "amount_cents": amount_cents,
+                    "category": row.get("category"),
+                    "account_id": row_account_id,
+                    "fingerprint": transaction_fingerprint(
+                        row_account_id, row["date"], amount_cents, row["description"]
+                    ),
+                })
+            if duplicates is not None:
+                batch = duplicates.new_rows(db, batch)
+
+            categories = resolve_categories(db, {r["category"] for r in batch if r["category"]})
+            for r in batch:
+                r["category_id"] = categories.get(r.pop("category"))
+                if r["category_id"] is None and rules:
+                    rule = rules.match(r["description"])
+                    if rule is not None:
+                        r["category_id"] = rule.category_id
+
+            if batch:
+                # The write lock is held, so the batch gets the ids above this
+                last_id = db.execute(select(func.max(table.c.id))).scalar() or 0
+                connection.exec_driver_sql(BULK_INSERT_TRANSACTIONS, [
+                    (stored_date(r["date"]), r["description"], r["amount_cents"],
+                     r["category_id"], r["account_id"], created_at, r["fingerprint"])
+                    for r in batch
+                ])
+                db.execute(INDEX_NEW_TRANSACTIONS, {"last_id": last_id})
+                apply_rollup_deltas(
+                    db,
+                    ((r["account_id"], r["category_id"], r["date"], r["amount_cents"]) for r in batch),
+                )
+
+            batch_no += 1
+            total += len(batch)
+            if progress:
+                progress(BatchProgress(
+                    batch_no, len(batch), total, time.perf_counter() - started,
+                    duplicates.skipped if duplicates is not None else 0,
+                ))
+
+    db.commit()
+    return total
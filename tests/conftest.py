@@ -0,0 +1,62 @@
+"""
+Shared fixtures.
+
+The ledger reads its location from the environment at import time, so
+LEDGER_DB points into a temporary directory before any test imports the
+package. Each test gets that directory emptied and the process-wide
+engine and caches reset.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterator
+
+LEDGER_DIR = Path(tempfile.mkdtemp(prefix="ledger-tests-"))
+os.environ["LEDGER_DB"] = str(LEDGER_DIR / "ledger.db")
+for variable in ("LEDGER_CACHE", "LEDGER_CONFIG", "LEDGER_DB_PROFILE", "LEDGER_SOCKET"):
+    os.environ.pop(variable, None)
+
+import pytest
+from sqlalchemy.orm import Session
+
+from ledger import cache, storage
+from ledger.config import DB_PATH
+
+
+def _reset() -> None:
+    if storage._engine is not None:
+        storage._engine.dispose()
+        storage._engine = None
+    for report_cache in cache._caches.values():
+        report_cache.close()
+    cache._caches.clear()
+    storage.category_cache.invalidate()
+
+
+@pytest.fixture
+def ledger_path() -> Iterator[Path]:
+    """Path of an empty ledger file that does not exist yet."""
+    _reset()
+    shutil.rmtree(LEDGER_DIR)
+    LEDGER_DIR.mkdir()
+    yield Path(DB_PATH)
+    _reset()
+
+
+@pytest.fixture
+def db(ledger_path: Path) -> Iterator[Session]:
+    """Session on a new ledger with the current schema."""
+    storage.initialize_database()
+    with Session(storage.get_engine()) as session:
+        yield session
+
+
+@pytest.fixture
+def account_id(db: Session) -> int:
+    return storage.create_bank_account(db, "Checking", "Checking").id
+
+
+def pytest_sessionfinish() -> None:
+    _reset()
+    shutil.rmtree(LEDGER_DIR, ignore_errors=True)
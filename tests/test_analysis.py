@@ -0,0 +1,59 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from ledger.analysis import (
+    get_account_balance, get_category_summary, get_income_expense_summary,
+)
+from ledger.storage import bulk_insert_transactions, create_bank_account
+
+
+def row(day: int, amount: str, category: Optional[str]) -> Dict[str, Any]:
+    return {
+        "date": datetime(2024, 3, day), "description": f"Row {day}",
+        "amount": Decimal(amount), "category": category,
+    }
+
+
+def test_summaries_group_by_category(db: Session, account_id: int) -> None:
+    # Arrange
+    savings = create_bank_account(db, "Savings", "Savings").id
+    bulk_insert_transactions(db, [
+        row(1, "2500.00", "Income"),
+        row(2, "-80.25", "Food"),
+        row(3, "12.50", "Food"),
+        row(4, "-9.99", None),
+        row(20, "-40.00", "Food"),
+    ], account_id)
+    bulk_insert_transactions(db, [row(2, "-1000.00", "Food")], savings)
+
+    # Act
+    spending = get_category_summary(db, end_date=datetime(2024, 3, 10), account_id=account_id)
+    totals = get_income_expense_summary(db, end_date=datetime(2024, 3, 10), account_id=account_id)
+
+    # Assert
+    assert spending == {
+        "Income": Decimal("2500.00"), "Food": Decimal("-67.75"), "Uncategorized": Decimal("-9.99"),
+    }
+    assert totals == {
+        "Income": (Decimal("2500.00"), Decimal("0")),
+        "Food": (Decimal("12.50"), Decimal("-80.25")),
+        "Uncategorized": (Decimal("0"), Decimal("-9.99")),
+    }
+
+
+def test_account_balance_sums_up_to_the_end_date(db: Session, account_id: int) -> None:
+    # Arrange
+    bulk_insert_transactions(db, [row(1, "100.00", None), row(15, "-30.10", None)], account_id)
+
+    # Act
+    balances = [
+        get_account_balance(db, account_id, datetime(2024, 2, 1)),
+        get_account_balance(db, account_id, datetime(2024, 3, 1)),
+        get_account_balance(db, account_id),
+    ]
+
+    # Assert
+    assert balances == [Decimal("0"), Decimal("100.00"), Decimal("69.90")]
@@ -0,0 +1,75 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Tuple
+
+import pytest
+from sqlalchemy.orm import Session
+
+from ledger.analysis import get_income_expense_summary
+from ledger.analytics import (
+    income_expense_summary, load_transactions, monthly_trend, rolling_average, top_merchants,
+)
+from ledger.storage import bulk_insert_transactions
+
+ROWS: List[Tuple[datetime, str, str, str]] = [
+    (datetime(2024, 1, 3), "Payroll", "2000.00", "Income"),
+    (datetime(2024, 1, 9), "Corner Cafe #12", "-4.50", "Food"),
+    (datetime(2024, 1, 20), "Corner Cafe #407", "-5.25", "Food"),
+    (datetime(2024, 3, 2), "Hardware 0042-77", "-60.00", ""),
+    (datetime(2024, 3, 5), "Refund", "12.00", "Food"),
+]
+
+
+@pytest.fixture
+def ledger(db: Session, account_id: int) -> Session:
+    bulk_insert_transactions(db, [
+        {"date": date, "description": description, "amount": Decimal(amount),
+         "category": category or None}
+        for date, description, amount, category in ROWS
+    ], account_id)
+    return db
+
+
+def test_pandas_summary_matches_the_sql_summary(ledger: Session) -> None:
+    # Act
+    frame = load_transactions(ledger)
+
+    # Assert
+    assert income_expense_summary(frame) == get_income_expense_summary(ledger)
+
+
+def test_monthly_trend_fills_empty_months(ledger: Session) -> None:
+    # Arrange
+    frame = load_transactions(ledger, start_date=datetime(2024, 1, 5))
+
+    # Act
+    trend = monthly_trend(frame)
+    average = rolling_average(trend, window=2)
+
+    # Assert
+    assert list(trend.index) == ["2024-01", "2024-02", "2024-03"]
+    assert list(trend["total_cents"]) == [-975, 0, -4800]
+    assert list(trend["count"]) == [2, 0, 2]
+    assert list(average) == [-975, -487.5, -2400]
+
+
+def test_top_merchants_ignore_store_numbers(ledger: Session) -> None:
+    # Arrange
+    frame = load_transactions(ledger, descriptions=True)
+
+    # Act
+    merchants = top_merchants(frame, n=2)
+
+    # Assert
+    assert list(merchants.index) == ["Hardware", "Corner Cafe"]
+    assert list(merchants["spent_cents"]) == [6000, 975]
+    assert list(merchants["count"]) == [1, 2]
+
+
+def test_empty_selection_loads_an_empty_frame(ledger: Session) -> None:
+    # Act
+    frame = load_transactions(ledger, category="Travel")
+
+    # Assert
+    assert frame.empty
+    assert list(frame.columns) == ["date", "amount_cents", "category", "account_id"]
@@ -0,0 +1,201 @@
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ledger.analysis import get_account_balance, get_category_summary
+from ledger import archive
+from ledger.archive import archive_transactions, overlapping_partitions
+from ledger.models import Transaction
+from ledger.search import search_transactions
+from ledger.storage import (
+    bulk_insert_transactions, get_transaction_records, iter_transaction_records,
+)
+
+ROWS = [
+    (datetime(2021, 3, 4), "Hardware store", "-45.00", "Shopping"),
+    (datetime(2021, 12, 31), "Salary", "2000.00", "Income"),
+    (datetime(2022, 6, 15), "Hardware store", "-12.50", "Shopping"),
+    (datetime(2024, 1, 2), "Salary", "2100.00", "Income"),
+    (datetime(2024, 2, 8), "Coffee", "-3.20", "Food"),
+]
+
+
+def read_everything(db: Session, account_id: int) -> Dict[str, Any]:
+    """What `ledger list`, `report` and `search` show, over all years and one."""
+    db.commit()
+    return {
+        "list": get_transaction_records(db),
+        "list 2022": get_transaction_records(db, datetime(2022, 1, 1), datetime(2022, 12, 31)),
+        "paged": list(iter_transaction_records(db, page_size=2)),
+        "summary": get_category_summary(db),
+        "balance 2023": get_account_balance(db, account_id, datetime(2023, 1, 1)),
+        # Sorted, since the equally ranked matches come in table order
+        "search": sorted(r for r, _ in search_transactions(db, "hardware")),
+        "search 2021": sorted(r for r, _ in search_transactions(
+            db, "salary", datetime(2021, 1, 1), datetime(2021, 12, 31)
+        )),
+    }
+
+
+@pytest.fixture
+def ledger_rows(db: Session, account_id: int) -> None:
+    bulk_insert_transactions(db, [
+        {"date": date, "description": description, "amount": Decimal(amount), "category": category}
+        for date, description, amount, category in ROWS
+    ], account_id)
+
+
+def hot_years(db: Session) -> List[str]:
+    year = func.strftime("%Y", Transaction.date)
+    return list(db.scalars(select(year).distinct().order_by(year)))
+
+
+@pytest.mark.usefixtures("ledger_rows")
+def test_archived_years_still_list_report_and_search(db: Session, account_id: int) -> None:
+    # Arrange
+    before = read_everything(db, account_id)
+
+    # Act
+    moved = archive_transactions(db, 2023)
+
+    # Assert
+    assert moved == {2021: 2, 2022: 1}
+    assert hot_years(db) == ["2024"]
+    assert [p.year for p in overlapping_partitions(db)] == [2021, 2022]
+    assert all(Path(p.path).exists() for p in overlapping_partitions(db))
+    assert read_everything(db, account_id) == before
+    counts = [len(before[key]) for key in ("list", "list 2022", "search", "search 2021")]
+    assert counts == [5, 1, 2, 1]
+
+
+@pytest.mark.usefixtures("ledger_rows")
+def test_archiving_again_is_idempotent(db: Session, account_id: int) -> None:
+    # Arrange
+    archive_transactions(db, 2023)
+    before = read_everything(db, account_id)
+
+    # Act
+    moved = archive_transactions(db, 2023)
+
+    # Assert
+    assert moved == {}
+    assert [(p.year, p.rows) for p in overlapping_partitions(db)] == [(2021, 2), (2022, 1)]
+    assert read_everything(db, account_id) == before
+
+
+@pytest.mark.usefixtures("ledger_rows")
+def test_import_skips_rows_already_archived(db: Session, account_id: int) -> None:
+    # Arrange
+    archive_transactions(db, 2023)
+    date, description, amount, category = ROWS[0]
+    statement = [{"date": date, "description": description, "amount": Decimal(amount)}]
+
+    # Act
+    inserted = bulk_insert_transactions(db, statement, account_id, skip_duplicates=True)
+
+    # Assert
+    assert inserted == 0
+    assert len(get_transaction_records(db)) == len(ROWS)
+
+
+class Interrupted(Exception):
+    pass
+
+
+def add_late_row(db: Session, account_id: int) -> None:
+    """A 2021 transaction imported after 2021 was archived, and a newer one."""
+    bulk_insert_transactions(db, [
+        {"date": datetime(2021, 7, 1), "description": "Late refund", "amount": Decimal("9.99")},
+        {"date": datetime(2024, 3, 1), "description": "Coffee", "amount": Decimal("-3.40")},
+    ], account_id)
+
+
+@pytest.mark.usefixtures("ledger_rows")
+def test_archive_interrupted_before_the_ledger_commits_shows_rows_once(
+    db: Session, account_id: int, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Arrange
+    archive_transactions(db, 2023)
+    add_late_row(db, account_id)
+    before = read_everything(db, account_id)
+
+    def crash(*args: Any) -> None:
+        raise Interrupted()
+
+    with monkeypatch.context() as patch:
+        patch.setattr(archive, "search_triggers_suspended", crash)
+        with pytest.raises(Interrupted):
+            archive_transactions(db, 2023)
+    db.rollback()
+    interrupted = read_everything(db, account_id)
+
+    # Act
+    moved = archive_transactions(db, 2023)
+
+    # Assert
+    assert interrupted == before
+    assert moved == {2021: 1}
+    assert read_everything(db, account_id) == before
+    assert [(p.year, p.rows) for p in overlapping_partitions(db)] == [(2021, 3), (2022, 1)]
+
+
+@pytest.mark.usefixtures("ledger_rows")
+def test_archive_interrupted_after_the_ledger_commits_shows_rows_once(
+    db: Session, account_id: int, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Arrange
+    before = read_everything(db, account_id)
+    prepare = archive._prepare_partition
+    calls: List[Any] = []
+
+    def crash_when_settling(engine: Any) -> None:
+        calls.append(engine)
+        if len(calls) == 2:
+            raise Interrupted()
+        prepare(engine)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(archive, "_prepare_partition", crash_when_settling)
+        with pytest.raises(Interrupted):
+            archive_transactions(db, 2023)
+    interrupted = read_everything(db, account_id)
+
+    # Act
+    moved = archive_transactions(db, 2023)
+
+    # Assert
+    assert interrupted == before
+    assert moved == {2022: 1}
+    assert read_everything(db, account_id) == before
+
+
+@pytest.mark.usefixtures("ledger_rows")
+def test_old_archive_files_are_merged_beyond_the_attach_limit(
+    db: Session, account_id: int, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Arrange
+    bulk_insert_transactions(db, [
+        {"date": datetime(year, 5, 1), "description": "Dues", "amount": Decimal("-10")}
+        for year in (2018, 2019, 2020)
+    ], account_id)
+    before = read_everything(db, account_id)
+    monkeypatch.setattr(archive, "_attach_limit", lambda conn: 2)
+
+    # Act
+    moved = archive_transactions(db, 2023)
+
+    # Assert
+    partitions = overlapping_partitions(db)
+    paths = sorted({p.path for p in partitions})
+    assert list(moved) == [2018, 2019, 2020, 2021, 2022]
+    assert [p.year for p in partitions] == list(moved)
+    assert [Path(path).name for path in paths] == ["ledger_2018-2021.db", "ledger_2022.db"]
+    assert sorted(path.name for path in Path(paths[0]).parent.iterdir()) == [
+        Path(path).name for path in paths
+    ]
+    assert read_everything(db, account_id) == before
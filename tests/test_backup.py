@@ -0,0 +1,112 @@
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ledger.backup import backup_database, list_backups, prune_backups, restore_backup
+from ledger.cache import ledger_stamp
+from ledger.models import Transaction
+from ledger.storage import create_transaction
+
+
+def add(db: Session, account_id: int, description: str) -> None:
+    create_transaction(db, datetime(2024, 2, 1), description, Decimal("-1"), account_id)
+
+
+def descriptions(db: Session) -> List[str]:
+    db.rollback()
+    return sorted(db.scalars(select(Transaction.description)))
+
+
+@pytest.mark.parametrize(
+    "compress, incremental",
+    [(False, False), (True, False), (False, True), (True, True)],
+    ids=["full", "gzip", "snapshot", "compressed-snapshot"],
+)
+def test_restore_brings_back_the_backed_up_ledger(
+    db: Session, account_id: int, compress: bool, incremental: bool
+) -> None:
+    # Arrange
+    add(db, account_id, "Before")
+    backup = backup_database(compress=compress, incremental=incremental)
+    add(db, account_id, "After")
+
+    # Act
+    restore_backup(backup)
+
+    # Assert
+    assert descriptions(db) == ["Before"]
+
+
+def test_unchanged_ledger_adds_no_snapshot_chunks(db: Session, account_id: int) -> None:
+    # Arrange
+    first = backup_database(incremental=True)
+    chunk_dir = first.parent / "chunks"
+    chunks = sorted(chunk_dir.glob("*/*"))
+
+    # Act
+    second = backup_database(incremental=True)
+
+    # Assert
+    assert second != first
+    assert sorted(chunk_dir.glob("*/*")) == chunks
+
+
+def test_prune_keeps_the_newest_backups_and_their_chunks(db: Session, account_id: int) -> None:
+    # Arrange
+    backup_database(incremental=True)
+    add(db, account_id, "Rent")
+    backup_database()
+    newest = backup_database(incremental=True)
+
+    # Act
+    removed = prune_backups(keep=2)
+
+    # Assert
+    assert len(removed) == 1
+    assert list_backups()[-1] == newest
+    restore_backup(newest)
+    assert descriptions(db) == ["Rent"]
+
+
+def test_restore_gives_the_ledger_a_new_version_token(db: Session, account_id: int) -> None:
+    # Arrange
+    backup = backup_database()
+    db.commit()
+    before = ledger_stamp(db)
+    db.commit()
+
+    # Act
+    restore_backup(backup)
+
+    # Assert
+    after = ledger_stamp(db)
+    assert before is not None and after is not None
+    assert after[0] != before[0]
+
+
+def test_corrupt_snapshot_is_refused(db: Session, account_id: int) -> None:
+    # Arrange
+    add(db, account_id, "Kept")
+    snapshot = backup_database(incremental=True)
+    chunk = next((snapshot.parent / "chunks").glob("*/*"))
+    chunk.write_bytes(b"garbage")
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="corrupt"):
+        restore_backup(snapshot)
+    assert descriptions(db) == ["Kept"]
+
+
+def test_restore_refuses_files_that_are_not_backups(db: Session, tmp_path: Path) -> None:
+    # Arrange
+    path = tmp_path / "notes.txt"
+    path.write_text("not a ledger")
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="Not a ledger backup"):
+        restore_backup(path)
@@ -0,0 +1,49 @@
+import json
+from pathlib import Path
+
+import pytest
+from sqlalchemy.orm import Session
+
+from benchmarks.hotpaths import compare
+from benchmarks.synthetic import generate_transactions, populate
+from ledger.storage import get_transactions
+
+
+def test_synthetic_ledger_is_reproducible(db: Session) -> None:
+    # Arrange
+    expected = list(generate_transactions(200, [1, 2], years=2, seed=7))
+
+    # Act
+    account_ids = populate(db, 200, accounts=2, years=2, seed=7)
+
+    # Assert
+    stored = sorted(
+        (t.date, t.description, t.amount, t.category, t.account_id)
+        for t in get_transactions(db)
+    )
+    assert account_ids == [1, 2]
+    assert stored == sorted(
+        (r["date"], r["description"], r["amount"], r["category"], r["account_id"])
+        for r in expected
+    )
+
+
+def test_compare_counts_only_slowdowns_past_the_threshold(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    # Arrange
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": {
+        "steady": {"wall_s": 1.0}, "slower": {"wall_s": 1.0}, "faster": {"wall_s": 2.0},
+    }}))
+    results = {
+        "steady": {"wall_s": 1.05}, "slower": {"wall_s": 1.5},
+        "faster": {"wall_s": 1.0}, "new": {"wall_s": 9.0},
+    }
+
+    # Act
+    regressions = compare(results, baseline, threshold=0.1)
+
+    # Assert
+    assert regressions == 1
+    assert "slower" in capsys.readouterr().out.split("REGRESSION")[0]
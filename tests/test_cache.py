@@ -0,0 +1,119 @@
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from ledger.analysis import get_category_summary
+from ledger.cache import ReportCache, get_report_cache, ledger_stamp
+from ledger.models import BankAccount
+from ledger.storage import bulk_insert_transactions, create_bank_account, create_transaction
+
+
+def test_ledger_version_changes_on_every_write(db: Session, account_id: int) -> None:
+    # Arrange
+    db.commit()
+    before = ledger_stamp(db)
+    db.commit()
+
+    # Act
+    create_bank_account(db, "Savings", "Savings")
+
+    # Assert
+    after = ledger_stamp(db)
+    assert before is not None and after is not None
+    assert after[0] == before[0]
+    assert after[1] > before[1]
+
+
+def test_ledger_version_counts_write_transactions_not_rows(
+    db: Session, account_id: int
+) -> None:
+    # Arrange
+    rows = [
+        {"date": datetime(2024, 1, day), "description": f"Fare {day}", "amount": Decimal("-2")}
+        for day in range(1, 29)
+    ]
+    db.commit()
+    before = ledger_stamp(db)
+    db.commit()
+
+    # Act
+    bulk_insert_transactions(db, rows, account_id, batch_size=10)
+    get_category_summary(db)
+    db.commit()
+
+    # Assert
+    after = ledger_stamp(db)
+    assert before is not None and after is not None
+    assert after[1] == before[1] + 1
+
+
+def test_ledger_stamp_is_withheld_during_uncommitted_writes(db: Session, account_id: int) -> None:
+    # Arrange
+    db.execute(update(BankAccount).values(name="Renamed"))
+
+    # Act
+    stamp = ledger_stamp(db)
+
+    # Assert
+    assert stamp is None
+    db.rollback()
+
+
+def test_report_is_served_from_cache_until_the_ledger_changes(db: Session, account_id: int) -> None:
+    # Arrange
+    create_transaction(db, datetime(2024, 1, 3), "Coffee", Decimal("-3.50"), account_id, "Food")
+    db.commit()
+    cache = get_report_cache(db)
+    assert cache is not None
+    first = get_category_summary(db)
+    db.commit()
+
+    # Act
+    repeated = get_category_summary(db)
+    db.commit()
+    hits = cache.stats().hits
+    create_transaction(db, datetime(2024, 1, 4), "Bagel", Decimal("-2.25"), account_id, "Food")
+    changed = get_category_summary(db)
+
+    # Assert
+    assert first == repeated == {"Food": Decimal("-3.50")}
+    assert hits == 1
+    assert changed == {"Food": Decimal("-5.75")}
+    assert cache.stats().hits == 1
+
+
+def test_new_stamp_drops_entries_of_older_ones(tmp_path: Path) -> None:
+    # Arrange
+    cache = ReportCache(tmp_path / "reports.cache", max_size=1024 * 1024)
+    cache.put("summary", ("token", 1), {"Food": 1})
+
+    # Act
+    cache.put("balance", ("token", 2), 42)
+
+    # Assert
+    assert cache.get("summary", ("token", 1)) == (False, None)
+    assert cache.get("balance", ("token", 2)) == (True, 42)
+    assert cache.stats().entries == 1
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path: Path) -> None:
+    # Arrange
+    value = "x" * 400
+    cache = ReportCache(tmp_path / "reports.cache", max_size=1000)
+    stamp = ("token", 1)
+    cache.put("old", stamp, value)
+    cache.put("used", stamp, value)
+    cache.get("old", stamp)
+
+    # Act
+    cache.put("new", stamp, value)
+
+    # Assert
+    assert cache.get("used", stamp)[0] is False
+    assert cache.get("old", stamp)[0] is True
+    assert cache.get("new", stamp)[0] is True
+    cache.close()
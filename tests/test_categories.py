@@ -0,0 +1,85 @@
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ledger.analysis import get_category_summary
+from ledger.config import DB_PATH
+from ledger.models import Category, Transaction
+from ledger.storage import (
+    category_cache, create_transaction, delete_category, get_or_create_category,
+    get_transactions,
+)
+
+
+def test_transactions_reference_one_row_per_category(db: Session, account_id: int) -> None:
+    # Act
+    for day in (1, 2):
+        create_transaction(db, datetime(2024, 3, day), "Gym", Decimal("-30"), account_id, "Fitness")
+
+    # Assert
+    category_ids = db.scalars(select(Transaction.category_id)).all()
+    assert len(set(category_ids)) == 1
+    assert db.scalar(select(func.count()).where(Category.name == "Fitness")) == 1
+    assert [t.category for t in get_transactions(db)] == ["Fitness", "Fitness"]
+
+
+def test_deleting_a_category_uncategorizes_its_transactions(
+    db: Session, account_id: int
+) -> None:
+    # Arrange
+    create_transaction(db, datetime(2024, 3, 1), "Gym", Decimal("-30"), account_id, "Fitness")
+
+    # Act
+    deleted = delete_category(db, "Fitness")
+
+    # Assert
+    assert deleted
+    assert [t.category for t in get_transactions(db)] == [None]
+    assert category_cache.get_id(db, "Fitness") is None
+
+
+def test_default_categories_cannot_be_deleted(db: Session) -> None:
+    # Act / Assert
+    assert not delete_category(db, "Food")
+    assert category_cache.get_id(db, "Food") is not None
+
+
+def test_categories_of_a_rolled_back_transaction_are_forgotten(db: Session) -> None:
+    # Arrange
+    get_or_create_category(db, "Travel")
+
+    # Act
+    db.rollback()
+
+    # Assert
+    assert category_cache.get_id(db, "Travel") is None
+    assert get_or_create_category(db, "Travel") == db.scalar(
+        select(Category.id).where(Category.name == "Travel")
+    )
+
+
+def test_category_added_by_another_process_is_named_in_reports(
+    db: Session, account_id: int
+) -> None:
+    # Arrange
+    create_transaction(db, datetime(2024, 3, 1), "Gym", Decimal("-30"), account_id)
+    create_transaction(db, datetime(2024, 3, 2), "Lunch", Decimal("-12"), account_id, "Food")
+    db.commit()
+    with sqlite3.connect(DB_PATH) as other:
+        other.execute(
+            "INSERT INTO categories (name, created_at) VALUES ('Fitness', '2024-03-01 00:00:00')"
+        )
+        other.execute(
+            "UPDATE transactions SET category_id = "
+            "(SELECT id FROM categories WHERE name = 'Fitness') WHERE description = 'Gym'"
+        )
+    other.close()
+
+    # Act
+    summary = get_category_summary(db)
+
+    # Assert
+    assert summary == {"Fitness": Decimal("-30"), "Food": Decimal("-12")}
@@ -0,0 +1,137 @@
+"""
+Cold-start checks for the `ledger` console script.
+
+Each command runs the real entry point, ledger.client:main, in a fresh
+interpreter against a ledger with no daemon listening, so it takes the
+in-process fallback as a first run does. Budgets cap the cumulative
+import time ``-X importtime`` reports, which tracks what a command loads
+rather than how busy the machine is, at about 1.5 times the measured
+value; LEDGER_STARTUP_SCALE multiplies them on slow runners.
+"""
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Runs per command; the median counts
+RUNS = 5
+
+SCALE = float(os.getenv("LEDGER_STARTUP_SCALE", "1"))
+
+# Modules that must stay out of the lightweight commands
+INTERACTIVE = {"questionary", "prompt_toolkit", "pandas"}
+REPORTING = {"ledger.analysis"}
+
+# (arguments, import time budget in ms, forbidden modules); measured
+# medians were about 200 ms for --help, 530 ms for add and 575 ms for list
+CASES = {
+    "--help": (["--help"], 300, INTERACTIVE | REPORTING | {"sqlalchemy", "ledger.storage"}),
+    "add": (
+        ["add", "1.50", "--description", "startup check", "--account-id", "1"],
+        800,
+        INTERACTIVE | REPORTING,
+    ),
+    "list": (["list", "--limit", "20"], 860, INTERACTIVE | REPORTING),
+}
+
+
+def run(args: List[str], env: Dict[str, str]) -> "subprocess.CompletedProcess[str]":
+    result = subprocess.run(
+        [sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result
+
+
+def import_ms(stderr: str) -> float:
+    """Cumulative import time in ms in ``-X importtime`` output."""
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented and already counted by their parent
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1000
+
+
+def imported_modules(stderr: str) -> Set[str]:
+    """Modules listed in ``-X importtime`` output."""
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in stderr.splitlines()
+        if line.startswith("import time:") and "self [us]" not in line
+    }
+
+
+@pytest.fixture(scope="module")
+def ledger_env(tmp_path_factory: pytest.TempPathFactory) -> Dict[str, str]:
+    """Environment of a new ledger with one account and no daemon."""
+    db_path = tmp_path_factory.mktemp("startup") / "ledger.db"
+    env = {
+        key: value for key, value in os.environ.items()
+        if key not in ("LEDGER_NO_DAEMON", "LEDGER_SOCKET")
+    }
+    env["LEDGER_DB"] = str(db_path)
+    run([
+        "-c",
+        "from ledger.storage import get_db, initialize_database, create_bank_account\n"
+        "initialize_database()\n"
+        "with get_db() as db: create_bank_account(db, 'Checking', 'Checking')",
+    ], env)
+    return env
+
+
+@pytest.fixture(scope="module")
+def import_profiles(ledger_env: Dict[str, str]) -> Dict[str, Tuple[float, Set[str]]]:
+    """Median import time and imported modules of each command."""
+    profiles = {}
+    for name, (args, _, _) in CASES.items():
+        # Compiling bytecode would count as import time, so warm the cache
+        run(["-m", "ledger.client", *args], ledger_env)
+        runs = [
+            run(["-X", "importtime", "-m", "ledger.client", *args], ledger_env).stderr
+            for _ in range(RUNS)
+        ]
+        profiles[name] = (
+            statistics.median(import_ms(stderr) for stderr in runs),
+            set().union(*(imported_modules(stderr) for stderr in runs)),
+        )
+    return profiles
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_startup_imports_within_budget(
+    name: str, import_profiles: Dict[str, Tuple[float, Set[str]]]
+) -> None:
+    # Arrange
+    _, budget, _ = CASES[name]
+
+    # Act
+    elapsed, _ = import_profiles[name]
+
+    # Assert
+    assert elapsed <= budget * SCALE, (
+        f"ledger {name} spent {elapsed:.0f} ms importing; budget {budget * SCALE:.0f} ms"
+    )
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_startup_skips_unneeded_modules(
+    name: str, import_profiles: Dict[str, Tuple[float, Set[str]]]
+) -> None:
+    # Arrange
+    _, _, forbidden = CASES[name]
+
+    # Act
+    _, modules = import_profiles[name]
+
+    # Assert
+    assert forbidden & modules == set()
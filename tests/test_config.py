@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from ledger.config import CONFIG_PATH, PERFORMANCE_PROFILES, get_sqlite_pragmas
+from ledger.storage import create_ledger_engine
+
+
+def write_config(content: str) -> None:
+    Path(CONFIG_PATH).write_text(content, encoding="utf-8")
+
+
+def test_environment_profile_wins_over_the_config_file(
+    ledger_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Arrange
+    write_config("[database]\nprofile = safe\n")
+    monkeypatch.setenv("LEDGER_DB_PROFILE", "fast")
+
+    # Act
+    pragmas = get_sqlite_pragmas()
+
+    # Assert
+    assert pragmas == PERFORMANCE_PROFILES["fast"]
+
+
+def test_config_file_overrides_single_pragmas(ledger_path: Path) -> None:
+    # Arrange
+    write_config("[database]\nprofile = safe\ncache_size = -8192\ntemp_store = memory\n")
+
+    # Act
+    pragmas = get_sqlite_pragmas()
+
+    # Assert
+    assert pragmas == {
+        **PERFORMANCE_PROFILES["safe"], "cache_size": -8192, "temp_store": "MEMORY",
+    }
+
+
+@pytest.mark.parametrize("content, error", [
+    ("[database]\nprofile = reckless\n", "Unknown performance profile"),
+    ("[database]\npage_size = 8192\n", "Unknown database setting 'page_size'"),
+    ("[database]\nsynchronous = 1; DROP\n", "Invalid value for 'synchronous'"),
+], ids=["profile", "setting", "value"])
+def test_bad_config_is_rejected(ledger_path: Path, content: str, error: str) -> None:
+    # Arrange
+    write_config(content)
+
+    # Act / Assert
+    with pytest.raises(ValueError, match=error):
+        get_sqlite_pragmas()
+
+
+def test_engine_applies_the_pragmas_on_connect(ledger_path: Path) -> None:
+    # Arrange
+    engine = create_ledger_engine(pragmas={"journal_mode": "WAL", "synchronous": "OFF"})
+
+    # Act
+    with engine.connect() as conn:
+        journal_mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+        synchronous = conn.execute(text("PRAGMA synchronous")).scalar()
+    engine.dispose()
+
+    # Assert
+    assert (journal_mode, synchronous) == ("wal", 0)
@@ -0,0 +1,170 @@
+import io
+import json
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterator, List, Optional, Tuple
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ledger.client import EXIT, FRAME_HEADER, STDERR, STDOUT, DaemonError, connect, run_remote
+from ledger.daemon import FrameWriter, LedgerDaemon
+from ledger.storage import create_transaction, get_db
+
+
+@pytest.fixture
+def daemon(db: Session) -> Iterator[LedgerDaemon]:
+    """Warm daemon serving the test ledger from a background thread."""
+    # Unix socket paths are short, so not under pytest's tmp_path
+    directory = tempfile.mkdtemp(prefix="ledger-")
+    server = LedgerDaemon(os.path.join(directory, "ledger.sock"))
+    server.warm()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+    shutil.rmtree(directory)
+
+
+def run(server: LedgerDaemon, argv: List[str]) -> Tuple[int, str, str]:
+    sock = connect(server.socket_path)
+    assert sock is not None
+    stdout, stderr = io.BytesIO(), io.BytesIO()
+    code = run_remote(sock, argv, stdout, stderr)
+    return code, stdout.getvalue().decode(), stderr.getvalue().decode()
+
+
+def test_client_copies_output_frames_until_the_exit_code() -> None:
+    # Arrange
+    client, server = socket.socketpair()
+    server.sendall(
+        FRAME_HEADER.pack(STDOUT, 6) + b"hello\n"
+        + FRAME_HEADER.pack(STDERR, 5) + b"oops\n"
+        + FRAME_HEADER.pack(EXIT, 1) + b"3"
+    )
+    stdout, stderr = io.BytesIO(), io.BytesIO()
+
+    # Act
+    code = run_remote(client, ["list"], stdout, stderr)
+
+    # Assert
+    assert code == 3
+    assert stdout.getvalue() == b"hello\n"
+    assert stderr.getvalue() == b"oops\n"
+    assert json.loads(server.makefile("rb").readline())["argv"] == ["list"]
+    server.close()
+
+
+def test_client_forwards_only_the_allowed_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Arrange
+    monkeypatch.setenv("NO_COLOR", "1")
+    monkeypatch.setenv("LEDGER_DB_PROFILE", "fast")
+    monkeypatch.setenv("LEDGER_PRIVATE", "secret")
+    client, server = socket.socketpair()
+    server.sendall(FRAME_HEADER.pack(EXIT, 1) + b"0")
+
+    # Act
+    run_remote(client, ["list"], io.BytesIO(), io.BytesIO())
+
+    # Assert
+    request = json.loads(server.makefile("rb").readline())
+    assert request["env"] == {"NO_COLOR": "1", "LEDGER_DB_PROFILE": "fast"}
+    server.close()
+
+
+def test_client_reports_a_daemon_that_stops_mid_command() -> None:
+    # Arrange
+    client, server = socket.socketpair()
+    server.sendall(FRAME_HEADER.pack(STDOUT, 10) + b"cut")
+    server.shutdown(socket.SHUT_WR)
+
+    # Act / Assert
+    with pytest.raises(DaemonError, match="lost"):
+        run_remote(client, ["list"], io.BytesIO(), io.BytesIO())
+    server.close()
+
+
+def test_served_command_sees_writes_made_after_warm_up(
+    db: Session, account_id: int, daemon: LedgerDaemon
+) -> None:
+    # Arrange
+    create_transaction(db, datetime(2024, 5, 2), "Bakery", Decimal("-4.20"), account_id, "Food")
+
+    # Act
+    code, out, err = run(daemon, ["list", "--limit", "5"])
+
+    # Assert
+    assert code == 0, err
+    assert "Bakery" in out
+
+
+def test_served_write_is_committed_to_the_ledger(account_id: int, daemon: LedgerDaemon) -> None:
+    # Act
+    code, _, err = run(
+        daemon, ["add", "--description", "Cinema", "--account-id", str(account_id), "--", "-12"]
+    )
+    _, out, _ = run(daemon, ["search", "cinema"])
+
+    # Assert
+    assert code == 0, err
+    assert "Cinema" in out
+
+
+def test_usage_error_is_reported_with_its_exit_code(daemon: LedgerDaemon) -> None:
+    # Act
+    code, out, err = run(daemon, ["list", "--no-such-option"])
+
+    # Assert
+    assert code == 2
+    assert out == ""
+    assert "--no-such-option" in err
+
+
+def test_socket_is_private_and_claimed_once(daemon: LedgerDaemon) -> None:
+    # Act
+    mode = stat.S_IMODE(os.stat(daemon.socket_path).st_mode)
+
+    # Assert
+    assert mode == 0o600
+    with pytest.raises(RuntimeError, match="already listening"):
+        LedgerDaemon(daemon.socket_path)
+
+
+def test_served_command_runs_in_the_forwarded_environment(
+    daemon: LedgerDaemon, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Arrange
+    monkeypatch.setenv("NO_COLOR", "1")
+    seen: List[Tuple[Optional[str], Optional[str], int]] = []
+
+    def invoke(argv: List[str]) -> int:
+        with get_db() as db:
+            synchronous = db.execute(text("PRAGMA synchronous")).scalar_one()
+        seen.append((os.getenv("NO_COLOR"), os.getenv("LEDGER_CACHE"), synchronous))
+        return 0
+
+    monkeypatch.setattr(daemon, "_invoke", invoke)
+    client, server = socket.socketpair()
+    stdout, stderr = FrameWriter(server, STDOUT, False), FrameWriter(server, STDERR, False)
+
+    # Act
+    for env in ({"LEDGER_CACHE": "off", "LEDGER_DB_PROFILE": "fast"}, {}):
+        request = {"argv": ["list"], "cwd": os.getcwd(), "env": env}
+        daemon.run_command(request, stdout, stderr)
+
+    # Assert
+    # synchronous is 0 (OFF) in the fast profile and 1 (NORMAL) by default
+    assert seen == [(None, "off", 0), (None, None, 1)]
+    assert os.getenv("NO_COLOR") == "1"
+    assert os.getenv("LEDGER_CACHE") is None
+    client.close()
+    server.close()
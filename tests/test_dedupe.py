@@ -0,0 +1,94 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ledger.dedupe import find_duplicates, merge_duplicates, transaction_fingerprint
+from ledger.storage import bulk_insert_transactions, get_transaction_records
+
+
+def row(day: int, description: str, amount: str, category: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "date": datetime(2024, 5, day), "description": description,
+        "amount": Decimal(amount), "category": category,
+    }
+
+
+def listing(db: Session) -> List[Any]:
+    return [
+        (r.date.day, r.description, r.amount_cents, r.category)
+        for r in get_transaction_records(db)
+    ]
+
+
+def test_fingerprint_ignores_case_spacing_and_time_of_day() -> None:
+    # Act
+    first = transaction_fingerprint(1, datetime(2024, 5, 1, 9, 30), -450, "Corner  Cafe ")
+    second = transaction_fingerprint(1, datetime(2024, 5, 1), -450, "corner cafe")
+
+    # Assert
+    assert first == second
+
+
+def test_fingerprint_tells_apart_accounts_days_and_amounts() -> None:
+    # Arrange
+    base = (1, datetime(2024, 5, 1), -450, "Corner Cafe")
+
+    # Act
+    variants = {
+        transaction_fingerprint(*base),
+        transaction_fingerprint(2, *base[1:]),
+        transaction_fingerprint(1, datetime(2024, 5, 2), *base[2:]),
+        transaction_fingerprint(*base[:2], -451, base[3]),
+    }
+
+    # Assert
+    assert len(variants) == 4
+
+
+def test_import_skips_rows_already_in_the_ledger(db: Session, account_id: int) -> None:
+    # Arrange
+    ledger = [row(1, "Corner Cafe", "-4.50"), row(2, "Rent", "-900")]
+    bulk_insert_transactions(db, ledger, account_id)
+    statement = [
+        row(1, "CORNER CAFE", "-4.50"),
+        row(1, "Corner Cafe", "-4.50"),
+        row(3, "Payroll", "2000"),
+    ]
+
+    # Act
+    inserted = bulk_insert_transactions(db, statement, account_id, skip_duplicates=True)
+
+    # Assert
+    assert inserted == 2
+    assert listing(db) == [
+        (1, "Corner Cafe", -450, None),
+        (1, "Corner Cafe", -450, None),
+        (2, "Rent", -90000, None),
+        (3, "Payroll", 200000, None),
+    ]
+
+
+def test_merge_keeps_the_oldest_and_adopts_a_duplicate_category(
+    db: Session, account_id: int
+) -> None:
+    # Arrange
+    bulk_insert_transactions(db, [
+        row(1, "Corner Cafe", "-4.50"),
+        row(1, "corner  cafe", "-4.50", "Food"),
+        row(1, "Corner Cafe", "-4.50"),
+        row(2, "Corner Cafe", "-4.50"),
+    ], account_id)
+    kept = get_transaction_records(db)[0].id
+
+    # Act
+    groups = list(find_duplicates(db))
+    deleted = merge_duplicates(db, groups)
+    db.commit()
+
+    # Assert
+    assert [(g.keep, len(g.duplicates)) for g in groups] == [(kept, 2)]
+    assert deleted == 2
+    assert listing(db) == [(1, "Corner Cafe", -450, "Food"), (2, "Corner Cafe", -450, None)]
+    assert list(find_duplicates(db)) == []
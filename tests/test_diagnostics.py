@@ -0,0 +1,34 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from typer.testing import CliRunner
+
+from ledger.cli import app
+from ledger.diagnostics import explain_query_plans
+
+
+def test_every_filtered_query_uses_an_index(db: Session) -> None:
+    # Act
+    plans = explain_query_plans(db)
+
+    # Assert
+    assert plans
+    assert [plan.name for plan in plans if plan.is_scan] == []
+
+
+def test_a_missing_index_shows_up_as_a_scan(db: Session) -> None:
+    # Arrange
+    db.execute(text("DROP INDEX ix_transactions_account_id_date"))
+
+    # Act
+    plans = explain_query_plans(db)
+
+    # Assert
+    assert "get_account_balance(account_id)" in [plan.name for plan in plans if plan.is_scan]
+
+
+def test_check_plans_command_passes_on_a_new_ledger(db: Session) -> None:
+    # Act
+    result = CliRunner().invoke(app, ["check-plans"])
+
+    # Assert
+    assert result.exit_code == 0, result.output
@@ -0,0 +1,109 @@
+import csv
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+from sqlalchemy.orm import Session
+
+from ledger.export import export_transactions
+from ledger.storage import bulk_insert_transactions
+
+ROWS = [
+    (datetime(2024, 1, 31), "GROCERY MART", "-42.50", "Food"),
+    (datetime(2024, 2, 1), "Payroll, monthly", "1500.00", None),
+    (datetime(2024, 2, 1), "Coffee \"to go\"", "-3.10", "Food"),
+]
+
+
+@pytest.fixture
+def ledger(db: Session, account_id: int) -> Session:
+    bulk_insert_transactions(db, [
+        {"date": date, "description": description, "amount": Decimal(amount), "category": category}
+        for date, description, amount, category in ROWS
+    ], account_id)
+    return db
+
+
+def exported(records: List[Dict[str, Any]]) -> List[Any]:
+    return [
+        (r["date"], r["description"], Decimal(str(r["amount"])), r["category"] or None)
+        for r in records
+    ]
+
+
+EXPECTED = [(date.strftime("%Y-%m-%d"), d, Decimal(a), c) for date, d, a, c in ROWS]
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"], ids=["plain", "gzip"])
+def test_csv_export_round_trips(
+    ledger: Session, tmp_path: Path, compression: Optional[str]
+) -> None:
+    # Arrange
+    path = tmp_path / "export.csv"
+
+    # Act
+    count = export_transactions(ledger, "csv", path, compression, chunk_size=2)
+
+    # Assert
+    opener = gzip.open if compression else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        records = list(csv.DictReader(f))
+    assert count == 3
+    assert exported(records) == EXPECTED
+    assert {r["account_name"] for r in records} == {"Checking"}
+
+
+def test_jsonl_export_round_trips(ledger: Session, tmp_path: Path) -> None:
+    # Arrange
+    path = tmp_path / "export.jsonl"
+
+    # Act
+    count = export_transactions(ledger, "jsonl", path, chunk_size=2)
+
+    # Assert
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert count == 3
+    assert exported(records) == EXPECTED
+    assert [r["amount"] for r in records] == [amount for _, _, amount, _ in ROWS]
+
+
+def test_parquet_export_round_trips(ledger: Session, tmp_path: Path) -> None:
+    # Arrange
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "export.parquet"
+
+    # Act
+    count = export_transactions(ledger, "parquet", path, chunk_size=2)
+
+    # Assert
+    records = pq.read_table(path).to_pylist()
+    for record in records:
+        record["date"] = record["date"].strftime("%Y-%m-%d")
+    assert count == 3
+    assert exported(records) == EXPECTED
+
+
+def test_export_filters_like_get_transactions(ledger: Session, tmp_path: Path) -> None:
+    # Arrange
+    path = tmp_path / "export.csv"
+
+    # Act
+    count = export_transactions(
+        ledger, "csv", path, start_date=datetime(2024, 2, 1), category="Food"
+    )
+
+    # Assert
+    with open(path, encoding="utf-8", newline="") as f:
+        records = list(csv.DictReader(f))
+    assert count == 1
+    assert exported(records) == EXPECTED[2:]
+
+
+def test_unknown_format_is_rejected(ledger: Session) -> None:
+    # Act / Assert
+    with pytest.raises(ValueError, match="Unknown format 'xml'"):
+        export_transactions(ledger, "xml")
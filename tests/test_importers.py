@@ -0,0 +1,271 @@
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ledger import importers
+from ledger.importers import (
+    StatementParseError, parse_csv, parse_ofx, parse_qif, parse_statement,
+)
+from ledger.search import search_transactions
+from ledger.storage import (
+    BatchProgress, bulk_insert_transactions, create_transaction, get_transactions,
+)
+
+OFX = (
+    "OFXHEADER:100\nDATA:OFXSGML\n\n"
+    "<OFX>\n<BANKTRANLIST>\n"
+    "<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20240131120000[-5:EST]\n<TRNAMT>-42.50\n"
+    "<NAME>GROCERY MART\n<MEMO>Card 1234\n</STMTTRN>\n"
+    "<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20240201\n<TRNAMT>1,500.00\n"
+    "<MEMO>Payroll\n</STMTTRN>\n"
+    "</BANKTRANLIST>\n</OFX>\n"
+)
+
+# The same statement on one line, as many banks produce it
+SINGLE_LINE_OFX = (
+    "OFXHEADER:100\nDATA:OFXSGML\n\n"
+    "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>"
+    "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240131120000[-5:EST]<TRNAMT>-42.50"
+    "<NAME>GROCERY MART<MEMO>Card 1234</STMTTRN>"
+    "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240201<TRNAMT>1,500.00"
+    "<MEMO>Payroll</STMTTRN>"
+    "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+)
+
+
+def write(path: Path, content: str) -> Path:
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+def test_parse_csv_maps_header_aliases_and_amount_formats(tmp_path: Path) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.csv", (
+        "Posted,Payee,Value,Category\n"
+        "2024-01-05,Coffee Shop,$4.75,Food\n"
+        "2024-01-06,Rent,\"(1,200.00)\",\n"
+        "\n"
+    ))
+
+    # Act
+    rows = list(parse_csv(path))
+
+    # Assert
+    assert rows == [
+        {"date": datetime(2024, 1, 5), "description": "Coffee Shop",
+         "amount": Decimal("4.75"), "category": "Food"},
+        {"date": datetime(2024, 1, 6), "description": "Rent",
+         "amount": Decimal("-1200.00"), "category": None},
+    ]
+
+
+def test_parse_csv_rejects_missing_columns(tmp_path: Path) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.csv", "Date,Payee\n2024-01-05,Coffee Shop\n")
+
+    # Act / Assert
+    with pytest.raises(StatementParseError, match="missing required column"):
+        list(parse_csv(path))
+
+
+def test_parse_csv_reports_the_line_of_a_bad_amount(tmp_path: Path) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.csv", (
+        "Date,Payee,Amount\n"
+        "2024-01-05,Coffee,1.00\n"
+        "2024-01-06,Tea,abc\n"
+    ))
+
+    # Act / Assert
+    with pytest.raises(StatementParseError, match=r"statement\.csv:3: invalid amount"):
+        list(parse_csv(path))
+
+
+def test_parse_csv_reports_the_line_of_a_short_row(tmp_path: Path) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.csv", (
+        "Date,Payee,Amount,Category\n"
+        "2024-01-05,Coffee,1.00\n"
+        "2024-01-06,Tea\n"
+    ))
+
+    # Act / Assert
+    with pytest.raises(StatementParseError, match=r"statement\.csv:3:"):
+        list(parse_csv(path))
+
+
+@pytest.mark.parametrize("content", [OFX, SINGLE_LINE_OFX], ids=["multi-line", "single-line"])
+def test_parse_ofx_reads_sgml_transactions(tmp_path: Path, content: str) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.ofx", content)
+
+    # Act
+    rows = list(parse_ofx(path))
+
+    # Assert
+    assert rows == [
+        {"date": datetime(2024, 1, 31), "description": "GROCERY MART",
+         "amount": Decimal("-42.50"), "category": None},
+        {"date": datetime(2024, 2, 1), "description": "Payroll",
+         "amount": Decimal("1500.00"), "category": None},
+    ]
+
+
+def test_parse_ofx_finds_tags_split_across_reads(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.ofx", SINGLE_LINE_OFX)
+    expected = list(parse_ofx(path))
+    monkeypatch.setattr(importers, "OFX_CHUNK_SIZE", 7)
+
+    # Act
+    rows = list(parse_ofx(path))
+
+    # Assert
+    assert rows == expected
+
+
+def test_parse_ofx_rejects_incomplete_transactions(tmp_path: Path) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.ofx", (
+        "<OFX>\n<STMTTRN>\n<NAME>No amount\n</STMTTRN>\n</OFX>\n"
+    ))
+
+    # Act / Assert
+    with pytest.raises(StatementParseError, match=r"statement\.ofx:4: incomplete transaction"):
+        list(parse_ofx(path))
+
+
+def test_parse_ofx_decodes_character_entities(tmp_path: Path) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.ofx", (
+        "<OFX>\n<STMTTRN>\n<DTPOSTED>20240131\n<TRNAMT>-9.99\n"
+        "<NAME>B&amp;Q &lt;Online&gt; &#39;DIY&#39;\n</STMTTRN>\n</OFX>\n"
+    ))
+
+    # Act
+    rows = list(parse_ofx(path))
+
+    # Assert
+    assert [row["description"] for row in rows] == ["B&Q <Online> 'DIY'"]
+
+
+def test_parse_qif_reads_dates_payees_and_categories(tmp_path: Path) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.qif", (
+        "!Type:Bank\n"
+        "D1/31'24\nT-42.50\nPGrocery Mart\nLFood\n^\n"
+        "D2024-02-01\nU1,500.00\nMPayroll\n^\n"
+    ))
+
+    # Act
+    rows = list(parse_qif(path))
+
+    # Assert
+    assert rows == [
+        {"date": datetime(2024, 1, 31), "description": "Grocery Mart",
+         "amount": Decimal("-42.50"), "category": "Food"},
+        {"date": datetime(2024, 2, 1), "description": "Payroll",
+         "amount": Decimal("1500.00"), "category": None},
+    ]
+
+
+def test_parse_qif_keeps_a_last_record_without_its_end_marker(tmp_path: Path) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.qif", (
+        "!Type:Bank\nD1/31'24\nT-42.50\nPGrocery Mart\n^\nD2/1'24\nT-3.00\nPCoffee"
+    ))
+
+    # Act
+    rows = list(parse_qif(path))
+
+    # Assert
+    assert [(row["description"], row["amount"]) for row in rows] == [
+        ("Grocery Mart", Decimal("-42.50")), ("Coffee", Decimal("-3.00")),
+    ]
+
+
+@pytest.mark.parametrize(
+    "record, line",
+    [("D1/31'24\nT\nPNo amount\n^\n", 5), ("D1/31'24\nPNo amount", 3)],
+    ids=["empty-amount", "unterminated"],
+)
+def test_parse_qif_reports_where_a_record_has_no_amount(
+    tmp_path: Path, record: str, line: int
+) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.qif", "!Type:Bank\n" + record)
+
+    # Act / Assert
+    with pytest.raises(
+        StatementParseError, match=rf"statement\.qif:{line}: incomplete transaction"
+    ):
+        list(parse_qif(path))
+
+
+def test_parse_statement_rejects_unknown_extensions(tmp_path: Path) -> None:
+    # Arrange
+    path = write(tmp_path / "statement.txt", "")
+
+    # Act / Assert
+    with pytest.raises(StatementParseError, match="cannot detect format"):
+        parse_statement(path)
+
+
+@pytest.mark.parametrize("name, content", [
+    ("statement.csv", (
+        "Date,Description,Amount,Category\n"
+        "2024-01-31,GROCERY MART,-42.50,Food\n"
+        "2024-02-01,Payroll,1500.00,Income\n"
+    )),
+    ("statement.ofx", OFX),
+], ids=["csv", "ofx"])
+def test_imported_statement_is_listed_and_searchable(
+    tmp_path: Path, db: Session, account_id: int, name: str, content: str
+) -> None:
+    # Arrange
+    path = write(tmp_path / name, content)
+    progress: List[BatchProgress] = []
+
+    # Act
+    inserted = bulk_insert_transactions(
+        db, parse_statement(path), account_id, batch_size=1, progress=progress.append
+    )
+
+    # Assert
+    records = sorted(get_transactions(db, account_id=account_id), key=lambda t: t.date)
+    assert inserted == 2
+    assert [p.total_rows for p in progress] == [1, 2]
+    assert [(r.date, r.description, r.amount) for r in records] == [
+        (datetime(2024, 1, 31), "GROCERY MART", Decimal("-42.50")),
+        (datetime(2024, 2, 1), "Payroll", Decimal("1500.00")),
+    ]
+    assert [r.description for r, _ in search_transactions(db, "grocery")] == ["GROCERY MART"]
+
+
+def test_bulk_inserted_dates_are_stored_like_orm_written_ones(
+    db: Session, account_id: int
+) -> None:
+    # Arrange
+    date = datetime(2024, 3, 9, 14, 30)
+    create_transaction(db, date, "Written", Decimal("-1.00"), account_id)
+
+    # Act
+    bulk_insert_transactions(
+        db, [{"date": date, "description": "Imported", "amount": Decimal("-1.00")}], account_id
+    )
+
+    # Assert
+    stored = db.execute(
+        text("SELECT description, date, typeof(created_at) FROM transactions ORDER BY id")
+    ).all()
+    assert stored == [
+        ("Written", "2024-03-09 14:30:00.000000", "text"),
+        ("Imported", "2024-03-09 14:30:00.000000", "text"),
+    ]
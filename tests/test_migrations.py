@@ -0,0 +1,208 @@
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from typer.testing import CliRunner
+
+from ledger import migrations
+from ledger.cli import app
+from ledger.dedupe import transaction_fingerprint
+from ledger.migrations import MigrationProgress
+from ledger.storage import (
+    get_bank_accounts, get_engine, get_transaction_records, migrate_database,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# The revision before the table rebuilds with batched data steps
+BEFORE_REBUILDS = "d3a5c7e9f1b2"
+# The revision before transactions have fingerprints
+BEFORE_FINGERPRINTS = "b2e7c4f9a1d6"
+
+ROWS = 30
+BATCH_SIZE = 4
+
+
+class Interrupted(Exception):
+    pass
+
+
+def alembic_config() -> Config:
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def upgrade(revision: str) -> None:
+    command.upgrade(alembic_config(), revision)
+
+
+def revision(path: Path) -> Optional[str]:
+    with sqlite3.connect(path) as conn:
+        row = conn.execute("SELECT version_num FROM alembic_version").fetchone()
+    return None if row is None else str(row[0])
+
+
+def category(i: int) -> str:
+    return ("Food", "Rent", "Fun")[i % 3]
+
+
+def interrupt(progress: MigrationProgress) -> None:
+    raise Interrupted()
+
+
+def checkpoint(path: Path, step: str) -> Tuple[int, Optional[str]]:
+    with sqlite3.connect(path) as conn:
+        row = conn.execute(
+            "SELECT rows_done, finished_at FROM migration_checkpoints WHERE step = ?", (step,)
+        ).fetchone()
+    return row[0], row[1]
+
+
+@pytest.fixture
+def unconverted_ledger(ledger_path: Path) -> Path:
+    """A ledger at BEFORE_REBUILDS: category names and decimal amounts."""
+    upgrade(BEFORE_REBUILDS)
+    conn = sqlite3.connect(ledger_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO bank_accounts (name, account_type, created_at) "
+            "VALUES ('Checking', 'Checking', '2024-01-01 00:00:00')"
+        )
+        conn.executemany(
+            "INSERT INTO transactions "
+            "(date, description, amount, category, account_id, created_at) "
+            "VALUES (?, ?, ?, ?, 1, '2024-01-01 00:00:00')",
+            [(f"2024-01-{i % 28 + 1:02d} 00:00:00", f"Purchase {i}", f"-{i}.05", category(i))
+             for i in range(ROWS)],
+        )
+    conn.close()
+    return ledger_path
+
+
+@pytest.fixture
+def old_ledger(ledger_path: Path) -> Path:
+    """A ledger at BEFORE_FINGERPRINTS with ROWS transactions."""
+    upgrade(BEFORE_FINGERPRINTS)
+    conn = sqlite3.connect(ledger_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO bank_accounts (name, account_type, created_at) "
+            "VALUES ('Checking', 'Checking', '2024-01-01 00:00:00')"
+        )
+        conn.executemany(
+            "INSERT INTO transactions "
+            "(date, description, amount_cents, account_id, created_at) "
+            "VALUES (?, ?, ?, 1, '2024-01-01 00:00:00')",
+            [(f"2024-01-{i % 28 + 1:02d} 00:00:00", f"Purchase {i}", -100 * i - 5)
+             for i in range(ROWS)],
+        )
+    conn.close()
+    return ledger_path
+
+
+def test_interrupted_fingerprint_backfill_resumes_where_it_stopped(
+    old_ledger: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Arrange
+    monkeypatch.setattr(migrations, "PROGRESS_INTERVAL", 0)
+    with pytest.raises(Interrupted):
+        migrate_database(batch_size=BATCH_SIZE, pause=0, progress=interrupt)
+    stopped = checkpoint(old_ledger, "c5f8e2a7d9b3:fingerprints")
+
+    # Act
+    result = CliRunner().invoke(app, ["migrate", "--batch-size", str(BATCH_SIZE), "--pause", "0"])
+
+    # Assert
+    assert stopped == (BATCH_SIZE, None)
+    assert result.exit_code == 0, result.output
+    assert f"c5f8e2a7d9b3:fingerprints: {ROWS:,}/{ROWS:,} rows" in result.output
+    assert "Ledger is up to date" in result.output
+    assert "migration_checkpoints" not in inspect(get_engine()).get_table_names()
+    with sqlite3.connect(old_ledger) as conn:
+        rows = conn.execute(
+            "SELECT account_id, date, amount_cents, description, fingerprint FROM transactions"
+        ).fetchall()
+    assert len(rows) == ROWS
+    for account_id, date, amount_cents, description, fingerprint in rows:
+        expected = transaction_fingerprint(
+            account_id, datetime.strptime(date[:10], "%Y-%m-%d"), amount_cents, description
+        )
+        assert fingerprint == expected
+
+
+def test_interrupted_table_rebuild_resumes_where_it_stopped(
+    unconverted_ledger: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Arrange
+    monkeypatch.setattr(migrations, "PROGRESS_INTERVAL", 0)
+    with pytest.raises(Interrupted):
+        migrate_database(batch_size=BATCH_SIZE, pause=0, progress=interrupt)
+    stopped = checkpoint(unconverted_ledger, "e4b8d2f6a1c3:category_ids")
+
+    # Act
+    result = CliRunner().invoke(app, ["migrate", "--batch-size", str(BATCH_SIZE), "--pause", "0"])
+
+    # Assert
+    assert stopped == (BATCH_SIZE, None)
+    assert result.exit_code == 0, result.output
+    assert f"e4b8d2f6a1c3:category_ids: {ROWS:,}/{ROWS:,} rows" in result.output
+    assert "Ledger is up to date" in result.output
+    with Session(get_engine()) as db:
+        records = get_transaction_records(db)
+    assert sorted((r.description, r.amount, r.category) for r in records) == sorted(
+        (f"Purchase {i}", Decimal(f"-{i}.05"), category(i)) for i in range(ROWS)
+    )
+
+
+def test_migrate_runs_no_data_steps_on_an_up_to_date_ledger(ledger_path: Path) -> None:
+    # Arrange
+    upgrade("head")
+
+    # Act
+    result = CliRunner().invoke(app, ["migrate"])
+
+    # Assert
+    assert result.exit_code == 0, result.output
+    assert " rows, " not in result.output
+    assert "Ledger is up to date" in result.output
+
+
+def test_initialized_ledger_is_stamped_and_migrates_cleanly(
+    db: Session, account_id: int, ledger_path: Path
+) -> None:
+    # Arrange
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+    # Act
+    result = CliRunner().invoke(app, ["migrate"])
+
+    # Assert
+    assert result.exit_code == 0, result.output
+    assert "Ledger is up to date" in result.output
+    assert revision(ledger_path) == head
+
+
+def test_unversioned_ledger_with_the_current_schema_is_stamped(
+    db: Session, account_id: int, ledger_path: Path
+) -> None:
+    # Arrange
+    with sqlite3.connect(ledger_path) as conn:
+        conn.execute("DROP TABLE alembic_version")
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+    # Act
+    migrate_database()
+
+    # Assert
+    assert revision(ledger_path) == head
+    assert [a.name for a in get_bank_accounts(db)] == ["Checking"]
@@ -0,0 +1,72 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Union
+
+import pytest
+from sqlalchemy.orm import Session
+from typer.testing import CliRunner
+
+from ledger.analysis import get_account_balance
+from ledger.cli import app
+from ledger.money import format_cents, from_cents, parse_amount, to_cents
+from ledger.storage import bulk_insert_transactions, get_transactions
+
+
+@pytest.mark.parametrize("value, cents", [
+    (Decimal("12.34"), 1234),
+    ("-0.005", -1),
+    ("0.004", 0),
+    (0.1, 10),
+    (7, 700),
+    ("92233720368547758.07", 2**63 - 1),
+])
+def test_to_cents_rounds_half_away_from_zero(
+    value: Union[Decimal, int, float, str], cents: int
+) -> None:
+    # Act / Assert
+    assert to_cents(value) == cents
+
+
+@pytest.mark.parametrize("value", ["abc", "NaN", "Infinity", ""])
+def test_to_cents_rejects_non_numbers(value: str) -> None:
+    # Act / Assert
+    with pytest.raises(ValueError, match="Invalid amount"):
+        to_cents(value)
+
+
+def test_from_cents_and_parse_amount_keep_two_places() -> None:
+    # Act / Assert
+    assert str(from_cents(-450)) == "-4.50"
+    assert from_cents(None) == Decimal("0")
+    assert str(parse_amount(" 19.999 ")) == "20.00"
+
+
+@pytest.mark.parametrize("cents", [0, 5, -5, 99, -100, 123456, -2**63])
+def test_format_cents_matches_the_decimal_amount(cents: int) -> None:
+    # Act / Assert
+    assert format_cents(cents) == str(from_cents(cents))
+
+
+def test_large_balances_are_exact(db: Session, account_id: int) -> None:
+    # Arrange
+    bulk_insert_transactions(db, [
+        {"date": datetime(2024, 1, day), "description": "Transfer",
+         "amount": Decimal("9999999999.99")}
+        for day in range(1, 11)
+    ] + [{"date": datetime(2024, 1, 11), "description": "Fee", "amount": Decimal("-0.01")}],
+        account_id)
+
+    # Act
+    balance = get_account_balance(db, account_id)
+
+    # Assert
+    assert balance == Decimal("99999999999.89")
+
+
+def test_add_stores_the_typed_amount_exactly(db: Session, account_id: int) -> None:
+    # Act
+    result = CliRunner().invoke(app, ["add", "--description", "Tea", "--", "-0.29"])
+
+    # Assert
+    assert result.exit_code == 0, result.output
+    assert [t.amount for t in get_transactions(db)] == [Decimal("-0.29")]
@@ -0,0 +1,77 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import Session
+
+from ledger.cli import parse_cursor
+from ledger.storage import (
+    TransactionRecord, bulk_insert_transactions, get_transaction_records, get_transactions,
+    iter_transaction_records, iter_transactions,
+)
+
+
+@pytest.fixture
+def ledger(db: Session, account_id: int) -> Session:
+    """Seven transactions, several of them sharing a date."""
+    bulk_insert_transactions(db, [
+        {"date": datetime(2024, 1, day), "description": f"Row {i}", "amount": Decimal(i),
+         "category": "Food" if i % 2 else None}
+        for i, day in enumerate([3, 1, 3, 3, 2, 3, 5])
+    ], account_id)
+    return db
+
+
+def test_pages_cover_every_row_once_across_tied_dates(ledger: Session) -> None:
+    # Act
+    streamed = [t.id for t in iter_transactions(ledger, page_size=2)]
+
+    # Assert
+    assert streamed == [t.id for t in get_transactions(ledger)]
+    assert len(set(streamed)) == 7
+
+
+def test_limit_and_cursor_resume_inside_a_run_of_equal_dates(ledger: Session) -> None:
+    # Arrange
+    first = list(iter_transactions(ledger, limit=3, page_size=2))
+    last = first[-1]
+
+    # Act
+    rest = list(iter_transactions(ledger, after=(last.date, last.id), page_size=2))
+
+    # Assert
+    assert last.date == datetime(2024, 1, 3)
+    assert [t.id for t in first + rest] == [t.id for t in get_transactions(ledger)]
+
+
+def test_bare_date_cursor_skips_the_whole_day(ledger: Session) -> None:
+    # Act
+    rest = list(iter_transactions(ledger, after=parse_cursor("2024-01-03")))
+
+    # Assert
+    assert [t.date for t in rest] == [datetime(2024, 1, 5)]
+
+
+def test_records_hold_the_same_data_as_transactions(ledger: Session) -> None:
+    # Act
+    records = get_transaction_records(ledger)
+
+    # Assert
+    assert records == [
+        TransactionRecord(t.id, t.date, t.description, t.amount_cents, t.category, t.account_id)
+        for t in get_transactions(ledger)
+    ]
+    assert [r.amount for r in records] == [t.amount for t in get_transactions(ledger)]
+
+
+def test_record_pages_resume_inside_a_run_of_equal_dates(ledger: Session) -> None:
+    # Arrange
+    first = list(iter_transaction_records(ledger, limit=4, page_size=3))
+    last = first[-1]
+
+    # Act
+    rest = list(iter_transaction_records(ledger, after=(last.date, last.id), page_size=2))
+
+    # Assert
+    assert last.date == datetime(2024, 1, 3)
+    assert first + rest == get_transaction_records(ledger)
@@ -0,0 +1,106 @@
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from sqlalchemy import Engine, create_engine, text
+from typer.testing import CliRunner
+
+from ledger.cli import app
+from ledger.profiling import N_PLUS_ONE_THRESHOLD, REPEAT_THRESHOLD, QueryProfiler
+
+LOOKUP = "SELECT name FROM items WHERE id = :id"
+
+
+@pytest.fixture
+def engine() -> Iterator[Engine]:
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(
+            text("INSERT INTO items (id, name) VALUES (:id, :name)"),
+            [{"id": i, "name": f"item {i}"} for i in range(20)],
+        )
+    yield engine
+    engine.dispose()
+
+
+def test_statements_are_counted_with_their_rows(engine: Engine) -> None:
+    # Arrange
+    profiler = QueryProfiler()
+    profiler.start()
+
+    # Act
+    with engine.connect() as conn:
+        conn.execute(text("SELECT id FROM items")).fetchall()
+        conn.execute(text("SELECT id FROM items")).fetchall()
+    profiler.stop()
+
+    # Assert
+    [stats] = profiler.statements()
+    assert stats.executions == 2
+    assert stats.rows == 40
+    assert profiler.connections == 1
+
+
+def test_lookups_in_a_loop_are_flagged_as_n_plus_one(engine: Engine) -> None:
+    # Arrange
+    profiler = QueryProfiler()
+    profiler.start()
+
+    # Act
+    with engine.connect() as conn:
+        for i in range(N_PLUS_ONE_THRESHOLD):
+            conn.execute(text(LOOKUP), {"id": i}).fetchone()
+    profiler.stop()
+
+    # Assert
+    assert [s.statement for s in profiler.n_plus_one()] == [LOOKUP.replace(":id", "?")]
+    assert profiler.repeated() == []
+    assert any(line.startswith("N+1:") for line in profiler.summary())
+
+
+def test_identical_queries_are_flagged_as_repeated(engine: Engine) -> None:
+    # Arrange
+    profiler = QueryProfiler()
+    profiler.start()
+
+    # Act
+    with engine.connect() as conn:
+        for _ in range(REPEAT_THRESHOLD):
+            conn.execute(text(LOOKUP), {"id": 1}).fetchone()
+    profiler.stop()
+
+    # Assert
+    [stats] = profiler.repeated()
+    assert stats.max_repeats == REPEAT_THRESHOLD
+    assert profiler.n_plus_one() == []
+
+
+def test_stopped_profiler_records_nothing(engine: Engine) -> None:
+    # Arrange
+    profiler = QueryProfiler()
+    profiler.start()
+    profiler.stop()
+
+    # Act
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    # Assert
+    assert profiler.statements() == []
+
+
+def test_profile_flag_prints_summary_and_writes_python_profile(
+    account_id: int, tmp_path: Path
+) -> None:
+    # Arrange
+    output = tmp_path / "list.prof"
+
+    # Act
+    result = CliRunner().invoke(app, ["--profile-output", str(output), "list"])
+
+    # Assert
+    assert result.exit_code == 0, result.output
+    assert "Profile:" in result.output
+    assert "queries in" in result.output
+    assert output.stat().st_size > 0
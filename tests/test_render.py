@@ -0,0 +1,99 @@
+import io
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+import click
+import pytest
+from colorama import Fore
+from rich.console import Console
+from sqlalchemy.orm import Session
+from typer.testing import CliRunner
+
+from ledger.cli import app
+from ledger.render import (
+    VIEWPORT_CHROME, Cursor, TransactionViewport, batch_lines, transaction_line, write_chunks,
+)
+from ledger.storage import TransactionRecord, bulk_insert_transactions
+
+RECORDS = [
+    TransactionRecord(i, datetime(2024, 1, 1 + i // 3), f"Shop {i}", -100 * i, None, 1)
+    for i in range(1, 11)
+]
+
+
+def test_transaction_line_formats_amount_and_category() -> None:
+    # Arrange
+    record = TransactionRecord(7, datetime(2024, 3, 9, 14, 30), "Rent", -90005, "Housing", 1)
+
+    # Act
+    plain = transaction_line(record, color=False)
+    colored = transaction_line(record, color=True)
+
+    # Assert
+    assert plain == "2024-03-09 | Rent | $900.05 | Housing"
+    assert Fore.RED in colored and "$900.05" in colored
+
+
+def test_batch_lines_joins_lines_into_terminated_chunks() -> None:
+    # Act
+    chunks = list(batch_lines((f"line {i}" for i in range(5)), batch_size=2))
+
+    # Assert
+    assert chunks == ["line 0\nline 1\n", "line 2\nline 3\n", "line 4\n"]
+
+
+def test_write_chunks_writes_each_chunk_once(capsys: pytest.CaptureFixture[str]) -> None:
+    # Act
+    write_chunks(iter(["a\nb\n", "c\n"]), color=False)
+
+    # Assert
+    assert capsys.readouterr().out == "a\nb\nc\n"
+
+
+def test_viewport_fetches_one_page_per_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Arrange
+    page_size = 4
+    console = Console(file=io.StringIO(), height=page_size + VIEWPORT_CHROME, width=80)
+    fetched: List[Optional[Cursor]] = []
+
+    def fetch(after: Optional[Cursor], limit: int) -> List[TransactionRecord]:
+        fetched.append(after)
+        rows = [r for r in RECORDS if after is None or (r.date, r.id) > after]
+        return rows[:limit]
+
+    keys: Iterator[str] = iter(["n", "n", "n", "p", "q"])
+    monkeypatch.setattr(click, "getchar", lambda: next(keys))
+
+    # Act
+    TransactionViewport(fetch, console=console).run()
+
+    # Assert
+    first, second = RECORDS[3], RECORDS[7]
+    assert fetched == [
+        None,
+        (first.date, first.id),
+        (second.date, second.id),
+        # No page after the third, so "n" showed it again
+        (second.date, second.id),
+        (first.date, first.id),
+    ]
+
+
+def test_list_prints_a_cursor_when_the_limit_is_reached(db: Session, account_id: int) -> None:
+    # Arrange
+    bulk_insert_transactions(db, [
+        {"date": r.date, "description": r.description, "amount": r.amount} for r in RECORDS
+    ], account_id)
+
+    # Act
+    result = CliRunner().invoke(app, ["list", "--limit", "3"])
+
+    # Assert
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    assert lines[:3] == [
+        "2024-01-01 | Shop 1 | $1.00",
+        "2024-01-01 | Shop 2 | $2.00",
+        "2024-01-02 | Shop 3 | $3.00",
+    ]
+    assert lines[3].startswith("More results may follow: --after 2024-01-02:")
@@ -0,0 +1,225 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from ledger.analysis import (
+    PeriodSummary, get_account_balance, get_balance_series, get_period_summary,
+)
+from ledger.dedupe import find_duplicates, merge_duplicates
+from ledger.models import BalanceCheckpoint, MonthlyRollup, Transaction
+from ledger.rollups import apply_checkpoint_deltas, rebuild_rollups
+from ledger.rules import Rule, RuleSet, categorize_transactions
+from ledger.storage import (
+    add_transaction, bulk_insert_transactions, create_bank_account, create_transaction,
+    delete_category, delete_transaction, get_engine, get_or_create_category,
+)
+
+DATES = [datetime(2023, 11, 30), datetime(2024, 1, 15), datetime(2024, 2, 29), datetime(2024, 4, 1)]
+
+
+def rollup_state(db: Session) -> Tuple[List[Any], List[Any]]:
+    """Every monthly rollup and balance checkpoint, in key order."""
+    rollups, checkpoints = (
+        list(db.execute(select(table).order_by(*table.primary_key)).all())
+        for table in (MonthlyRollup.__table__, BalanceCheckpoint.__table__)
+    )
+    return rollups, checkpoints
+
+
+def scanned_balance(db: Session, account_id: int, end_date: datetime) -> Decimal:
+    total = db.execute(
+        select(func.coalesce(func.sum(Transaction.amount_cents), 0))
+        .where(Transaction.account_id == account_id, Transaction.date <= end_date)
+    ).scalar_one()
+    return Decimal(total) / 100
+
+
+def checkpoint_total(db: Session, account_id: int, period: str) -> int:
+    return db.execute(
+        select(BalanceCheckpoint.balance_cents)
+        .where(BalanceCheckpoint.account_id == account_id, BalanceCheckpoint.period == period)
+    ).scalar_one()
+
+
+def import_rows(db: Session, account_id: int, rows: List[Tuple[datetime, str, str]]) -> None:
+    bulk_insert_transactions(db, [
+        {"date": date, "description": description, "amount": Decimal(amount)}
+        for date, description, amount in rows
+    ], account_id)
+
+
+def add(db: Session, account_id: int) -> None:
+    db.commit()
+    add_transaction(datetime(2024, 1, 20), "Refund", Decimal("12.34"), account_id, "Shopping")
+    add_transaction(datetime(2023, 10, 2), "Late entry", Decimal("-7.00"), account_id)
+
+
+def create_in_an_earlier_month(db: Session, account_id: int) -> None:
+    create_transaction(
+        db, datetime(2023, 9, 1), "Opening deposit", Decimal("500"), account_id, "Income"
+    )
+
+
+def delete(db: Session, account_id: int) -> None:
+    first = db.scalar(select(Transaction.id).order_by(Transaction.date))
+    assert first is not None
+    delete_transaction(db, first)
+
+
+def import_more(db: Session, account_id: int) -> None:
+    import_rows(db, account_id, [
+        (datetime(2024, 1, 20), "Refund", "12.34"),
+        (datetime(2023, 10, 2), "Late entry", "-7.00"),
+    ])
+
+
+def import_across_new_months(db: Session, account_id: int) -> None:
+    import_rows(db, account_id, [
+        (datetime(2024, 5, 2), "Bonus", "400.00"),
+        (datetime(2023, 12, 24), "Gifts", "-150.00"),
+        (datetime(2024, 2, 14), "Flowers", "-35.50"),
+        (datetime(2023, 9, 30), "Opening deposit", "1000.00"),
+        (datetime(2024, 2, 1), "Zero-rated fee", "0.00"),
+    ])
+
+
+def categorize(db: Session, account_id: int) -> None:
+    food = get_or_create_category(db, "Food")
+    categorize_transactions(db, RuleSet([Rule(1, "grocer", False, food, "Food", 0)]))
+    db.commit()
+
+
+def drop_category(db: Session, account_id: int) -> None:
+    bulk_insert_transactions(db, [
+        {"date": datetime(2024, 2, 3), "description": "Gym", "amount": Decimal("-30"),
+         "category": "Fitness"},
+    ], account_id)
+    assert delete_category(db, "Fitness")
+
+
+def merge(db: Session, account_id: int) -> None:
+    import_rows(db, account_id, [(datetime(2024, 1, 5), "Grocer", "-25.10")])
+    merge_duplicates(db, find_duplicates(db))
+    db.commit()
+
+
+WRITES: Dict[str, Callable[[Session, int], None]] = {
+    "add": add,
+    "create": create_in_an_earlier_month,
+    "delete": delete,
+    "import": import_more,
+    "import across new months": import_across_new_months,
+    "categorize": categorize,
+    "delete category": drop_category,
+    "merge duplicates": merge,
+}
+
+
+@pytest.fixture
+def accounts(db: Session, account_id: int) -> List[int]:
+    savings = create_bank_account(db, "Savings", "Savings").id
+    import_rows(db, account_id, [
+        (datetime(2023, 11, 3), "Salary", "2500.00"),
+        (datetime(2023, 11, 30), "Grocer", "-80.25"),
+        (datetime(2024, 1, 5), "Grocer", "-25.10"),
+        (datetime(2024, 3, 9), "Rent", "-1200.00"),
+    ])
+    import_rows(db, savings, [
+        (datetime(2023, 12, 1), "Transfer in", "300.00"),
+        (datetime(2024, 2, 29), "Interest", "0.42"),
+    ])
+    return [account_id, savings]
+
+
+@pytest.mark.parametrize("write", WRITES)
+def test_incremental_rollups_match_a_rebuild(db: Session, accounts: List[int], write: str) -> None:
+    # Arrange
+    WRITES[write](db, accounts[0])
+    incremental = rollup_state(db)
+
+    # Act
+    rebuild_rollups(db)
+
+    # Assert
+    assert rollup_state(db) == incremental
+
+
+@pytest.mark.parametrize("write", WRITES)
+def test_checkpoint_balances_match_a_full_scan(
+    db: Session, accounts: List[int], write: str
+) -> None:
+    # Arrange
+    WRITES[write](db, accounts[0])
+
+    # Act
+    balances = {
+        (account_id, date): get_account_balance(db, account_id, date)
+        for account_id in accounts for date in DATES
+    }
+
+    # Assert
+    assert balances == {
+        (account_id, date): scanned_balance(db, account_id, date)
+        for account_id in accounts for date in DATES
+    }
+
+
+def test_balance_series_answers_unordered_dates_in_one_pass(
+    db: Session, accounts: List[int]
+) -> None:
+    # Arrange
+    dates = [DATES[2], DATES[0], datetime(2023, 11, 3), DATES[2], DATES[3]]
+
+    # Act
+    series = get_balance_series(db, accounts[0], dates)
+
+    # Assert
+    assert series == [scanned_balance(db, accounts[0], date) for date in dates]
+    assert series == [get_account_balance(db, accounts[0], date) for date in dates]
+
+
+def test_yearly_summary_adds_up_the_months(db: Session, accounts: List[int]) -> None:
+    # Act
+    summary = get_period_summary(db, "yearly", account_id=accounts[0])
+
+    # Assert
+    assert summary == [
+        PeriodSummary("2023", Decimal("2500.00"), Decimal("-80.25"), Decimal("2419.75"), 2),
+        PeriodSummary("2024", Decimal("0"), Decimal("-1225.10"), Decimal("-1225.10"), 2),
+    ]
+
+
+def test_unknown_period_is_rejected(db: Session) -> None:
+    # Act / Assert
+    with pytest.raises(ValueError, match="Unknown period"):
+        get_period_summary(db, "weekly")
+
+
+def test_checkpoint_deltas_are_applied_with_a_statement_per_step(
+    db: Session, accounts: List[int]
+) -> None:
+    # Arrange
+    deltas = {
+        (account_id, f"{year}-{month:02d}"): 100
+        for account_id in accounts for year in (2022, 2024) for month in range(1, 13)
+    }
+    statements: List[str] = []
+
+    def record(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        if "balance_checkpoints" in statement:
+            statements.append(statement)
+
+    event.listen(get_engine(), "before_cursor_execute", record)
+
+    # Act
+    apply_checkpoint_deltas(db, deltas)
+    event.remove(get_engine(), "before_cursor_execute", record)
+
+    # Assert
+    assert len(statements) == 2
+    assert checkpoint_total(db, accounts[0], "2023-11") == 2419_75 + 12 * 100
+    assert checkpoint_total(db, accounts[0], "2024-12") == 1194_65 + 24 * 100
@@ -0,0 +1,122 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typer.testing import CliRunner
+
+from ledger.cli import app
+from ledger.models import CategoryRule
+from ledger.rules import Rule, RuleSet, categorize_transactions, load_rules, validate_pattern
+from ledger.storage import bulk_insert_transactions, get_or_create_category, get_transaction_records
+
+
+def rule(id: int, pattern: str, category: str, priority: int = 0, regex: bool = False) -> Rule:
+    return Rule(id, pattern, regex, id, category, priority)
+
+
+def test_higher_priority_wins_over_a_longer_overlapping_phrase() -> None:
+    # Arrange
+    rules = RuleSet([
+        rule(1, "starbucks", "Food"),
+        rule(2, "bucks", "Other", priority=10),
+    ])
+
+    # Act
+    match = rules.match("STARBUCKS #12")
+
+    # Assert
+    assert match is not None and match.category == "Other"
+
+
+def test_oldest_rule_wins_a_priority_tie() -> None:
+    # Arrange
+    rules = RuleSet([
+        rule(2, "super market", "Food"),
+        rule(1, "market", "Shopping"),
+    ])
+
+    # Act
+    match = rules.match("Super Market 42")
+
+    # Assert
+    assert match is not None and match.id == 1
+
+
+def test_regex_and_phrase_rules_compete_on_priority() -> None:
+    # Arrange
+    rules = RuleSet([
+        rule(1, "uber", "Transportation"),
+        rule(2, r"uber\s+eats", "Food", priority=5, regex=True),
+    ])
+
+    # Act
+    eats = rules.match("UBER   EATS order")
+    ride = rules.match("Uber trip")
+
+    # Assert
+    assert eats is not None and eats.category == "Food"
+    assert ride is not None and ride.category == "Transportation"
+
+
+def test_invalid_stored_regex_is_skipped() -> None:
+    # Arrange
+    broken = rule(1, "(unclosed", "Food", priority=99, regex=True)
+
+    # Act
+    rules = RuleSet([broken, rule(2, "unclosed", "Other")])
+
+    # Assert
+    assert rules.invalid == [broken]
+    match = rules.match("(unclosed bracket")
+    assert match is not None and match.id == 2
+
+
+@pytest.mark.parametrize("pattern, regex", [("  ", False), ("[a-", True)])
+def test_validate_pattern_rejects_unusable_patterns(pattern: str, regex: bool) -> None:
+    # Act / Assert
+    with pytest.raises(ValueError):
+        validate_pattern(pattern, regex)
+
+
+def test_validate_pattern_takes_regex_characters_in_phrases_literally() -> None:
+    # Act / Assert
+    validate_pattern("[a-", regex=False)
+
+
+def test_rules_add_refuses_an_invalid_regex(db: Session) -> None:
+    # Act
+    result = CliRunner().invoke(app, ["rules", "add", "--regex", "(coffee", "Food"])
+
+    # Assert
+    assert result.exit_code == 1
+    assert "Invalid regular expression" in result.output
+    assert db.scalars(select(CategoryRule)).all() == []
+
+
+def test_categorize_applies_stored_rules_by_priority(db: Session, account_id: int) -> None:
+    # Arrange
+    db.add_all([
+        CategoryRule(pattern="coffee", category_id=get_or_create_category(db, "Food")),
+        CategoryRule(
+            pattern="^coffee beans", regex=True, priority=1,
+            category_id=get_or_create_category(db, "Shopping"),
+        ),
+    ])
+    bulk_insert_transactions(db, [
+        {"date": datetime(2024, 3, 1), "description": description, "amount": Decimal("-5")}
+        for description in ("Coffee Shop", "Coffee beans 1kg", "Bookstore")
+    ], account_id)
+
+    # Act
+    stats = categorize_transactions(db, load_rules(db))
+    db.commit()
+
+    # Assert
+    assert (stats.scanned, stats.matched, stats.changed) == (3, 2, 2)
+    assert [(r.description, r.category) for r in get_transaction_records(db)] == [
+        ("Coffee Shop", "Food"),
+        ("Coffee beans 1kg", "Shopping"),
+        ("Bookstore", None),
+    ]
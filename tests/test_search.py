@@ -0,0 +1,109 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+import pytest
+from sqlalchemy.orm import Session
+
+from ledger.search import build_match_query, search_transactions
+from ledger.storage import bulk_insert_transactions, create_transaction, delete_transaction
+
+
+@pytest.fixture
+def ledger(db: Session, account_id: int) -> Session:
+    bulk_insert_transactions(db, [
+        {"date": datetime(2024, 3, day), "description": description,
+         "amount": Decimal("-10"), "category": category}
+        for day, description, category in [
+            (1, "Corner Coffee Shop", "Food"),
+            (2, "Coffee beans online", "Shopping"),
+            (3, "Shop rent", "Housing"),
+            (4, "Coffeehouse downtown", None),
+        ]
+    ], account_id)
+    return db
+
+
+def found(db: Session, text: str, raw: bool = False) -> List[str]:
+    return sorted(t.description for t, _ in search_transactions(db, text, raw=raw))
+
+
+def test_words_must_all_match(ledger: Session) -> None:
+    # Act / Assert
+    assert found(ledger, "coffee shop") == ["Corner Coffee Shop"]
+
+
+def test_phrase_matches_adjacent_words_only(ledger: Session) -> None:
+    # Act / Assert
+    assert found(ledger, '"coffee shop"') == ["Corner Coffee Shop"]
+    assert found(ledger, '"shop coffee"') == []
+
+
+def test_prefix_matches_longer_words(ledger: Session) -> None:
+    # Act / Assert
+    assert found(ledger, "coffee") == ["Coffee beans online", "Corner Coffee Shop"]
+    assert found(ledger, "coffee*") == [
+        "Coffee beans online", "Coffeehouse downtown", "Corner Coffee Shop",
+    ]
+
+
+def test_category_is_searchable(ledger: Session) -> None:
+    # Act / Assert
+    assert found(ledger, "housing") == ["Shop rent"]
+
+
+def test_fts_syntax_in_plain_text_is_quoted_away(ledger: Session) -> None:
+    # Act
+    match = build_match_query('shop OR "rent')
+
+    # Assert
+    assert match == '"shop" "OR" "rent"'
+    assert found(ledger, 'rent"') == ["Shop rent"]
+
+
+def test_raw_queries_allow_operators_and_report_bad_syntax(ledger: Session) -> None:
+    # Act / Assert
+    assert found(ledger, "rent OR beans", raw=True) == ["Coffee beans online", "Shop rent"]
+    with pytest.raises(ValueError, match="Invalid search query"):
+        found(ledger, '"unbalanced', raw=True)
+
+
+def test_empty_query_is_rejected(ledger: Session) -> None:
+    # Act / Assert
+    with pytest.raises(ValueError, match="empty"):
+        found(ledger, '  "" * ')
+
+
+def test_deleted_transactions_leave_the_index(ledger: Session) -> None:
+    # Arrange
+    shop = search_transactions(ledger, "corner")[0][0].id
+
+    # Act
+    delete_transaction(ledger, shop)
+
+    # Assert
+    assert found(ledger, "corner") == []
+
+
+def test_bulk_import_indexes_every_batch(db: Session, account_id: int) -> None:
+    # Arrange
+    rows = [
+        {"date": datetime(2024, 4, 1), "description": f"Parking meter {i}",
+         "amount": Decimal("-2"), "category": "Transport"}
+        for i in range(7)
+    ]
+
+    # Act
+    bulk_insert_transactions(db, rows, account_id, batch_size=3)
+
+    # Assert
+    assert len(found(db, "parking")) == 7
+    assert len(found(db, "transport")) == 7
+
+
+def test_bulk_import_leaves_the_index_trigger_in_place(ledger: Session, account_id: int) -> None:
+    # Act
+    create_transaction(ledger, datetime(2024, 4, 2), "Toll bridge", Decimal("-3"), account_id)
+
+    # Assert
+    assert found(ledger, "toll") == ["Toll bridge"]
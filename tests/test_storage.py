@@ -0,0 +1,18 @@
+import os
+from pathlib import Path
+
+from ledger import storage
+
+
+def test_engine_is_created_on_first_use(ledger_path: Path) -> None:
+    # Arrange
+    os.rmdir(ledger_path.parent)
+
+    # Act
+    created_before_use = storage._engine is not None or ledger_path.parent.exists()
+    engine = storage.engine
+
+    # Assert
+    assert not created_before_use
+    assert engine is storage.get_engine()
+    assert ledger_path.parent.is_dir()
@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, List
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from ledger.analysis import get_account_balance
+from ledger.config import DB_PATH
+from ledger.models import BankAccount
+from ledger.storage import (
+    WriteCoordinator, add_transaction, begin_immediate, get_engine, retry_busy,
+)
+
+
+def failing(errors: List[Exception]) -> Callable[[], str]:
+    """Operation that raises the given errors in turn, then succeeds."""
+    def operation() -> str:
+        if errors:
+            raise errors.pop(0)
+        return "done"
+    return operation
+
+
+def locked() -> OperationalError:
+    return OperationalError("BEGIN", {}, sqlite3.OperationalError("database is locked"))
+
+
+def add_account(name: str) -> Callable[[Session], str]:
+    def write(db: Session) -> str:
+        db.add(BankAccount(name=name, account_type="Checking"))
+        db.flush()
+        return name
+    return write
+
+
+def account_names(db: Session) -> List[str]:
+    db.rollback()
+    return sorted(db.scalars(select(BankAccount.name)))
+
+
+def test_busy_errors_are_retried_until_the_operation_succeeds() -> None:
+    # Arrange
+    operation = failing([locked(), locked()])
+
+    # Act
+    result = retry_busy(operation, retries=2, backoff=0)
+
+    # Assert
+    assert result == "done"
+
+
+@pytest.mark.parametrize(
+    "errors",
+    [
+        [locked(), locked(), locked()],
+        [OperationalError("SELECT", {}, sqlite3.OperationalError("no such table: x"))],
+    ],
+    ids=["retries-exhausted", "not-busy"],
+)
+def test_other_errors_and_the_last_busy_error_are_raised(errors: List[Exception]) -> None:
+    # Arrange
+    last = errors[-1]
+
+    # Act / Assert
+    with pytest.raises(OperationalError) as raised:
+        retry_busy(failing(errors), retries=2, backoff=0)
+    assert raised.value is last
+
+
+def test_begin_immediate_takes_the_write_lock(db: Session) -> None:
+    # Arrange
+    other = sqlite3.connect(DB_PATH, timeout=0)
+
+    # Act
+    begin_immediate(db)
+
+    # Assert
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        other.execute("BEGIN IMMEDIATE")
+    db.rollback()
+    other.execute("BEGIN IMMEDIATE")
+    other.rollback()
+    other.close()
+
+
+def test_writes_queued_together_share_one_commit(db: Session) -> None:
+    # Arrange
+    coordinator = WriteCoordinator(window=0.05)
+    commits: List[Any] = []
+    count_commit = commits.append
+    event.listen(get_engine(), "commit", count_commit)
+    started, release = threading.Event(), threading.Event()
+
+    def blocked(session: Session) -> str:
+        started.set()
+        release.wait(5)
+        return add_account("First")(session)
+
+    # Act
+    first = coordinator.submit(blocked)
+    started.wait(5)
+    queued = [coordinator.submit(add_account(f"Queued {i}")) for i in range(5)]
+    release.set()
+    results = [first.result(5)] + [future.result(5) for future in queued]
+
+    # Assert
+    assert results == ["First"] + [f"Queued {i}" for i in range(5)]
+    assert len(commits) == 2
+    assert account_names(db) == sorted(results)
+    event.remove(get_engine(), "commit", count_commit)
+
+
+def test_failing_write_fails_alone(db: Session) -> None:
+    # Arrange
+    coordinator = WriteCoordinator()
+
+    def broken(session: Session) -> None:
+        add_account("Broken")(session)
+        raise ValueError("rejected")
+
+    started, release = threading.Event(), threading.Event()
+
+    def blocked(session: Session) -> str:
+        started.set()
+        release.wait(5)
+        return add_account("First")(session)
+
+    # Act
+    first = coordinator.submit(blocked)
+    started.wait(5)
+    failed = coordinator.submit(broken)
+    last = coordinator.submit(add_account("Last"))
+    release.set()
+
+    # Assert
+    assert first.result(5) == "First"
+    assert last.result(5) == "Last"
+    with pytest.raises(ValueError, match="rejected"):
+        failed.result(5)
+    assert account_names(db) == ["First", "Last"]
+
+
+def test_queued_transactions_update_balances(db: Session, account_id: int) -> None:
+    # Arrange
+    amounts = [Decimal("-4.50"), Decimal("1200.00"), Decimal("-80.25")]
+
+    # Act
+    for day, amount in enumerate(amounts, start=1):
+        add_transaction(datetime(2024, 3, day), "Queued", amount, account_id, "Other")
+
+    # Assert
+    db.rollback()
+    assert get_account_balance(db, account_id, datetime(2024, 3, 31)) == sum(amounts)